@@ -1,19 +1,39 @@
 import chalk
 
+from Knexpy.aio import AsyncKnex
 from Knexpy.builder import Field, FieldParameters, Querybuilder
-from Knexpy.core import Knex
+from Knexpy.cache import CacheStats
+from Knexpy.core import BulkInsertReport, BulkWriteReport, Knex
+from Knexpy.instrumentation import QueryEvent, QueryStat
+from Knexpy.pagination import Page
+from Knexpy.prepared import Param, Prepared
+from Knexpy.rows import Row
 from Knexpy.utils import sqlite_to_native, uuid
+from Knexpy.validators import ValidationError, ValidationIssue
 
 __all__ = [
     # Colorizer
     "chalk",
     # Core
     "Knex",
+    "AsyncKnex",
     # QueryBuilder
     "Field",
     "Querybuilder",
+    "Param",
+    "Prepared",
     # Types
     "FieldParameters",
+    "BulkInsertReport",
+    "BulkWriteReport",
+    "QueryEvent",
+    "QueryStat",
+    "CacheStats",
+    "Page",
+    "Row",
+    "ValidationIssue",
+    # Errors
+    "ValidationError",
     # Utils
     "uuid",
     "sqlite_to_native",
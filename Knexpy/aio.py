@@ -0,0 +1,419 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from sqlite3 import Error
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+)
+
+from chalk import green, yellow
+
+from .builder import Field, Querybuilder
+from .columns import Columns
+from .core import BulkInsertReport, BulkWriteReport, Knex, Relations, ResultFormat
+from .ids import IdStrategy
+from .mappers import TimestampFormat, TimestampStorage
+from .pagination import Page
+from .pragmas import PragmaProfile
+from .prepared import Prepared
+from .rows import Row
+from .transaction import TransactionMode
+
+
+class AsyncKnex:
+    """
+    Asyncio facade over a threaded `Knex`.
+    Chains are composed on the event loop and every statement runs on a small pool
+    of database threads, so the loop is never blocked by SQLite.
+    """
+
+    def __init__(
+        self,
+        db: str,
+        type_check: bool = False,
+        complete: bool = True,
+        timestamps: TimestampFormat = "string",
+        workers: int = 4,
+        timeout: float = 30,
+        cache: int = 0,
+        cache_ttl: float | None = None,
+        cache_bytes: int | None = None,
+        write_queue: int = 0,
+        write_batch: int = 500,
+        write_interval: float = 0.002,
+        profile: PragmaProfile | None = None,
+        pragmas: dict[str, Any] | None = None,
+        instrument: bool = False,
+        slow_query: float | None = None,
+        id_strategy: IdStrategy | None = None,
+        timestamp_storage: TimestampStorage = "real",
+    ) -> None:
+        self.knex = Knex(
+            db,
+            type_check=type_check,
+            complete=complete,
+            timestamps=timestamps,
+            threaded=True,
+            timeout=timeout,
+            cache=cache,
+            cache_ttl=cache_ttl,
+            cache_bytes=cache_bytes,
+            write_queue=write_queue,
+            write_batch=write_batch,
+            write_interval=write_interval,
+            profile=profile,
+            pragmas=pragmas,
+            instrument=instrument,
+            slow_query=slow_query,
+            id_strategy=id_strategy,
+            timestamp_storage=timestamp_storage,
+        )
+        self.logger = self.knex.logger
+        self.__executor = ThreadPoolExecutor(workers, thread_name_prefix="knexpy")
+
+    def __repr__(self) -> str:
+        return f'{yellow("AsyncKnex")}({green("knex")}={self.knex})'
+
+    async def __aenter__(self) -> "AsyncKnex":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def __run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, partial(fn, *args, **kwargs))
+
+    async def __value(self, value: Any) -> Any:
+        return value
+
+    def __capture(self, json: bool = True) -> tuple[str, list[Any], Relations | None]:
+        # The chain lives on the loop thread, it's compiled as soon as the terminal
+        # method is called (not when awaited) so concurrent chains never mix
+        return self.knex._capture(json)
+
+    def count(
+        self, column: str = "*", alias: str | None = None, distinct: bool = False
+    ) -> str:
+        return self.knex.count(column, alias, distinct)
+
+    def sum(self, column: str, alias: str | None = None, distinct: bool = False) -> str:
+        return self.knex.sum(column, alias, distinct)
+
+    def avg(self, column: str, alias: str | None = None, distinct: bool = False) -> str:
+        return self.knex.avg(column, alias, distinct)
+
+    def min(self, column: str, alias: str | None = None) -> str:
+        return self.knex.min(column, alias)
+
+    def max(self, column: str, alias: str | None = None) -> str:
+        return self.knex.max(column, alias)
+
+    def select(self, *args: str | list[str]) -> "AsyncKnex":
+        self.knex.select(*args)
+        return self
+
+    def distinct(self, *args: str | list[str]) -> "AsyncKnex":
+        self.knex.distinct(*args)
+        return self
+
+    def from_(self, table: str | list[str]) -> "AsyncKnex":
+        self.knex.from_(table)
+        return self
+
+    def join(
+        self,
+        table: str | list[str],
+        on: str | list[str],
+        join_type: Literal["INNER", "LEFT", "CROSS"] = "INNER",
+    ) -> "AsyncKnex":
+        self.knex.join(table, on, join_type)
+        return self
+
+    def left_join(self, table: str | list[str], on: str | list[str]) -> "AsyncKnex":
+        self.knex.left_join(table, on)
+        return self
+
+    def include(self, table: str, key: str | None = None) -> "AsyncKnex":
+        self.knex.include(table, key)
+        return self
+
+    def where(
+        self,
+        column: str,
+        operator: Literal["=", "<", "<=", ">", ">=", "IN", "NOT IN", "<>", "LIKE"],
+        value: Any,
+        join_type: Literal["AND", "OR"] = "AND",
+    ) -> "AsyncKnex":
+        self.knex.where(column, operator, value, join_type)
+        return self
+
+    def where_in(
+        self,
+        column: str,
+        value: list[Any] | Querybuilder,
+        join_type: Literal["AND", "OR"] = "AND",
+    ) -> "AsyncKnex":
+        self.knex.where_in(column, value, join_type)
+        return self
+
+    def where_not_in(
+        self,
+        column: str,
+        value: list[Any] | Querybuilder,
+        join_type: Literal["AND", "OR"] = "AND",
+    ) -> "AsyncKnex":
+        self.knex.where_not_in(column, value, join_type)
+        return self
+
+    def where_null(self, column: str) -> "AsyncKnex":
+        self.knex.where_null(column)
+        return self
+
+    def where_not_null(self, column: str) -> "AsyncKnex":
+        self.knex.where_not_null(column)
+        return self
+
+    def limit(self, n: int) -> "AsyncKnex":
+        self.knex.limit(n)
+        return self
+
+    def group_by(self, *columns: str) -> "AsyncKnex":
+        self.knex.group_by(*columns)
+        return self
+
+    def having(
+        self,
+        column: str,
+        operator: Literal["=", "<", "<=", ">", ">=", "<>", "IS", "IS NOT", "LIKE"],
+        value: Any,
+        join_type: Literal["AND", "OR"] = "AND",
+    ) -> "AsyncKnex":
+        self.knex.having(column, operator, value, join_type)
+        return self
+
+    def order_by(self, column: str, order: Literal["ASC", "DESC"] = "ASC") -> "AsyncKnex":
+        self.knex.order_by(column, order)
+        return self
+
+    def update(
+        self,
+        table: str,
+        fields: list[str],
+        values: list[Any],
+        update_modified: bool = True,
+    ) -> "AsyncKnex":
+        self.knex.update(table, fields, values, update_modified=update_modified)
+        return self
+
+    def delete(self, table: str) -> "AsyncKnex":
+        self.knex.delete(table)
+        return self
+
+    def subquery(self) -> Querybuilder:
+        return self.knex.subquery()
+
+    def to_string(self, colorize: bool = False) -> str:
+        return self.knex.to_string(colorize)
+
+    async def table(
+        self,
+        name: str,
+        fields: "list[Field] | list[str]",
+        not_exists: bool = True,
+        index_timestamps: bool = False,
+        id_strategy: IdStrategy | None = None,
+        timestamp_storage: TimestampStorage | None = None,
+    ) -> bool:
+        return await self.__run(
+            self.knex.table,
+            name,
+            fields,
+            not_exists,
+            index_timestamps,
+            id_strategy,
+            timestamp_storage,
+        )
+
+    def query(
+        self,
+        json: bool = True,
+        cache: bool = True,
+        format: ResultFormat | None = None,
+        size: int = 500,
+    ) -> Awaitable[list[tuple[Any]] | list[dict[str, Any]] | list[Row] | Columns]:
+        if format in ["columns", "numpy"]:
+            table = self.knex.query_builder.table_name
+            statement, values, _ = self.__capture(False)
+            return self.__run(
+                self.knex._columns, statement, values, table, size, format == "numpy"
+            )
+        if format != None:
+            if format not in ["dicts", "tuples", "rows"]:
+                self.knex.query_builder.reset()
+                raise Error(f"Unknown result format: {format}")
+            json = format == "dicts"
+        statement, values, relations = self.__capture(json)
+        return self.__run(
+            self.knex._fetch, statement, values, json, relations, cache, format == "rows"
+        )
+
+    def paginate(
+        self,
+        page_size: int,
+        after: str | None = None,
+        json: bool = True,
+        key: str = "id",
+    ) -> Awaitable[Page]:
+        try:
+            columns = self.knex.query_builder.paginate(page_size, after, key)
+        except Error:
+            self.knex.query_builder.reset()
+            raise
+        statement, values, relations = self.__capture(json)
+        return self.__run(
+            self.knex._paginate, statement, values, columns, page_size, json, relations
+        )
+
+    def prepare(
+        self, chain: "AsyncKnex | Callable[[Knex], Any]", json: bool = True
+    ) -> Prepared:
+        # Compiling never touches the database, it's done right away on the loop
+        return self.knex.prepare(chain if callable(chain) else self.knex, json)
+
+    def run(self, prepared: Prepared, **params: Any) -> Awaitable[Any]:
+        values = prepared.bind(**params)
+        if prepared.kind == "SELECT":
+            return self.__run(
+                self.knex._fetch,
+                prepared.sql,
+                values,
+                prepared.json,
+                prepared.relations,
+                True,
+            )
+        return self.__run(self.knex._execute, prepared.sql, values)
+
+    def execute(self) -> Awaitable[bool]:
+        if self.knex.query_builder.current_transaction not in ["UPDATE", "DELETE"]:
+            self.logger.error(
+                f"Cannot use execute on {self.knex.query_builder.current_transaction} operation."
+            )
+            self.knex.query_builder.reset()
+            return self.__value(False)
+        statement, values, _ = self.__capture()
+        return self.__run(self.knex._execute, statement, values)
+
+    async def insert(self, table: str, fields: "list[str]", values: list[Any]) -> bool:
+        return await self.__run(self.knex.insert, table, fields, values)
+
+    async def insert_json(
+        self, table: str, data: Dict[str, Any] | List[Dict[str, Any]]
+    ) -> "AsyncKnex":
+        await self.__run(self.knex.insert_json, table, data)
+        return self
+
+    async def bulk_insert(
+        self,
+        table: str,
+        rows: Iterable[Dict[str, Any]],
+        batch_size: int = 10000,
+        commit_every: int | None = None,
+    ) -> BulkInsertReport | Literal[False]:
+        return await self.__run(
+            self.knex.bulk_insert, table, rows, batch_size, commit_every
+        )
+
+    async def upsert(
+        self,
+        table: str,
+        rows: Iterable[Dict[str, Any]],
+        conflict: list[str] | None = None,
+        update: list[str] | None = None,
+        update_modified: bool = True,
+        batch_size: int = 10000,
+    ) -> BulkWriteReport | Literal[False]:
+        return await self.__run(
+            self.knex.upsert, table, rows, conflict, update, update_modified, batch_size
+        )
+
+    async def bulk_update(
+        self,
+        table: str,
+        rows: Iterable[Dict[str, Any]],
+        key: str = "id",
+        update_modified: bool = True,
+        batch_size: int = 10000,
+    ) -> BulkWriteReport | Literal[False]:
+        return await self.__run(
+            self.knex.bulk_update, table, rows, key, update_modified, batch_size
+        )
+
+    async def bulk_delete(
+        self,
+        table: str,
+        keys: Iterable[Any],
+        key: str = "id",
+        batch_size: int = 10000,
+    ) -> BulkWriteReport | Literal[False]:
+        return await self.__run(self.knex.bulk_delete, table, keys, key, batch_size)
+
+    async def transaction(
+        self,
+        fn: Callable[[Knex], Any],
+        mode: TransactionMode = "DEFERRED",
+        retries: int = 3,
+        backoff: float = 0.05,
+    ) -> Any:
+        # A transaction is bound to the writer thread, so the whole unit of work runs
+        # there as a plain function and is retried as a whole when the database is busy
+        return await self.__run(
+            self.knex.transaction(mode, retries, backoff)(fn), self.knex
+        )
+
+    async def raw(self, sql: str, params: list[Any] | None = None, json: bool = True):
+        return await self.__run(self.knex.raw, sql, params, json)
+
+    def stream(self, size: int = 500, json: bool = True) -> AsyncIterator[Any]:
+        statement, values, relations = self.__capture(json)
+        return self.__stream(statement, values, size, json, relations)
+
+    async def __stream(
+        self,
+        statement: str,
+        values: list[Any],
+        size: int,
+        json: bool,
+        relations: Relations | None,
+    ) -> AsyncIterator[Any]:
+        iterator = await self.__run(
+            self.knex._stream, statement, values, size, json, relations
+        )
+        try:
+            while True:
+                chunk = await self.__run(lambda: list(islice(iterator, size)))
+                if len(chunk) == 0:
+                    break
+                for row in chunk:
+                    yield row
+        finally:
+            # Closes the underlying cursor when the consumer stops early
+            close = getattr(iterator, "close", None)
+            if close != None:
+                await self.__run(close)
+
+    async def close(self) -> None:
+        await self.__run(self.knex.close)
+        self.__executor.shutdown(wait=True)
+
+    @property
+    def db_tables(self):
+        return self.knex.db_tables
@@ -1,11 +1,28 @@
+import json
+from datetime import datetime
 from logging import Logger
 from sqlite3 import Error
-from time import time
-from typing import Any, Literal, Optional, TypedDict
+from typing import Any, Callable, Literal, Optional, TypedDict
 
 import chalk
 
-from .utils import uuid
+from .ids import IdStrategy, hex_id, id_type
+from .mappers import (
+    NON_WORD,
+    TIMESTAMP_COLUMNS,
+    TIMESTAMP_TYPES,
+    TimestampStorage,
+    now_real,
+    to_storage,
+)
+from .pagination import decode_cursor
+from .prepared import PARTITION_LOWER, PARTITION_UPPER, Param
+
+
+class Aggregate(str):
+    "Unaliased aggregate expression, `select` names it `name` (e.g. sum_price)"
+
+    name: str
 
 
 class FieldParameters(TypedDict, total=False):
@@ -14,6 +31,7 @@ class FieldParameters(TypedDict, total=False):
     null: Optional[bool]
     auto_increment: Optional[bool]
     unique: Optional[bool]
+    index: Optional[bool]
 
 
 default_params: FieldParameters = {
@@ -21,6 +39,7 @@ default_params: FieldParameters = {
     "null": False,
     "auto_increment": False,
     "unique": False,
+    "index": False,
 }
 
 
@@ -41,6 +60,7 @@ class Field:
             "" if not params.get("auto_increment", False) else "AUTOINCREMENT"
         )
         self.column = f"{name} {type} {primary_key} {auto_increment} {unique} {null}"
+        self.index = params.get("index", False)
         self.is_foreign_key = False
         self.foreign_template = "FOREIGN KEY({column}) REFERENCES {table}({foreign})"
 
@@ -108,9 +128,21 @@ class Querybuilder:
 
     ALLOWED_WHERE = ["SELECT", "UPDATE", "DELETE"]
 
-    def __init__(self, logger: Logger) -> None:
+    def __init__(
+        self,
+        logger: Logger,
+        timestamp_storage: TimestampStorage = "real",
+        max_variables: int = 999,
+        storages: Optional[Callable[[str], TimestampStorage]] = None,
+    ) -> None:
         self.logger = logger
         self.values = []
+        # Unit used when binding datetime values, unless `storages` knows the one of
+        # the table the chain runs on
+        self.timestamp_storage = timestamp_storage
+        self.storages = storages
+        # SQLITE_LIMIT_VARIABLE_NUMBER of the connection the query runs on
+        self.max_variables = max_variables
 
         self.__flags = {
             "select": {"chains": 1, "current": 0},
@@ -125,6 +157,7 @@ class Querybuilder:
 
         self.__originals = {
             "create": "CREATE TABLE {exists} {table}({columns});",
+            "index": "CREATE {unique} INDEX {exists} {name} ON {table}({columns}) {where};",
             "insert": "INSERT INTO {table}({columns}) VALUES ({values});",
             "update": "UPDATE {table} SET {columns_values} {where};",
             "delete": "DELETE FROM {table} {where};",
@@ -135,7 +168,22 @@ class Querybuilder:
         self.__where = None
         self.__order = None
         self.__limit = None
-        self.__query = "{select} {from} {where} {order} {limit};"
+        self.__joins: list[str] = []
+        self.__distinct = False
+        self.__group: list[str] = []
+        self.__having = None
+        # HAVING comes after WHERE in the statement, so its binds are kept last
+        self.__having_binds = 0
+        # (column, direction) pairs, used to seek on paginated queries
+        self.__sort: list[tuple[str, str]] = []
+        # Main table of the chain and the relations to load along with it
+        self.__table: Optional[str] = None
+        self.__alias: Optional[str] = None
+        self.__includes: list[tuple[str, Optional[str]]] = []
+        # Whether `values` holds placeholders to resolve before running
+        self.__parameters = False
+        # (position in `values`, clock) of the modified_at set by `update`
+        self.__clock: Optional[tuple[int, Callable[[], Any]]] = None
         # Transactions
         self.__create = self.__originals.get("create", "")
         self.__insert = self.__originals.get("insert", "")
@@ -147,8 +195,44 @@ class Querybuilder:
     def __repr__(self):
         return f'QueryBuilder(query="{self.to_string()}", values={self.values})'
 
-    def count(self, column: str = "*") -> str:
-        return f"COUNT({column})"
+    def count(
+        self, column: str = "*", alias: Optional[str] = None, distinct: bool = False
+    ) -> str:
+        return self.__aggregate("COUNT", column, alias, distinct)
+
+    def sum(
+        self, column: str, alias: Optional[str] = None, distinct: bool = False
+    ) -> str:
+        return self.__aggregate("SUM", column, alias, distinct)
+
+    def avg(
+        self, column: str, alias: Optional[str] = None, distinct: bool = False
+    ) -> str:
+        return self.__aggregate("AVG", column, alias, distinct)
+
+    def min(self, column: str, alias: Optional[str] = None) -> str:
+        return self.__aggregate("MIN", column, alias)
+
+    def max(self, column: str, alias: Optional[str] = None) -> str:
+        return self.__aggregate("MAX", column, alias)
+
+    def __aggregate(
+        self,
+        function: str,
+        column: str,
+        alias: Optional[str] = None,
+        distinct: bool = False,
+    ) -> str:
+        expression = f"{function}({'DISTINCT ' if distinct else ''}{column})"
+        if alias:
+            return f"{expression} AS {alias}"
+        if function == "COUNT":
+            # Mapped to `count` with every other COUNT column, see `column_names`
+            return expression
+        # Stays a plain expression for `having`, only `select` adds the alias
+        aggregate = Aggregate(expression)
+        aggregate.name = f"{function.lower()}_{NON_WORD.sub('_', column).strip('_')}"
+        return aggregate
 
     def select(self, *args: str | list[str]) -> "Querybuilder":
         if self.__current_transaction != "SELECT" and self.__current_transaction:
@@ -169,7 +253,9 @@ class Querybuilder:
             f = ["*"]
         else:
             for i, arg in enumerate(f):
-                if type(arg) == str:
+                if type(arg) == Aggregate:
+                    f[i] = f"{arg} AS {arg.name}"
+                elif type(arg) == str:
                     pass
                 elif type(arg) == list:
                     if len(arg) != 2:
@@ -188,6 +274,13 @@ class Querybuilder:
         self.__flags["select"]["current"] += 1
         return self
 
+    def distinct(self, *args: str | list[str]) -> "Querybuilder":
+        "SELECT DISTINCT, columns given here are selected as with `select`"
+        if len(args) > 0 or self.__current_transaction != "SELECT":
+            self.select(*args)
+        self.__distinct = True
+        return self
+
     def from_(self, table: str | list[str]) -> "Querybuilder":
         if self.__current_transaction != "SELECT" and self.__current_transaction:
             raise Error("Currently not allowed until pending transaction is completed")
@@ -203,12 +296,59 @@ class Querybuilder:
                 raise TypeError(
                     "For table aliases, 2 arguments are required: [TABLE, ALIAS]"
                 )
+            if not self.__table:
+                self.__table = table[0]
+                self.__alias = table[1]
             table = f"{table[0]} {table[1]}"
+        elif not self.__table:
+            self.__table = table  # type: ignore
         self.__from = self.__from.replace("<table>", table)  # type: ignore
         # self.__from = f"FROM {table}"
         self.__flags["from"]["current"] += 1
         return self
 
+    def join(
+        self,
+        table: str | list[str],
+        on: str | list[str],
+        join_type: Literal["INNER", "LEFT", "CROSS"] = "INNER",
+    ) -> "Querybuilder":
+        if self.__current_transaction != "SELECT" and self.__current_transaction:
+            raise Error("Currently not allowed until pending transaction is completed")
+        if type(table) == list:
+            if len(table) != 2:
+                self.logger.error(
+                    "For table aliases, 2 arguments are required: [TABLE, ALIAS]"
+                )
+                raise TypeError(
+                    "For table aliases, 2 arguments are required: [TABLE, ALIAS]"
+                )
+            table = f"{table[0]} {table[1]}"
+        if type(on) == list:
+            if len(on) == 2:
+                on = f"{on[0]} = {on[1]}"
+            elif len(on) == 3:
+                on = f"{on[0]} {on[1]} {on[2]}"
+            else:
+                self.logger.error(
+                    "For join conditions, 2 or 3 arguments are required: [COLUMN, (OPERATOR), COLUMN]"
+                )
+                raise TypeError(
+                    "For join conditions, 2 or 3 arguments are required: [COLUMN, (OPERATOR), COLUMN]"
+                )
+        self.__joins.append(f"{join_type} JOIN {table} ON {on}")
+        return self
+
+    def left_join(self, table: str | list[str], on: str | list[str]) -> "Querybuilder":
+        return self.join(table, on, "LEFT")
+
+    def include(self, table: str, key: Optional[str] = None) -> "Querybuilder":
+        "Relation loaded through a foreign key once the query runs, see `Knex.include`"
+        if self.__current_transaction != "SELECT":
+            raise Error("Relations can only be included on SELECT queries")
+        self.__includes.append((table, key))
+        return self
+
     def where(
         self,
         column: str,
@@ -222,27 +362,108 @@ class Querybuilder:
             raise Error(
                 f"Cannot use {chalk.blue('WHERE')} clause on a {self.__current_transaction} transaction."
             )
-        subquery_values = []
-        if self.__flags["where"]["current"] == 0 or not self.__where:
-            self.__where = "WHERE <clause>"
-        else:
-            self.__where = f"{self.__where} {join_type} <clause>"
         if isinstance(value, Querybuilder):
-            subquery_values.append(*value.values)
+            binds = value.values
+            self.__parameters = self.__parameters or value.parameters
             value = f"({value.to_string().replace(';','')})"
-            for _ in subquery_values:
-                self.values.append(_)
         else:
-            self.values.append(value)
+            binds = [self.bind(column, value)]
             value = "?"
-        self.__where = self.__where.replace("<clause>", f"{column} {operator} {value}")
-        self.__flags["where"]["current"] += 1
+        self.__add_where(f"{column} {operator} {value}", binds, join_type)
         return self
 
-    def where_in(self, column: str, value: list[Any]) -> "Querybuilder":
-        if type(value) != list:
+    def __add_where(
+        self, clause: str, binds: list[Any], join_type: Literal["AND", "OR"]
+    ) -> None:
+        if self.__flags["where"]["current"] == 0 or not self.__where:
+            self.__where = f"WHERE {clause}"
+        else:
+            self.__where = f"{self.__where} {join_type} {clause}"
+        self.__bind_where(binds)
+        self.__flags["where"]["current"] += 1
+
+    def __bind_where(self, binds: list[Any]) -> None:
+        split = len(self.values) - self.__having_binds
+        self.values = [*self.values[:split], *binds, *self.values[split:]]
+
+    def bind(self, column: str, value: Any) -> Any:
+        timestamp = column.split(".")[-1] in TIMESTAMP_COLUMNS
+        if isinstance(value, Param):
+            self.__parameters = True
+            if timestamp:
+                storage = self.__storage()
+                return value.encoded(
+                    lambda _: to_storage(_, storage) if isinstance(_, datetime) else _
+                )
+            return value
+        # datetimes compared against the timestamp columns are bound as numbers
+        if isinstance(value, datetime) and timestamp:
+            return to_storage(value, self.__storage())
+        return value
+
+    def __storage(self) -> TimestampStorage:
+        if self.__table and self.storages != None:
+            return self.storages(self.__table)
+        return self.timestamp_storage
+
+    def where_in(
+        self,
+        column: str,
+        value: "list[Any] | Querybuilder",
+        join_type: Literal["AND", "OR"] = "AND",
+    ) -> "Querybuilder":
+        return self.__where_list(column, "IN", value, join_type)
+
+    def where_not_in(
+        self,
+        column: str,
+        value: "list[Any] | Querybuilder",
+        join_type: Literal["AND", "OR"] = "AND",
+    ) -> "Querybuilder":
+        return self.__where_list(column, "NOT IN", value, join_type)
+
+    def __where_list(
+        self,
+        column: str,
+        operator: Literal["IN", "NOT IN"],
+        value: "list[Any] | Querybuilder",
+        join_type: Literal["AND", "OR"],
+    ) -> "Querybuilder":
+        if isinstance(value, Querybuilder):
+            return self.where(column, operator, value, join_type)
+        if self.__current_transaction not in self.ALLOWED_WHERE:
+            raise Error(
+                f"Cannot use {chalk.blue('WHERE')} clause on a {self.__current_transaction} transaction."
+            )
+        if isinstance(value, Param):
+            # The list is only known when the statement runs, any length fits one bind
+            self.__parameters = True
+            binds = [value.encoded(json.dumps)]
+            self.__add_where(
+                f"{column} {operator} (SELECT value FROM json_each(?))", binds, join_type
+            )
+            return self
+        if type(value) not in [list, tuple, set]:
             self.logger.error("Value must be of type List")
-        self.where(column, "IN", f"({','.join(value)})")
+            raise TypeError("Value must be of type List")
+        binds = [self.bind(column, _) for _ in value]
+        if len(self.values) + len(binds) <= self.max_variables:
+            placeholders = ", ".join("?" for _ in binds)
+        elif all(isinstance(_, (bytes, bytearray, memoryview)) for _ in binds):
+            # Blob literals don't count against the variable limit
+            placeholders = ", ".join(f"X'{bytes(_).hex()}'" for _ in binds)
+            binds = []
+        else:
+            # Past the variable limit the whole list travels as a single JSON array,
+            # SQLite still probes the column index once per element
+            try:
+                payload = json.dumps(binds)
+            except (TypeError, ValueError) as e:
+                self.logger.error(e)
+                raise Error(f"Cannot bind {len(binds)} values for {column}: {e}")
+            placeholders = "SELECT value FROM json_each(?)"
+            binds = [payload]
+        self.__add_where(f"{column} {operator} ({placeholders})", binds, join_type)
         return self
 
     def where_null(self, column: str) -> "Querybuilder":
@@ -278,17 +499,116 @@ class Querybuilder:
         else:
             self.__order = f"{self.__order}, <column> <order>"
         self.__order = self.__order.replace("<column>", column).replace("<order>", order)
+        self.__sort.append((column, order))
         self.__flags["sort"]["current"] += 1
         return self
 
+    def group_by(self, *columns: str) -> "Querybuilder":
+        if self.__current_transaction != "SELECT":
+            raise Error(f"{chalk.blue('GROUP BY')} is only available on SELECT queries")
+        if len(columns) == 0:
+            raise Error(f"{chalk.blue('GROUP BY')} requires at least one column")
+        self.__group.extend(columns)
+        return self
+
+    def having(
+        self,
+        column: str,
+        operator: Literal["=", "<", "<=", ">", ">=", "<>", "IS", "IS NOT", "LIKE"],
+        value: Any,
+        join_type: Literal["AND", "OR"] = "AND",
+    ) -> "Querybuilder":
+        "`column` is an aggregate expression or the alias of a selected one"
+        if self.__current_transaction != "SELECT":
+            raise Error(f"{chalk.blue('HAVING')} is only available on SELECT queries")
+        clause = f"{column} {operator} ?"
+        if self.__having:
+            self.__having = f"{self.__having} {join_type} {clause}"
+        else:
+            self.__having = f"HAVING {clause}"
+        self.values = [*self.values, self.bind(column, value)]
+        self.__having_binds += 1
+        return self
+
+    def paginate(
+        self, page_size: int, after: Optional[str] = None, key: str = "id"
+    ) -> list[str]:
+        """
+        Turns the current SELECT into a keyset page: rows after the cursor on the
+        ORDER BY columns plus `key`, one extra row fetched to tell if more are left.
+        Returns the seek columns, in cursor order.
+        """
+        if self.__current_transaction != "SELECT":
+            raise Error("Pagination is only available on SELECT queries")
+        if page_size <= 0:
+            raise Error("Page size must be higher than 0.")
+        if self.__limit:
+            raise Error(f"Cannot paginate a query with a {chalk.red('LIMIT')}")
+        if self.__group:
+            raise Error(f"Cannot paginate a query with a {chalk.red('GROUP BY')}")
+        sort = [_ for _ in self.__sort if _[0] != key]
+        direction = self.__sort[0][1] if self.__sort else "ASC"
+        if any(_[1] != direction for _ in self.__sort):
+            raise Error("Pagination requires every ORDER BY column in the same direction")
+        columns = [*[_[0] for _ in sort], key]
+        if after:
+            seek = ", ".join(columns)
+            binds = ", ".join("?" for _ in columns)
+            clause = f"({seek}) {'>' if direction == 'ASC' else '<'} ({binds})"
+            if self.__where:
+                # Existing clauses may be OR-joined, they must not swallow the seek
+                self.__where = f"WHERE ({self.__where[len('WHERE '):]}) AND {clause}"
+            else:
+                self.__where = f"WHERE {clause}"
+            self.__bind_where(decode_cursor(after, len(columns)))
+        self.__order = "ORDER BY " + ", ".join(f"{_} {direction}" for _ in columns)
+        self.__limit = f"LIMIT {page_size + 1}"
+        return columns
+
+    def partition(self, key: str = "rowid") -> list[tuple[str, str]]:
+        """
+        Restricts the current SELECT to a range of `key`, given when the statement runs
+        as the `PARTITION_LOWER` (inclusive) and `PARTITION_UPPER` (exclusive)
+        parameters. Returns the ORDER BY (column, direction) pairs.
+        """
+        if self.__current_transaction != "SELECT" or not self.__table:
+            raise Error("Only SELECT queries on a table can be partitioned")
+        for clause, present in [
+            ("LIMIT", self.__limit),
+            ("GROUP BY", self.__group),
+            ("DISTINCT", self.__distinct),
+        ]:
+            # Each partition would apply it on its own rows only
+            if present:
+                raise Error(f"Cannot partition a query with a {chalk.red(clause)}")
+        if any(_[1] != self.__sort[0][1] for _ in self.__sort):
+            raise Error(
+                "Partitioning requires every ORDER BY column in the same direction"
+            )
+        column = key if "." in key else f"{self.__alias or self.__table}.{key}"
+        clause = f"{column} >= ? AND {column} < ?"
+        if self.__where:
+            self.__where = f"WHERE ({self.__where[len('WHERE '):]}) AND {clause}"
+        else:
+            self.__where = f"WHERE {clause}"
+        self.__bind_where([Param(PARTITION_LOWER), Param(PARTITION_UPPER)])
+        self.__parameters = True
+        return list(self.__sort)
+
     def table(
-        self, name: str, fields: "list[Field] | list[str]", not_exists: bool = True
+        self,
+        name: str,
+        fields: "list[Field] | list[str]",
+        not_exists: bool = True,
+        id_strategy: IdStrategy = "hex",
+        timestamp_storage: TimestampStorage = "real",
     ) -> str:
         table_create = self.__create
         fields.insert(
             0,
-            Field.varchar(
+            Field(
                 "id",
+                id_type(id_strategy),
                 params={
                     "primary_key": True,
                 },
@@ -296,8 +616,8 @@ class Querybuilder:
         )
         fields = [
             *fields,
-            Field.datetime("created_at"),
-            Field.datetime("modified_at"),
+            Field("created_at", TIMESTAMP_TYPES[timestamp_storage]),
+            Field("modified_at", TIMESTAMP_TYPES[timestamp_storage]),
         ]  # type: ignore
         foreign = []
         columns = []
@@ -317,20 +637,70 @@ class Querybuilder:
         )
         return table_create
 
-    def insert(self, table: str, fields: "list[str]", values: list[Any]) -> str:
+    def index(
+        self,
+        table: str,
+        columns: str | list[str],
+        unique: bool = False,
+        where: str | None = None,
+        name: str | None = None,
+        not_exists: bool = True,
+    ) -> str:
+        if type(columns) == str:
+            columns = [columns]
+        if len(columns) == 0:
+            raise Error("At least one column is required to create an index")
+        if not name:
+            name = f"{'ux' if unique else 'ix'}_{table}_{'_'.join(columns)}"
+        return (
+            self.__originals.get("index", "")
+            .replace("{unique}", "UNIQUE" if unique else "")
+            .replace("{exists}", "IF NOT EXISTS" if not_exists else "")
+            .replace("{name}", name)
+            .replace("{table}", table)
+            .replace("{columns}", ", ".join(columns))
+            .replace("{where}", f"WHERE {where}" if where else "")
+        )
+
+    def indexes(
+        self,
+        table: str,
+        fields: "list[Field] | list[str]",
+        timestamps: bool = False,
+        not_exists: bool = True,
+    ) -> list[str]:
+        statements = []
+        for field in fields:
+            # Foreign keys are always looked up by value, SQLite doesn't index them
+            if isinstance(field, Field) and (field.index or field.is_foreign_key):
+                statements.append(self.index(table, field.name, not_exists=not_exists))
+        if timestamps:
+            for column in ["created_at", "modified_at"]:
+                statements.append(self.index(table, column, not_exists=not_exists))
+        return statements
+
+    def insert(
+        self,
+        table: str,
+        fields: "list[str]",
+        values: list[Any],
+        generate_id: Optional[Callable[[], Any]] = hex_id,
+        now: Callable[[], Any] = now_real,
+    ) -> str:
         if self.__current_transaction != "INSERT" and self.__current_transaction:
             raise Error("Currently not allowed until pending transaction is completed")
         self.__current_transaction = "INSERT"
         t_insert = self.__insert
         if len(fields) != len(values):
             raise Error("Values inserted do not match number of fields")
-        fields.insert(0, "id")
-        values.insert(0, uuid(*fields, *values))
-        _t = time()
+        if generate_id:
+            fields.insert(0, "id")
+            values.insert(0, generate_id())
+        _t = now()
         fields.append("created_at")
         fields.append("modified_at")
-        values.append(f"{_t}")
-        values.append(f"{_t}")
+        values.append(_t)
+        values.append(_t)
         t_insert = (
             t_insert.replace("{table}", table)
             .replace("{columns}", f"{', '.join(fields)}")
@@ -339,23 +709,84 @@ class Querybuilder:
         self.values = [*self.values, *values]
         return t_insert
 
+    def bulk_insert(self, table: str, fields: "list[str]", with_id: bool = True) -> str:
+        columns = [*(["id"] if with_id else []), *fields, "created_at", "modified_at"]
+        return (
+            self.__originals.get("insert", "")
+            .replace("{table}", table)
+            .replace("{columns}", f"{', '.join(columns)}")
+            .replace("{values}", f"{','.join('?' for _ in columns)}")
+        )
+
+    def upsert(
+        self,
+        table: str,
+        fields: "list[str]",
+        conflict: "list[str]",
+        update: "list[str]",
+        with_id: bool = True,
+        update_modified: bool = True,
+    ) -> str:
+        if len(conflict) == 0:
+            raise Error("At least one conflict column is required")
+        statement = self.bulk_insert(table, fields, with_id).rstrip(";")
+        assignments = [f"{_}=excluded.{_}" for _ in update]
+        if update_modified and len(assignments) > 0:
+            assignments.append("modified_at=excluded.modified_at")
+        if len(assignments) == 0:
+            return f"{statement} ON CONFLICT({', '.join(conflict)}) DO NOTHING;"
+        return (
+            f"{statement} ON CONFLICT({', '.join(conflict)}) "
+            f"DO UPDATE SET {', '.join(assignments)};"
+        )
+
+    def bulk_update(
+        self,
+        table: str,
+        fields: "list[str]",
+        key: str = "id",
+        update_modified: bool = True,
+    ) -> str:
+        columns = [_ for _ in fields if _ != key]
+        if update_modified:
+            columns.append("modified_at")
+        if len(columns) == 0:
+            raise Error(f"Nothing to update besides {key}")
+        return (
+            self.__originals.get("update", "")
+            .replace("{table}", table)
+            .replace("{columns_values}", ", ".join(f"{_}=?" for _ in columns))
+            .replace("{where}", f"WHERE {key} = ?")
+        )
+
+    def bulk_delete(self, table: str, key: str = "id") -> str:
+        return (
+            self.__originals.get("delete", "")
+            .replace("{table}", table)
+            .replace("{where}", f"WHERE {key} = ?")
+        )
+
     def update(
         self,
         table: str,
         fields: list[str],
         values: list[Any],
         update_modified: bool = True,
+        now: Callable[[], Any] = now_real,
     ) -> "Querybuilder":
         if self.__current_transaction != "UPDATE" and self.__current_transaction:
             raise Error("Currently not allowed until pending transaction is completed")
         self.__current_transaction = "UPDATE"
         if self.__flags["update"]["current"] >= self.__flags["update"]["chains"]:
             return self
+        self.__table = table
         if len(fields) != len(values):
             raise Error("Values inserted do not match number of fields")
         if update_modified:
             fields.append("modified_at")
-            values.append(time())
+            values.append(now())
+            # Prepared updates read the clock again on every run
+            self.__clock = (len(self.values) + len(values) - 1, now)
         self.__update = self.__update.replace("{table}", table).replace(
             "{columns_values}", ", ".join([f"{fields[i]}=?" for i in range(len(values))])
         )
@@ -372,6 +803,7 @@ class Querybuilder:
         self.__current_transaction = "DELETE"
         if self.__flags["delete"]["current"] >= self.__flags["delete"]["chains"]:
             return self
+        self.__table = table
         self.__delete = self.__delete.replace("{table}", table)
         self.__flags["delete"]["current"] += 1
         return self
@@ -384,22 +816,34 @@ class Querybuilder:
         return self._build_query(colorize)
 
     def _build_query(self, colorize: bool = False) -> str:
-        query = (
-            self.__query.replace("{select}", self.__select if self.__select else "")
-            .replace("{from}", self.__from if self.__from else "")
-            .replace("{where}", self.__where if self.__where else "")
-            .replace("{order}", self.__order if self.__order else "")
-            .replace("{limit}", self.__limit if self.__limit else "")
-        )
+        select = self.__select
+        if self.__distinct and select:
+            select = select.replace("SELECT", "SELECT DISTINCT", 1)
+        group = f"GROUP BY {', '.join(self.__group)}" if self.__group else None
+        parts = [
+            select,
+            self.__from,
+            *self.__joins,
+            self.__where,
+            group,
+            self.__having,
+            self.__order,
+            self.__limit,
+        ]
+        query = " ".join(_ for _ in parts if _) + ";"
 
         if colorize:
             query = query.replace("SELECT", chalk.yellow("SELECT"))
             query = query.replace("FROM", f'\n{chalk.yellow("FROM")}')
+            for keyword in ["INNER JOIN", "LEFT JOIN", "CROSS JOIN"]:
+                query = query.replace(keyword, f"\n{chalk.yellow(keyword)}")
             query = query.replace("WHERE", f'\n{chalk.yellow("WHERE")}')
+            query = query.replace("GROUP BY", f'\n{chalk.yellow("GROUP BY")}')
+            query = query.replace("HAVING", f'\n{chalk.yellow("HAVING")}')
             query = query.replace("LIMIT", f'\n{chalk.yellow("LIMIT")}')
             query = query.replace("ORDER BY", f'\n{chalk.yellow("ORDER BY")}')
 
-        return query.replace("  ", "")
+        return query
 
     def reset(self) -> "Querybuilder":
         for _ in self.__flags.keys():
@@ -409,6 +853,17 @@ class Querybuilder:
         self.__where = None
         self.__order = None
         self.__limit = None
+        self.__joins = []
+        self.__distinct = False
+        self.__group = []
+        self.__having = None
+        self.__having_binds = 0
+        self.__sort = []
+        self.__table = None
+        self.__alias = None
+        self.__includes = []
+        self.__parameters = False
+        self.__clock = None
         self.__from = None
         self.__create = self.__originals.get("create", "")
         self.__insert = self.__originals.get("insert", "")
@@ -421,3 +876,19 @@ class Querybuilder:
     @property
     def current_transaction(self):
         return self.__current_transaction
+
+    @property
+    def parameters(self) -> bool:
+        return self.__parameters
+
+    @property
+    def clock(self) -> Optional[tuple[int, Callable[[], Any]]]:
+        return self.__clock
+
+    @property
+    def table_name(self) -> Optional[str]:
+        return self.__table
+
+    @property
+    def includes(self) -> list[tuple[str, Optional[str]]]:
+        return self.__includes
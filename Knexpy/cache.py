@@ -0,0 +1,166 @@
+import re
+import sys
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Hashable, Iterable, Optional, TypedDict
+
+
+class CacheStats(TypedDict):
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+
+# A FROM list runs up to the next clause or join, or the end of its (sub)query
+_FROM = re.compile(
+    r"\bFROM\s+(.+?)(?=\s+(?:WHERE|GROUP|HAVING|ORDER|LIMIT|WINDOW|UNION|EXCEPT"
+    r"|INTERSECT|NATURAL|INNER|LEFT|RIGHT|FULL|CROSS|OUTER|JOIN)\b|\s*[;)]|\s*$)",
+    re.IGNORECASE | re.DOTALL,
+)
+_JOIN = re.compile(r"\bJOIN\s+(\S+)", re.IGNORECASE)
+# A table of a FROM list, with an optional alias
+_TABLE = re.compile(r"^[\"`\[]?([\w.]+)[\"`\]]?(?:\s+(?:AS\s+)?\w+)?$", re.IGNORECASE)
+# Table valued functions over a bound value, e.g. large `where_in` lists
+_VALUES = re.compile(r"^json_(?:each|tree)\(\?$", re.IGNORECASE)
+_WRITES = re.compile(
+    r"\b(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)"
+    r"\s+[\"`\[]?([\w.]+)",
+    re.IGNORECASE,
+)
+
+
+def _names(pattern: re.Pattern, sql: str) -> frozenset[str]:
+    # `main.table` and `table` are the same table, SQLite names are case insensitive
+    return frozenset(_.split(".")[-1].lower() for _ in pattern.findall(sql))
+
+
+def read_tables(sql: str) -> Optional[frozenset[str]]:
+    "Tables a query reads, None when some source isn't a plain table name"
+    names = []
+    sources = [_.strip() for _ in _FROM.findall(sql) for _ in _.split(",")]
+    for source in [*sources, *_JOIN.findall(sql)]:
+        if _VALUES.match(source):
+            continue
+        table = _TABLE.match(source)
+        if table == None:
+            return None
+        names.append(table.group(1).split(".")[-1].lower())
+    return frozenset(names)
+
+
+def written_tables(sql: str) -> frozenset[str]:
+    return _names(_WRITES, sql)
+
+
+def estimate(value: Any) -> int:
+    "Rough size in bytes of a result, containers are walked, scalars are measured"
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate(_) for _ in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate(_) for _ in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    Query results keyed by compiled SQL and bound values.
+    Every entry remembers the version of the tables it read, writes bump those
+    versions, so a stale entry is never served no matter its age.
+    Entries are evicted least recently used first, when too old (`ttl`) and when
+    over `max_entries` or `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.__lock = threading.Lock()
+        # key → (tables, versions, expires, size, data)
+        self.__entries: OrderedDict[Hashable, tuple[Any, ...]] = OrderedDict()
+        self.__versions: dict[str, int] = {}
+        # Moved by `clear()`, outdates every entry at once
+        self.__epoch = 0
+        self.__bytes = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def versions(self, tables: Iterable[str]) -> tuple[int, ...]:
+        return (self.__epoch, *(self.__versions.get(_, 0) for _ in tables))
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry != None:
+                tables, versions, expires, _, data = entry
+                fresh = expires == None or expires > monotonic()
+                if fresh and versions == self.versions(tables):
+                    self.__entries.move_to_end(key)
+                    self.__hits += 1
+                    return self.__copy(data)
+                self.__drop(key)
+            self.__misses += 1
+            return None
+
+    def put(
+        self,
+        key: Hashable,
+        tables: tuple[str, ...],
+        versions: tuple[int, ...],
+        data: Any,
+    ) -> None:
+        size = estimate(data)
+        if self.max_bytes != None and size > self.max_bytes:
+            return
+        expires = monotonic() + self.ttl if self.ttl != None else None
+        with self.__lock:
+            # A write landed while the query ran, the result may already be stale
+            if versions != self.versions(tables):
+                return
+            if key in self.__entries:
+                self.__drop(key)
+            self.__entries[key] = (tables, versions, expires, size, self.__copy(data))
+            self.__bytes += size
+            while len(self.__entries) > self.max_entries or (
+                self.max_bytes != None and self.__bytes > self.max_bytes
+            ):
+                self.__drop(next(iter(self.__entries)))
+                self.__evictions += 1
+
+    def bump(self, tables: Iterable[str]) -> None:
+        with self.__lock:
+            for table in tables:
+                self.__versions[table] = self.__versions.get(table, 0) + 1
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries = OrderedDict()
+            self.__bytes = 0
+            # Entries being computed right now must not be stored either
+            self.__epoch += 1
+
+    def stats(self) -> CacheStats:
+        with self.__lock:
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "evictions": self.__evictions,
+                "entries": len(self.__entries),
+                "bytes": self.__bytes,
+            }
+
+    def __drop(self, key: Hashable) -> None:
+        self.__bytes -= self.__entries.pop(key)[3]
+
+    def __copy(self, data: Any) -> Any:
+        # Callers get their own rows, mutating a result never touches the cache
+        return [dict(_) if isinstance(_, dict) else _ for _ in data]
@@ -0,0 +1,50 @@
+from array import array
+from sqlite3 import Cursor, Error
+from typing import Any, Optional, Sequence
+
+from .utils import sqlite_to_native
+
+Column = array | list
+Columns = dict[str, Any]
+
+# array.array type codes of the native types, anything else is kept in a list
+TYPECODES: dict[type, str] = {int: "q", float: "d", bool: "b"}
+
+
+def typecode(declared: Optional[str]) -> Optional[str]:
+    if not declared:
+        return None
+    return TYPECODES.get(sqlite_to_native(declared))  # type: ignore
+
+
+def fill(cursor: Cursor, size: int, typecodes: Sequence[Optional[str]]) -> list[Column]:
+    "Reads the cursor `size` rows at a time straight into one sequence per column"
+    columns: list[Column] = [array(_) if _ else [] for _ in typecodes]
+    while True:
+        chunk = cursor.fetchmany(size)
+        if len(chunk) == 0:
+            return columns
+        for index, values in enumerate(zip(*chunk)):
+            column = columns[index]
+            if type(column) == list:
+                column.extend(values)
+                continue
+            length = len(column)
+            try:
+                column.extend(values)
+            except (TypeError, OverflowError):
+                # NULL, or a value SQLite stored with another type than declared
+                columns[index] = column[:length].tolist() + list(values)  # type: ignore
+
+
+def to_numpy(columns: Columns) -> Columns:
+    try:
+        import numpy
+    except ImportError:
+        raise Error("The numpy format requires NumPy: pip install numpy")
+    return {
+        name: numpy.asarray(column)
+        if type(column) == array
+        else numpy.array(column, dtype=object)
+        for name, column in columns.items()
+    }
@@ -1,17 +1,97 @@
+import heapq
 import logging
 import sqlite3
-from datetime import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from contextlib import AbstractContextManager, contextmanager
+from functools import reduce
+from itertools import groupby, islice
+from operator import itemgetter
 from sqlite3 import Error
-from typing import Any, Dict, List, Literal
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Literal, TypedDict
 
 from chalk import blue, green, red, yellow
 
 from .builder import Field, Querybuilder
-from .utils import sqlite_to_native
+from .cache import CacheStats, ResultCache, read_tables, written_tables
+from .columns import Columns, fill, to_numpy, typecode
+from .ids import IdStrategy, id_generator, id_type, infer_strategy
+from .instrumentation import DISABLED, Hook, Instrumentation, QueryStat
+from .mappers import (
+    EPOCH_MS_THRESHOLD,
+    TIMESTAMP_CLOCKS,
+    TIMESTAMP_CONVERTERS,
+    TIMESTAMP_TYPES,
+    TimestampFormat,
+    TimestampStorage,
+    column_names,
+    row_mapper,
+)
+from .pagination import Page, encode_cursor
+from .parallel import after, scan, sort_key
+from .pool import ConnectionPool
+from .pragmas import PROFILES, PragmaProfile, read_pragmas, resolve_pragmas
+from .prepared import PARTITION_LOWER, PARTITION_UPPER, Param, Prepared, resolve
+from .rows import Row, row_factory
+from .schema import SchemaCache, TableSchema
+from .transaction import Transaction, TransactionMode, is_busy
+from .validators import ValidationError, ValidationIssue, Validator, Validators
+from .writer import Write, WriteQueue
+
+
+class BulkInsertReport(TypedDict):
+
+    rows: int
+    seconds: float
+    rows_per_second: float
+
+
+# Main table of a query and the (table, foreign key) relations to load with it
+Relations = tuple[str, list[tuple[str, str | None]]]
+ResultFormat = Literal["dicts", "tuples", "rows", "columns", "numpy"]
+
+
+class BulkWriteReport(TypedDict):
+
+    rows: int
+    affected: int
+    seconds: float
 
 
 class Knex:
-    def __init__(self, db: str, type_check: bool = False, complete: bool = True) -> None:
+
+    # Compiled statements kept by `prepare`
+    PREPARED_SIZE = 256
+
+    def __init__(
+        self,
+        db: str,
+        type_check: bool = False,
+        complete: bool = True,
+        timestamps: TimestampFormat = "string",
+        threaded: bool = False,
+        timeout: float = 3600,
+        profile: PragmaProfile | None = None,
+        pragmas: dict[str, Any] | None = None,
+        instrument: bool = False,
+        slow_query: float | None = None,
+        id_strategy: IdStrategy | None = None,
+        timestamp_storage: TimestampStorage = "real",
+        cache: int = 0,
+        cache_ttl: float | None = None,
+        cache_bytes: int | None = None,
+        write_queue: int = 0,
+        write_batch: int = 500,
+        write_interval: float = 0.002,
+    ) -> None:
         logging.basicConfig(
             level=logging.DEBUG,
             format=f"[{blue('%(levelname)s')}] → %(message)s",
@@ -20,13 +100,56 @@ class Knex:
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.DEBUG)
         try:
-            self.db = sqlite3.connect(
-                f"{db}.db" if (".db" not in db and complete) else db, timeout=3600
+            self.__pool = ConnectionPool(
+                f"{db}.db" if (".db" not in db and complete) else db,
+                timeout=timeout,
+                threaded=threaded,
+                pragmas=resolve_pragmas(profile, pragmas),
             )
-            self.query_builder = Querybuilder(self.logger)
-            self.__tables = self.__get_tables()
+            # Builders are owned by the thread composing the chain
+            self.__local = threading.local()
+            self.__max_variables = self.__pool.max_variables
+            # Open transaction levels on the writer, guarded by the writer lock
+            self.__depth = 0
+            # Writer held from `begin` until the transaction ends, see `__pin`
+            self.__pinned: AbstractContextManager[sqlite3.Connection] | None = None
+            # Table metadata is only loaded when a table is first used
+            self.__schema = SchemaCache(self.__pool.reader, self.logger)
+            self.__validators = Validators()
+            if id_strategy != None:
+                id_type(id_strategy)
+            # None creates `hex` tables and infers the strategy of existing ones
+            self.__id_strategy = id_strategy
+            self.__id_strategies: dict[str, IdStrategy] = {}
+            if timestamp_storage not in TIMESTAMP_TYPES:
+                raise Error(f"Unknown timestamp storage: {timestamp_storage}")
+            self.__timestamp_storage: TimestampStorage = timestamp_storage
+            self.__timestamp_storages: dict[str, TimestampStorage] = {}
             self.__db_name = db
             self.__type_check = type_check
+            self.__instrumentation = (
+                Instrumentation(self.logger, slow_query)
+                if instrument or slow_query != None
+                else None
+            )
+            if timestamps not in TIMESTAMP_CONVERTERS:
+                raise Error(f"Unknown timestamps format: {timestamps}")
+            self.__timestamps: TimestampFormat = timestamps
+            self.__cache = (
+                ResultCache(cache, cache_ttl, cache_bytes) if cache > 0 else None
+            )
+            # Tables written by the open transaction, their cache entries are outdated
+            # once it commits
+            self.__written: set[str] = set()
+            self.__prepared: OrderedDict[Any, Prepared] = OrderedDict()
+            self.__prepared_lock = threading.Lock()
+            self.__writes = None
+            if write_queue > 0:
+                if not threaded:
+                    raise Error("The write queue requires threaded=True")
+                self.__writes = WriteQueue(
+                    self.__commit_group, write_queue, write_batch, write_interval, timeout
+                )
         except Error as e:
             self.logger.error(e)
             raise Exception(e)
@@ -34,32 +157,189 @@ class Knex:
     def __repr__(self) -> str:
         return f'{yellow("Knex")}({green("db")}="{self.__db_name}.db", {green("query")}="{self.query_builder.to_string()}", {green("values")}={self.query_builder.values})'
 
-    def begin(self, cursor: sqlite3.Cursor | None = None) -> "Knex":
-        c = self.db.cursor() if not cursor else cursor
-        c.execute("BEGIN;")
+    def begin(
+        self, cursor: sqlite3.Cursor | None = None, mode: TransactionMode | None = None
+    ) -> "Knex":
+        # Only the outermost level is a real transaction, the rest are savepoints
+        with self.__pool.writer() as connection:
+            c = cursor.connection if cursor else connection
+            if self.__depth == 0 or not connection.in_transaction:
+                c.execute(f"BEGIN {mode};" if mode else "BEGIN;")
+                self.__depth = 0
+                self.__pin()
+            else:
+                c.execute(f"SAVEPOINT knexpy_{self.__depth};")
+            self.__depth += 1
         return self
 
     def commit(self, cursor: sqlite3.Cursor | None = None) -> "Knex":
-        c = self.db.cursor() if not cursor else cursor
-        c.execute("COMMIT;")
+        with self.__pool.writer() as connection:
+            # Ran on the connection, so the rowcount of `cursor` survives the commit
+            c = cursor.connection if cursor else connection
+            if self.__depth <= 1:
+                c.execute("COMMIT;")
+                self.__depth = 0
+                self.__unpin()
+                if self.__cache != None:
+                    self.__cache.bump(self.__written)
+                self.__written = set()
+            else:
+                c.execute(f"RELEASE knexpy_{self.__depth - 1};")
+                self.__depth -= 1
         return self
 
     def rollback(self, cursor: sqlite3.Cursor | None = None) -> "Knex":
-        c = self.db.cursor() if not cursor else cursor
-        c.execute("ROLLBACK;")
+        with self.__pool.writer() as connection:
+            c = cursor.connection if cursor else connection
+            if self.__depth <= 1 or not connection.in_transaction:
+                # Unless an error (e.g. SQLITE_FULL) already rolled everything back
+                if connection.in_transaction:
+                    c.execute("ROLLBACK;")
+                self.__depth = 0
+                self.__unpin()
+                # Entries cached from the discarded changes are outdated as well
+                if self.__cache != None:
+                    self.__cache.bump(self.__written)
+                self.__written = set()
+            else:
+                c.execute(f"ROLLBACK TO knexpy_{self.__depth - 1};")
+                c.execute(f"RELEASE knexpy_{self.__depth - 1};")
+                self.__depth -= 1
         return self
 
-    def count(self, column: str = "*") -> str:
-        return self.query_builder.count(column)
+    def __pin(self) -> None:
+        # Until the transaction ends the writer stays with the thread that began it:
+        # its reads see its own changes, its writes skip the queue, and no other
+        # thread can write into it
+        if self.__pinned == None:
+            self.__pinned = self.__pool.writer()
+            self.__pinned.__enter__()
+
+    def __unpin(self) -> None:
+        if self.__pinned != None:
+            pinned, self.__pinned = self.__pinned, None
+            pinned.__exit__(None, None, None)
+
+    def __raise_busy(self, error: Exception, nested: bool) -> None:
+        # Inside a transaction block a busy write must reach the retry of the block,
+        # swallowing it would commit the rest of the block without that write
+        if nested and is_busy(error):
+            raise error
+
+    @property
+    def __queued(self) -> bool:
+        # A thread holding the writer (e.g. in a transaction) writes itself, the
+        # background writer would wait on that same lock
+        return self.__writes != None and self.__pool.holding == 0
+
+    def __enqueue(self, statement: str, values: list[Any]) -> bool:
+        "Waits for the group commit holding the write"
+        try:
+            return self.__writes.submit(statement, values).result()  # type: ignore
+        except Exception as e:
+            self.logger.error(e)
+            return False
+
+    def submit(self, sql: str, params: list[Any] | None = None) -> Future:
+        "Queues a write without waiting, the future resolves once its group committed"
+        if self.__writes == None:
+            raise Error("The write queue is disabled, see write_queue")
+        return self.__writes.submit(sql, params if params else [])
+
+    def flush(self) -> "Knex":
+        "Waits until every queued write is committed"
+        if self.__writes != None:
+            self.__writes.flush()
+        return self
+
+    def __commit_group(self, writes: list[Write]) -> None:
+        # One transaction for the whole group, a savepoint per write so a failing write
+        # only fails its own future
+        committed: list[Future] = []
+        with self.__pool.writer() as connection:
+            cursor = connection.cursor()
+            try:
+                self.begin(cursor)
+                for statement, values, future in writes:
+                    if statement == None:
+                        committed.append(future)
+                        continue
+                    try:
+                        self.begin(cursor)
+                        with self.__measure(statement, values, write=True) as event:
+                            cursor.execute(statement, values)
+                            event["rows"] = cursor.rowcount
+                        self.commit(cursor)
+                        committed.append(future)
+                    except Exception as e:
+                        self.rollback(cursor)
+                        future.set_exception(e)
+                        if not connection.in_transaction:
+                            # SQLite gave up on the whole transaction (e.g. disk full)
+                            raise
+                self.commit(cursor)
+            except Exception as e:
+                self.rollback(cursor)
+                # Writes after the one that aborted the transaction never ran, every
+                # caller still waiting gets the error
+                for _, _, future in writes:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        for future in committed:
+            future.set_result(True)
+
+    def transaction(
+        self, mode: TransactionMode = "DEFERRED", retries: int = 3, backoff: float = 0.05
+    ) -> Transaction:
+        return Transaction(self, self.__pool.writer, mode, retries, backoff)
+
+    def count(
+        self, column: str = "*", alias: str | None = None, distinct: bool = False
+    ) -> str:
+        return self.query_builder.count(column, alias, distinct)
+
+    def sum(self, column: str, alias: str | None = None, distinct: bool = False) -> str:
+        return self.query_builder.sum(column, alias, distinct)
+
+    def avg(self, column: str, alias: str | None = None, distinct: bool = False) -> str:
+        return self.query_builder.avg(column, alias, distinct)
+
+    def min(self, column: str, alias: str | None = None) -> str:
+        return self.query_builder.min(column, alias)
+
+    def max(self, column: str, alias: str | None = None) -> str:
+        return self.query_builder.max(column, alias)
 
     def select(self, *args: str | list[str]) -> "Knex":
         self.query_builder.select(*args)
         return self
 
+    def distinct(self, *args: str | list[str]) -> "Knex":
+        self.query_builder.distinct(*args)
+        return self
+
     def from_(self, table: str | list[str]) -> "Knex":
         self.query_builder.from_(table)
         return self
 
+    def join(
+        self,
+        table: str | list[str],
+        on: str | list[str],
+        join_type: Literal["INNER", "LEFT", "CROSS"] = "INNER",
+    ) -> "Knex":
+        self.query_builder.join(table, on, join_type)
+        return self
+
+    def left_join(self, table: str | list[str], on: str | list[str]) -> "Knex":
+        self.query_builder.left_join(table, on)
+        return self
+
+    def include(self, table: str, key: str | None = None) -> "Knex":
+        self.query_builder.include(table, key)
+        return self
+
     def where(
         self,
         column: str,
@@ -70,8 +350,22 @@ class Knex:
         self.query_builder.where(column, operator, value, join_type)
         return self
 
-    def where_in(self, column: str, value: list[Any]) -> "Knex":
-        self.query_builder.where_in(column, value)
+    def where_in(
+        self,
+        column: str,
+        value: list[Any] | Querybuilder,
+        join_type: Literal["AND", "OR"] = "AND",
+    ) -> "Knex":
+        self.query_builder.where_in(column, value, join_type)
+        return self
+
+    def where_not_in(
+        self,
+        column: str,
+        value: list[Any] | Querybuilder,
+        join_type: Literal["AND", "OR"] = "AND",
+    ) -> "Knex":
+        self.query_builder.where_not_in(column, value, join_type)
         return self
 
     def where_null(self, column: str) -> "Knex":
@@ -86,24 +380,77 @@ class Knex:
         self.query_builder.limit(n)
         return self
 
+    def group_by(self, *columns: str) -> "Knex":
+        self.query_builder.group_by(*columns)
+        return self
+
+    def having(
+        self,
+        column: str,
+        operator: Literal["=", "<", "<=", ">", ">=", "<>", "IS", "IS NOT", "LIKE"],
+        value: Any,
+        join_type: Literal["AND", "OR"] = "AND",
+    ) -> "Knex":
+        self.query_builder.having(column, operator, value, join_type)
+        return self
+
     def order_by(self, column: str, order: Literal["ASC", "DESC"] = "ASC") -> "Knex":
         self.query_builder.order_by(column, order)
         return self
 
     def table(
-        self, name: str, fields: "list[Field] | list[str]", not_exists: bool = True
+        self,
+        name: str,
+        fields: "list[Field] | list[str]",
+        not_exists: bool = True,
+        index_timestamps: bool = False,
+        id_strategy: IdStrategy | None = None,
+        timestamp_storage: TimestampStorage | None = None,
     ) -> bool:
         if len(fields) == 0:
             self.logger.error("No fields were inserted")
             return False
-        query = self.query_builder.table(name, fields, not_exists)
+        strategy = id_strategy if id_strategy else self.__id_strategy
+        storage = timestamp_storage if timestamp_storage else self.__timestamp_storage
+        query = self.query_builder.table(
+            name, fields, not_exists, strategy if strategy else "hex", storage
+        )
+        indexes = self.query_builder.indexes(name, fields, index_timestamps, not_exists)
+        try:
+            with self.__pool.writer() as connection:
+                for statement in [query, *indexes]:
+                    with self.__measure(statement, write=True):
+                        connection.execute(statement)
+                self.__schema.invalidate()
+        except Error as e:
+            self.logger.error(e)
+            return False
+        self.__id_strategies.pop(name, None)
+        self.__timestamp_storages.pop(name, None)
+        schema = self.__schema.table(name)
+        if schema != None and "id" in schema["declared"]:
+            # Raises when a pre existing table doesn't fit the strategy asked for
+            self.__id_strategies[name] = infer_strategy(schema["declared"]["id"], strategy)
+        self.logger.info("Successfully created table")
+        return True
+
+    def index(
+        self,
+        table: str,
+        columns: str | list[str],
+        unique: bool = False,
+        where: str | None = None,
+        name: str | None = None,
+    ) -> bool:
+        statement = self.query_builder.index(table, columns, unique, where, name)
         try:
-            cursor = self.db.cursor()
-            cursor.execute(query)
-            self.logger.info("Successfully created table")
-            self.__tables = self.__get_tables()
+            with self.__pool.writer() as connection:
+                with self.__measure(statement, write=True):
+                    connection.execute(statement)
+            self.logger.info("Successfully created index")
             return True
         except Error as e:
+            self.logger.error(f"An error occured when executing: {red(statement)}")
             self.logger.error(e)
             return False
 
@@ -113,24 +460,39 @@ class Knex:
     def insert(
         self, table: str, fields: "list[str]", values: list[Any], multi: bool = False
     ) -> tuple[str, list[Any]] | bool:
-        statement = self.query_builder.insert(table, fields, values)
+        statement = self.query_builder.insert(
+            table,
+            fields,
+            values,
+            id_generator(self.id_strategy(table)),
+            TIMESTAMP_CLOCKS[self.timestamp_storage(table)],
+        )
         values = self.query_builder.values
         self.__validate_data(table, fields, values)
         if multi:
             self.query_builder.reset()
             return (statement, values)
-        cursor = self.db.cursor()
-        try:
-            self.begin(cursor)
-            cursor.execute(statement, values)
-            self.db.commit()
-            self.query_builder.reset()
-            return True
-        except Error:
+        self.query_builder.reset()
+        if self.__queued:
+            if self.__enqueue(statement, values):
+                return True
             self.logger.error(f"An error occured when executing: {red(statement)}")
-            self.rollback(cursor)
-            self.query_builder.reset()
             return False
+        with self.__pool.writer() as connection:
+            cursor = connection.cursor()
+            nested = self.__depth > 0
+            try:
+                self.begin(cursor)
+                with self.__measure(statement, values, write=True) as event:
+                    cursor.execute(statement, values)
+                    event["rows"] = cursor.rowcount
+                self.commit(cursor)
+                return True
+            except Error as e:
+                self.logger.error(f"An error occured when executing: {red(statement)}")
+                self.rollback(cursor)
+                self.__raise_busy(e, nested)
+                return False
 
     def insert_json(
         self, table: str, data: Dict[str, Any] | List[Dict[str, Any]]
@@ -139,14 +501,7 @@ class Knex:
             if len(data[0].keys()) == 0:  # type: ignore
                 self.logger.error("Data provided has no columns")
                 raise Error("No Columns on insert")
-            _ = []
-            for value in data:
-                keys = [key for key in value.keys()]  # type: ignore
-                values = []
-                for key in keys:
-                    values.append(value[key])  # type: ignore
-                _.append(self.insert(table, keys, values, multi=True))
-            self.insert_many(_)
+            self.bulk_insert(table, data)  # type: ignore
         elif type(data) == dict and len(data.keys()) > 0:  # type: ignore
             keys = [key for key in data.keys()]  # type: ignore
             self.insert(table, keys, [data[_] for _ in keys])  # type: ignore
@@ -156,18 +511,294 @@ class Knex:
 
     def insert_many(self, statements: list[tuple[str, list[Any]]]) -> bool:
         faulty = None
-        cursor = self.db.cursor()
-        try:
-            self.begin(cursor)
-            for statement in statements:
-                faulty = statement
-                cursor.execute(statement[0], statement[1])
-            self.db.commit()
-            return True
-        except Error:
-            self.logger.error(f"An error occured when executing: {red(faulty)}")
-            self.rollback(cursor)
-            return False
+        with self.__pool.writer() as connection:
+            cursor = connection.cursor()
+            nested = self.__depth > 0
+            try:
+                self.begin(cursor)
+                # Consecutive statements with the same SQL are sent in a single executemany
+                for statement, group in groupby(statements, key=itemgetter(0)):
+                    faulty = statement
+                    with self.__measure(statement, many=True) as event:
+                        cursor.executemany(statement, (_[1] for _ in group))
+                        event["rows"] = cursor.rowcount
+                        event["binds"] *= max(cursor.rowcount, 0)
+                self.commit(cursor)
+                return True
+            except Error as e:
+                self.logger.error(f"An error occured when executing: {red(faulty)}")
+                self.rollback(cursor)
+                self.__raise_busy(e, nested)
+                return False
+
+    def bulk_insert(
+        self,
+        table: str,
+        rows: Iterable[Dict[str, Any]],
+        batch_size: int = 10000,
+        commit_every: int | None = None,
+    ) -> BulkInsertReport | Literal[False]:
+        if batch_size <= 0:
+            raise Error("Batch size must be higher than 0.")
+        generate_id = id_generator(self.id_strategy(table))
+        now = TIMESTAMP_CLOCKS[self.timestamp_storage(table)]
+        statements: dict[tuple[str, ...], str] = {}
+        buffers: dict[tuple[str, ...], list[tuple[Any, ...]]] = {}
+        validators: dict[tuple[str, ...], Validator] = {}
+        issues: list[ValidationIssue] = []
+        total = 0
+        pending = 0
+        faulty = None
+        start = perf_counter()
+
+        with self.__pool.writer() as connection:
+            cursor = connection.cursor()
+            nested = self.__depth > 0
+
+            def flush(shape: tuple[str, ...]) -> None:
+                nonlocal faulty
+                faulty = statements[shape]
+                with self.__measure(faulty, many=True) as event:
+                    cursor.executemany(faulty, buffers[shape])
+                    event["rows"] = cursor.rowcount
+                    event["binds"] *= max(cursor.rowcount, 0)
+                buffers[shape] = []
+
+            try:
+                self.begin(cursor)
+                schema = self.__table_schema(table) if self.__type_check else None
+                # Rows are grouped by column shape, one compiled statement per shape
+                for index, row in enumerate(rows):
+                    shape = tuple(row.keys())
+                    if shape not in statements:
+                        statements[shape] = self.query_builder.bulk_insert(
+                            table, list(shape), generate_id != None
+                        )
+                        buffers[shape] = []
+                        if schema != None:
+                            validators[shape] = self.__validators.get(
+                                table, schema, shape
+                            )
+                    values = [row[_] for _ in shape]
+                    if schema != None:
+                        # Every row is still validated after the first failure, so all
+                        # offending rows are reported together
+                        for column, value, expected in validators[shape](values):
+                            issues.append(
+                                {
+                                    "row": index,
+                                    "column": column,
+                                    "value": value,
+                                    "expected": expected,
+                                }
+                            )
+                    if len(issues) > 0:
+                        continue
+                    _t = now()
+                    if generate_id:
+                        buffers[shape].append((generate_id(), *values, _t, _t))
+                    else:
+                        buffers[shape].append((*values, _t, _t))
+                    total += 1
+                    pending += 1
+                    if len(buffers[shape]) >= batch_size:
+                        flush(shape)
+                    if commit_every and pending >= commit_every:
+                        for _ in buffers.keys():
+                            flush(_)
+                        self.commit(cursor)
+                        self.begin(cursor)
+                        pending = 0
+                if len(issues) > 0:
+                    raise ValidationError(issues)
+                for _ in buffers.keys():
+                    if len(buffers[_]) > 0:
+                        flush(_)
+                self.commit(cursor)
+            except Error as e:
+                self.logger.error(f"An error occured when executing: {red(faulty)}")
+                self.rollback(cursor)
+                self.__raise_busy(e, nested)
+                return False
+            except BaseException:
+                # Validation errors and anything raised by the rows themselves, the
+                # transaction must not outlive the call
+                self.rollback(cursor)
+                raise
+        seconds = perf_counter() - start
+        report: BulkInsertReport = {
+            "rows": total,
+            "seconds": seconds,
+            "rows_per_second": total / seconds if seconds > 0 else float(total),
+        }
+        self.logger.info(
+            f"Inserted {total} rows into {blue(table)} ({report['rows_per_second']:.0f} rows/s)"
+        )
+        return report
+
+    def upsert(
+        self,
+        table: str,
+        rows: Iterable[Dict[str, Any]],
+        conflict: list[str] | None = None,
+        update: list[str] | None = None,
+        update_modified: bool = True,
+        batch_size: int = 10000,
+    ) -> BulkWriteReport | Literal[False]:
+        conflict = conflict if conflict else ["id"]
+        generate_id = id_generator(self.id_strategy(table))
+        now = TIMESTAMP_CLOCKS[self.timestamp_storage(table)]
+
+        def compile(shape: tuple[str, ...]) -> str:
+            with_id = generate_id != None and "id" not in shape
+            # By default every incoming column except the conflict target is updated
+            columns = (
+                update if update != None else [_ for _ in shape if _ not in conflict]
+            )
+            return self.query_builder.upsert(
+                table, list(shape), conflict, columns, with_id, update_modified
+            )
+
+        def bind(shape: tuple[str, ...], values: list[Any]) -> tuple[Any, ...]:
+            _t = now()
+            if generate_id and "id" not in shape:
+                return (generate_id(), *values, _t, _t)
+            return (*values, _t, _t)
+
+        return self.__bulk_write(table, "Upserted", rows, compile, bind, batch_size)
+
+    def bulk_update(
+        self,
+        table: str,
+        rows: Iterable[Dict[str, Any]],
+        key: str = "id",
+        update_modified: bool = True,
+        batch_size: int = 10000,
+    ) -> BulkWriteReport | Literal[False]:
+        now = TIMESTAMP_CLOCKS[self.timestamp_storage(table)]
+
+        def compile(shape: tuple[str, ...]) -> str:
+            if key not in shape:
+                raise Error(f"Every row must have the {key} column")
+            return self.query_builder.bulk_update(
+                table, list(shape), key, update_modified
+            )
+
+        def bind(shape: tuple[str, ...], values: list[Any]) -> tuple[Any, ...]:
+            # Key goes last, it binds the WHERE clause
+            block = [v for k, v in zip(shape, values) if k != key]
+            if update_modified:
+                block.append(now())
+            return (*block, values[shape.index(key)])
+
+        return self.__bulk_write(table, "Updated", rows, compile, bind, batch_size)
+
+    def bulk_delete(
+        self,
+        table: str,
+        keys: Iterable[Any],
+        key: str = "id",
+        batch_size: int = 10000,
+    ) -> BulkWriteReport | Literal[False]:
+        return self.__bulk_write(
+            table,
+            "Deleted",
+            ({key: _} for _ in keys),
+            lambda shape: self.query_builder.bulk_delete(table, key),
+            lambda shape, values: tuple(values),
+            batch_size,
+            validate=False,
+        )
+
+    def __bulk_write(
+        self,
+        table: str,
+        action: str,
+        rows: Iterable[Dict[str, Any]],
+        compile: Callable[[tuple[str, ...]], str],
+        bind: Callable[[tuple[str, ...], list[Any]], tuple[Any, ...]],
+        batch_size: int,
+        validate: bool = True,
+    ) -> BulkWriteReport | Literal[False]:
+        "Groups rows by column shape and runs each shape through executemany"
+        if batch_size <= 0:
+            raise Error("Batch size must be higher than 0.")
+        statements: dict[tuple[str, ...], str] = {}
+        buffers: dict[tuple[str, ...], list[tuple[Any, ...]]] = {}
+        validators: dict[tuple[str, ...], Validator] = {}
+        issues: list[ValidationIssue] = []
+        total = 0
+        affected = 0
+        faulty = None
+        start = perf_counter()
+
+        with self.__pool.writer() as connection:
+            cursor = connection.cursor()
+            nested = self.__depth > 0
+
+            def flush(shape: tuple[str, ...]) -> None:
+                nonlocal faulty, affected
+                faulty = statements[shape]
+                with self.__measure(faulty, many=True) as event:
+                    cursor.executemany(faulty, buffers[shape])
+                    event["rows"] = cursor.rowcount
+                    event["binds"] *= len(buffers[shape])
+                affected += max(cursor.rowcount, 0)
+                buffers[shape] = []
+
+            try:
+                self.begin(cursor)
+                check = validate and self.__type_check
+                schema = self.__table_schema(table) if check else None
+                for index, row in enumerate(rows):
+                    shape = tuple(row.keys())
+                    if shape not in statements:
+                        statements[shape] = compile(shape)
+                        buffers[shape] = []
+                        if schema != None:
+                            validators[shape] = self.__validators.get(
+                                table, schema, shape
+                            )
+                    values = [row[_] for _ in shape]
+                    if schema != None:
+                        for column, value, expected in validators[shape](values):
+                            issues.append(
+                                {
+                                    "row": index,
+                                    "column": column,
+                                    "value": value,
+                                    "expected": expected,
+                                }
+                            )
+                    if len(issues) > 0:
+                        continue
+                    buffers[shape].append(bind(shape, values))
+                    total += 1
+                    if len(buffers[shape]) >= batch_size:
+                        flush(shape)
+                if len(issues) > 0:
+                    raise ValidationError(issues)
+                for _ in buffers.keys():
+                    if len(buffers[_]) > 0:
+                        flush(_)
+                self.commit(cursor)
+            except Error as e:
+                if faulty != None:
+                    self.logger.error(f"An error occured when executing: {red(faulty)}")
+                self.logger.error(e)
+                self.rollback(cursor)
+                self.__raise_busy(e, nested)
+                return False
+            except BaseException:
+                self.rollback(cursor)
+                raise
+        report: BulkWriteReport = {
+            "rows": total,
+            "affected": affected,
+            "seconds": perf_counter() - start,
+        }
+        self.logger.info(f"{action} {affected} rows of {blue(table)}")
+        return report
 
     def update(
         self,
@@ -176,7 +807,13 @@ class Knex:
         values: list[Any],
         update_modified: bool = True,
     ) -> "Knex":
-        self.query_builder.update(table, fields, values, update_modified=update_modified)
+        self.query_builder.update(
+            table,
+            fields,
+            values,
+            update_modified=update_modified,
+            now=TIMESTAMP_CLOCKS[self.timestamp_storage(table)],
+        )
         return self
 
     def delete(
@@ -192,45 +829,585 @@ class Knex:
                 f"Cannot use execute on {self.query_builder.current_transaction} operation."
             )
             return False
-        cursor = self.db.cursor()
+        statement, values, _ = self._capture()
+        return self._execute(statement, values)
+
+    def _execute(self, statement: str, values: list[Any]) -> bool:
+        if self.__queued:
+            return self.__enqueue(statement, values)
+        with self.__pool.writer() as connection:
+            cursor = connection.cursor()
+            nested = self.__depth > 0
+            try:
+                self.begin(cursor)
+                with self.__measure(statement, values, write=True) as event:
+                    cursor.execute(statement, values)
+                    event["rows"] = cursor.rowcount
+                self.commit(cursor)
+                return True
+            except Exception as e:
+                self.rollback(cursor)
+                self.__raise_busy(e, nested)
+                return False
+
+    def query(
+        self,
+        json: bool = True,
+        stream: bool = False,
+        size: int = 500,
+        cache: bool = True,
+        format: ResultFormat | None = None,
+    ) -> list[tuple[Any]] | list[dict[str, Any]] | Iterator[Any] | Columns:
+        if format in ["columns", "numpy"]:
+            if stream:
+                self.query_builder.reset()
+                raise Error(f"The {format} format cannot be streamed")
+            table = self.query_builder.table_name
+            statement, values, _ = self._capture(False)
+            return self._columns(statement, values, table, size, format == "numpy")
+        if format != None:
+            if format not in ["dicts", "tuples", "rows"]:
+                self.query_builder.reset()
+                raise Error(f"Unknown result format: {format}")
+            json = format == "dicts"
+        rows = format == "rows"
+        if stream:
+            if size <= 0:
+                self.query_builder.reset()
+                raise Error("Stream size must be higher than 0.")
+            statement, values, relations = self._capture(json)
+            return self._stream(statement, values, size, json, relations, rows)
+        statement, values, relations = self._capture(json)
+        return self._fetch(statement, values, json, relations, cache, rows)
+
+    def _columns(
+        self,
+        statement: str,
+        values: list[Any],
+        table: str | None = None,
+        size: int = 500,
+        numpy: bool = False,
+    ) -> Columns:
+        "Column name → values, typed arrays for the columns declared on `table`"
+        if size <= 0:
+            raise Error("Fetch size must be higher than 0.")
+        schema = self.__schema.table(table) if table != None else None
+        declared = {k.lower(): v for k, v in schema["declared"].items()} if schema else {}
+        cursor = self.__pool.reader().cursor()
         try:
-            self.begin(cursor)
-            cursor.execute(self.query_builder.to_string(), self.query_builder.values)
-            self.db.commit()
-            self.query_builder.reset()
-            return True
-        except Exception:
-            self.rollback(cursor)
-            return False
+            with self.__measure(statement, values) as event:
+                cursor.execute(statement, values)
+                keys = [_[0] for _ in cursor.description]
+                data = fill(
+                    cursor, size, [typecode(declared.get(_.lower())) for _ in keys]
+                )
+                event["rows"] = len(data[0]) if len(data) > 0 else 0
+        except Error as e:
+            self.logger.error(e)
+            return {}
+        finally:
+            cursor.close()
+        columns = dict(zip(column_names(tuple(keys)), data))
+        return to_numpy(columns) if numpy else columns
+
+    def _capture(self, json: bool = True) -> tuple[str, list[Any], Relations | None]:
+        # Compiles and releases the current chain, along with the relations to load
+        builder = self.query_builder
+        statement, values = builder.to_string(), builder.values
+        parameters = builder.parameters
+        relations = None
+        if builder.table_name and builder.includes:
+            relations = (builder.table_name, builder.includes)
+        builder.reset()
+        if relations and not json:
+            raise Error("Relations can only be included on JSON results")
+        if parameters:
+            # Named placeholders only make sense on prepared statements
+            values = resolve(values, {})
+        return statement, values, relations
+
+    def prepare(
+        self, chain: "Knex | Querybuilder | Callable[[Knex], Any]", json: bool = True
+    ) -> Prepared:
+        """
+        Compiles the chain once into a reusable statement.
+        Given a function composing the chain, compiled statements are kept in a LRU
+        keyed by that function, so later calls skip composing the chain at all.
+        """
+        key = None
+        builder = self.query_builder
+        if isinstance(chain, Knex):
+            builder = chain.query_builder
+        elif isinstance(chain, Querybuilder):
+            builder = chain
+        elif callable(chain):
+            key = self.__prepared_key(chain, json)
+            with self.__prepared_lock:
+                prepared = self.__prepared.get(key) if key != None else None
+                if prepared != None:
+                    self.__prepared.move_to_end(key)
+                    return prepared
+            try:
+                chain(self)
+            except BaseException:
+                builder.reset()
+                raise
+        kind = builder.current_transaction
+        if kind not in ["SELECT", "UPDATE", "DELETE"]:
+            builder.reset()
+            raise Error("Only SELECT, UPDATE and DELETE chains can be prepared")
+        statement, values = builder.to_string(), builder.values
+        if builder.clock != None:
+            # modified_at gets a fresh time on every run
+            position, now = builder.clock
+            values = [*values]
+            values[position] = Param(default=now)
+        relations = None
+        if builder.table_name and builder.includes:
+            relations = (builder.table_name, list(builder.includes))
+        builder.reset()
+        prepared = Prepared(self, statement, values, kind, json, relations)
+        if key != None:
+            with self.__prepared_lock:
+                self.__prepared[key] = prepared
+                if len(self.__prepared) > self.PREPARED_SIZE:
+                    self.__prepared.popitem(last=False)
+        return prepared
 
-    def query(self, json: bool = True) -> list[tuple[Any]] | list[dict[str, Any]]:
+    def __prepared_key(self, chain: Callable[[Any], Any], json: bool) -> Any:
+        # Two closures of the same function only share a statement when the values
+        # they captured are the same, module level loop variables included
+        code = getattr(chain, "__code__", None)
+        if code == None:
+            return None
+        cells = tuple(_.cell_contents for _ in chain.__closure__ or ())  # type: ignore
+        scope = getattr(chain, "__globals__", {})
+        names = tuple((_, scope[_]) for _ in code.co_names if _ in scope)
+        key = (code, cells, names, getattr(chain, "__defaults__", None), json)
         try:
-            cursor = self.db.cursor()
-            cursor.execute(self.query_builder.to_string(), self.query_builder.values)
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    @staticmethod
+    def param(name: str) -> Param:
+        return Param(name)
+
+    def _include(
+        self, rows: list[dict[str, Any]], relations: Relations
+    ) -> list[dict[str, Any]]:
+        "Loads every included relation with a single batched IN query each"
+        table, includes = relations
+        for name, key in includes:
+            many, local, remote = self.__relation(table, name, key)
+            if len(rows) > 0 and local not in rows[0]:
+                raise Error(f"Including {name} requires the {local} column in the query")
+            keys = list(dict.fromkeys(_[local] for _ in rows if _[local] != None))
+            related: list[dict[str, Any]] = []
+            if len(keys) > 0:
+                query = self.subquery().select().from_(name).where_in(remote, keys)
+                related = self._fetch(query.to_string(), query.values)  # type: ignore
+            if many:
+                groups: dict[Any, list[dict[str, Any]]] = {}
+                for _ in related:
+                    groups.setdefault(_[remote], []).append(_)
+                for row in rows:
+                    row[name] = groups.get(row[local], [])
+            else:
+                parents = {_[remote]: _ for _ in related}
+                for row in rows:
+                    row[name] = parents.get(row[local])
+        return rows
+
+    def __relation(self, table: str, name: str, key: str | None) -> tuple[bool, str, str]:
+        "(has many, local column, related column) from the declared foreign keys"
+        for fk in self.__table_schema(table)["foreign_keys"]:
+            if fk["table"] == name and (key == None or fk["column"] == key):
+                return False, fk["column"], fk["references"] or self.__key_of(name)
+        for fk in self.__table_schema(name)["foreign_keys"]:
+            if fk["table"] == table and (key == None or fk["column"] == key):
+                return True, fk["references"] or self.__key_of(table), fk["column"]
+        raise Error(f"No foreign key between {table} and {name}")
+
+    def __key_of(self, table: str) -> str:
+        primary_key = self.__table_schema(table)["primary_key"]
+        return primary_key[0] if len(primary_key) > 0 else "rowid"
+
+    def _fetch(
+        self,
+        statement: str,
+        values: list[Any],
+        json: bool = True,
+        relations: Relations | None = None,
+        cache: bool = False,
+        rows: bool = False,
+    ) -> list[tuple[Any]] | list[dict[str, Any]] | list[Row]:
+        # Reads inside a transaction may see uncommitted data, they are never cached,
+        # that includes a manual `begin()` which doesn't keep the writer held
+        transaction = self.__pool.holding > 0 or self.__depth > 0
+        transaction = transaction or self.__pool.connection.in_transaction
+        cached = cache and self.__cache != None and not transaction
+        if cached:
+            shape = "rows" if rows else json
+            key, tables = self.__cache_key(statement, values, shape, relations)
+            cached = key != None
+        if cached:
+            hit = self.__cache.get(key)  # type: ignore
+            if hit != None:
+                return hit
+            # Taken before running, a write committed meanwhile discards the result
+            versions = self.__cache.versions(tables)  # type: ignore
+        try:
+            cursor = self.__pool.reader().cursor()
+            with self.__measure(statement, values) as event:
+                cursor.execute(statement, values)
+                data = cursor.fetchall()
+                event["rows"] = len(data)
             keys = [_[0] for _ in [d for d in cursor.description]]
-            data = cursor.fetchall()
-            self.query_builder.reset()
-            if json:
-                return self.__to_json(keys, data)
-            return data
         except Error as e:
             self.logger.error(e)
+            return []
+        if json and relations:
+            # Outside the try, a relation that can't be resolved is a usage error
+            data = self._include(self.__to_json(keys, data), relations)  # type: ignore
+        elif json:
+            data = self.__to_json(keys, data)  # type: ignore
+        elif rows:
+            data = list(map(row_factory(tuple(keys), self.__timestamps), data))
+        if cached:
+            self.__cache.put(key, tables, versions, data)  # type: ignore
+        return data
+
+    def __cache_key(
+        self,
+        statement: str,
+        values: list[Any],
+        json: bool | str,
+        relations: Relations | None,
+    ) -> tuple[Any, tuple[str, ...]]:
+        tables = read_tables(statement)
+        if tables == None:
+            # A write could never be traced back to this result
+            return None, ()
+        includes = None
+        if relations:
+            includes = (relations[0], tuple(relations[1]))
+            tables = tables | {_[0].lower() for _ in relations[1]}
+        # Same rows, but mapped differently for each shape and timestamps format
+        key = (statement, tuple(values), json, self.__timestamps, includes)
+        try:
+            hash(key)
+        except TypeError:
+            return None, ()
+        return key, tuple(sorted(tables))
+
+    def paginate(
+        self,
+        page_size: int,
+        after: str | None = None,
+        json: bool = True,
+        key: str = "id",
+    ) -> Page:
+        try:
+            columns = self.query_builder.paginate(page_size, after, key)
+        except Error:
+            # A bad cursor must not leave a half built query for the next caller
             self.query_builder.reset()
+            raise
+        statement, values, relations = self._capture(json)
+        return self._paginate(statement, values, columns, page_size, json, relations)
+
+    def _paginate(
+        self,
+        statement: str,
+        values: list[Any],
+        columns: list[str],
+        page_size: int,
+        json: bool = True,
+        relations: Relations | None = None,
+    ) -> Page:
+        try:
+            cursor = self.__pool.reader().cursor()
+            with self.__measure(statement, values) as event:
+                cursor.execute(statement, values)
+                data = cursor.fetchall()
+                event["rows"] = len(data)
+        except Error as e:
+            self.logger.error(e)
+            return {"rows": [], "next": None}
+        keys = [_[0] for _ in cursor.description]
+        token = None
+        if len(data) > page_size:
+            data = data[:page_size]
+            positions = []
+            for column in columns:
+                name = column.split(".")[-1]
+                if name not in keys:
+                    raise Error(f"Paginated queries must select the {name} column")
+                positions.append(keys.index(name))
+            # Cursors hold the stored values, not the mapped ones (timestamps)
+            seek = [data[-1][_] for _ in positions]
+            for column, value in zip(columns, seek):
+                if value == None:
+                    # A row comparison with NULL is never true, every later page
+                    # would come back empty
+                    raise Error(f"Cannot paginate past a NULL value of {column}")
+            token = encode_cursor(seek)
+        if json and relations:
+            return {
+                "rows": self._include(self.__to_json(keys, data), relations),
+                "next": token,
+            }
+        return {"rows": self.__to_json(keys, data) if json else data, "next": token}
+
+    def parallel_query(
+        self,
+        chain: "Knex | Querybuilder | None" = None,
+        workers: int = 4,
+        json: bool = True,
+        format: ResultFormat | None = None,
+        ordered: bool = True,
+        key: str = "rowid",
+        partitions: int | None = None,
+        processes: bool = False,
+        mapper: Callable[[list[Any]], Any] | None = None,
+        reducer: Callable[[Any, Any], Any] | None = None,
+        initial: Any = None,
+    ) -> Iterator[Any] | Any:
+        """
+        Splits a scan into ranges of `key`, each read and mapped on its own read-only
+        connection by a pool of `workers` threads (or processes).
+        Rows are streamed back, merged on the ORDER BY columns when `ordered`. With a
+        `mapper` every partition is mapped where it ran and the results are returned
+        instead, folded with `reducer` when given.
+        """
+        builder = chain.query_builder if isinstance(chain, Knex) else chain
+        builder = builder if builder != None else self.query_builder
+        shape = format if format != None else "dicts" if json else "tuples"
+        try:
+            if shape not in ["dicts", "tuples", "rows"]:
+                raise Error(f"The {shape} format cannot be read in parallel")
+            if workers <= 0:
+                raise Error("Workers must be higher than 0.")
+            if self.__pool.path == ":memory:" or self.__pool.path.startswith("file::"):
+                raise Error("Parallel queries require a database file")
+            if self.__pool.holding > 0:
+                # Worker connections can't see the uncommitted changes
+                raise Error("Parallel queries cannot run inside a transaction")
+            if builder.includes:
+                raise Error("Relations cannot be included on parallel queries")
+            sort = builder.partition(key)
+            table = builder.table_name
+            statement, values = builder.to_string(), builder.values
+        finally:
+            builder.reset()
+        bounds = self.__partition_bounds(table, key, partitions or workers * 4)  # type: ignore
+        streamed = mapper == None and reducer == None
+        if len(bounds) < 2 and streamed:
+            return iter([])
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        executor = pool(workers)
+        arguments = (self.__pool.path, self.__pool.pragmas, self.__pool.timeout)
+        futures = [
+            executor.submit(
+                scan,
+                *arguments,
+                statement,
+                resolve(values, {PARTITION_LOWER: lower, PARTITION_UPPER: upper}),
+                shape,
+                self.__timestamps,
+                mapper,
+            )
+            for lower, upper in zip(bounds, bounds[1:])
+        ]
+        if streamed:
+            return self.__merge(executor, futures, sort if ordered else None, ordered)
+        try:
+            results = [_.result()[1] for _ in futures]
+        except Error as e:
+            self.logger.error(e)
+            raise
+        finally:
+            executor.shutdown(cancel_futures=True)
+        if reducer == None:
+            return results
+        if initial == None:
+            return reduce(reducer, results) if len(results) > 0 else None
+        return reduce(reducer, results, initial)
+
+    def __partition_bounds(self, table: str, key: str, partitions: int) -> list[Any]:
+        "Sorted range bounds covering every `key` of the table, the last one exclusive"
+        connection = self.__pool.reader()
+        low, high, total, keyed = connection.execute(
+            f"SELECT MIN({key}), MAX({key}), COUNT(*), COUNT({key}) FROM {table};"
+        ).fetchone()
+        if total == 0:
             return []
+        if keyed != total:
+            # No range of values holds them, those rows would be silently left out
+            raise Error(f"Cannot partition on {key}, it holds NULL values")
+        partitions = max(min(partitions, total), 1)
+        if key.lower() in ["rowid", "oid", "_rowid_"]:
+            # Rowids are integers, the ranges are computed rather than sampled
+            span = high + 1 - low
+            bounds = [low + span * i // partitions for i in range(partitions)]
+        else:
+            sample = f"SELECT {key} FROM {table} ORDER BY {key} LIMIT 1 OFFSET ?;"
+            bounds = [low] + [
+                connection.execute(sample, [total * i // partitions]).fetchone()[0]
+                for i in range(1, partitions)
+            ]
+        return [*dict.fromkeys(bounds), after(high)]
+
+    def __merge(
+        self,
+        executor: Executor,
+        futures: list[Future],
+        sort: list[tuple[str, str]] | None,
+        ordered: bool,
+    ) -> Iterator[Any]:
+        # Like `__iterate`, a consumer stopping early cancels the partitions left
+        try:
+            if not ordered:
+                for future in as_completed(futures):
+                    yield from future.result()[1]
+            elif not sort:
+                # Partitions follow the key order, same as a plain scan
+                for future in futures:
+                    yield from future.result()[1]
+            else:
+                results = [_.result() for _ in futures]
+                sample = next((_[1] for _ in results if len(_[1]) > 0), [])
+                yield from heapq.merge(
+                    *[_[1] for _ in results],
+                    key=self.__merge_key(results[0][0], sort, sample),
+                    reverse=sort[0][1] == "DESC",
+                )
+        except Error as e:
+            self.logger.error(e)
+            raise
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __merge_key(
+        self, keys: tuple[str, ...], sort: list[tuple[str, str]], sample: list[Any]
+    ) -> Callable[[Any], Any]:
+        names = [_.lower() for _ in keys]
+        positions = []
+        for column, _ in sort:
+            name = column.split(".")[-1].lower()
+            if name not in names:
+                raise Error(f"Ordered parallel queries require {column} in the selection")
+            positions.append(len(names) - 1 - names[::-1].index(name))
+        # Dict rows are read by name, tuples and Rows by position
+        if len(sample) > 0 and type(sample[0]) == dict:
+            fields = [column_names(keys)[_] for _ in positions]
+        else:
+            fields = positions  # type: ignore
+        return lambda row: tuple(sort_key(row[_]) for _ in fields)
+
+    def stream(self, size: int = 500, json: bool = True) -> Iterator[Any]:
+        if size <= 0:
+            self.query_builder.reset()
+            raise Error("Stream size must be higher than 0.")
+        # The builder is released right away, so abandoning the iterator never leaves
+        # a half built query behind
+        statement, values, relations = self._capture(json)
+        return self._stream(statement, values, size, json, relations)
+
+    def _stream(
+        self,
+        statement: str,
+        values: list[Any],
+        size: int = 500,
+        json: bool = True,
+        relations: Relations | None = None,
+        rows: bool = False,
+    ) -> Iterator[Any]:
+        cursor = self.__pool.reader().cursor()
+        try:
+            with self.__measure(statement, values):
+                cursor.execute(statement, values)
+        except Error as e:
+            self.logger.error(e)
+            cursor.close()
+            return iter([])
+        if json and relations:
+            return self.__include_chunks(
+                self.__iterate(cursor, size, json), size, relations
+            )
+        return self.__iterate(cursor, size, json, rows)
+
+    def __include_chunks(
+        self, rows: Iterator[dict[str, Any]], size: int, relations: Relations
+    ) -> Iterator[dict[str, Any]]:
+        # Relations are loaded once per chunk of `size` rows
+        try:
+            while True:
+                chunk = list(islice(rows, size))
+                if len(chunk) == 0:
+                    break
+                yield from self._include(chunk, relations)
+        finally:
+            rows.close()  # type: ignore
 
     def subquery(self) -> Querybuilder:
-        return Querybuilder(self.logger)
+        return Querybuilder(
+            self.logger,
+            self.__timestamp_storage,
+            self.__max_variables,
+            self.timestamp_storage,
+        )
 
-    def raw(self, sql: str, params: list[Any] | None = None, json: bool = True):
-        cursor = self.db.cursor()
+    def raw(
+        self,
+        sql: str,
+        params: list[Any] | None = None,
+        json: bool = True,
+        stream: bool = False,
+        size: int = 500,
+    ):
         insert_or_update = "INSERT INTO" in sql or "UPDATE" in sql or "DELETE" in sql
+        if not insert_or_update and sql.lstrip()[:6].upper() in [
+            "SELECT",
+            "WITH ",
+            "VALUES",
+        ]:
+            return self.__raw(
+                self.__pool.reader(), sql, params, json, stream, size, False
+            )
+        if self.__cache != None and not insert_or_update:
+            # Schema changes and anything else that can't be traced to a table
+            self.__cache.clear()
+        with self.__pool.writer() as connection:
+            return self.__raw(
+                connection, sql, params, json, stream, size, insert_or_update
+            )
+
+    def __raw(
+        self,
+        connection: sqlite3.Connection,
+        sql: str,
+        params: list[Any] | None,
+        json: bool,
+        stream: bool,
+        size: int,
+        insert_or_update: bool,
+    ):
+        cursor = connection.cursor()
+        nested = insert_or_update and self.__depth > 0
         try:
             if insert_or_update:
                 self.begin(cursor)
-            cursor.execute(sql) if params == None else cursor.execute(sql, params)
-            if insert_or_update:
-                self.db.commit()
-            data = cursor.fetchall()
+            with self.__measure(sql, params, write=insert_or_update) as event:
+                cursor.execute(sql) if params == None else cursor.execute(sql, params)
+                if insert_or_update:
+                    self.commit(cursor)
+                data = [] if stream else cursor.fetchall()
+                event["rows"] = cursor.rowcount if cursor.rowcount >= 0 else len(data)
+            if stream:
+                return self.__iterate(cursor, size, json)
             if json:
                 if len(data) == 0 or cursor.description == None:
                     return {}
@@ -240,64 +1417,265 @@ class Knex:
         except Error as e:
             if insert_or_update:
                 self.rollback(cursor)
-            self.logger.error(e)
             self.query_builder.reset()
+            self.__raise_busy(e, nested)
+            self.logger.error(e)
             return []
 
-    def __to_json(self, keys: list[str], data: list[tuple[Any]]) -> list[dict[str, Any]]:
-        res = []
-        for _ in data:
-            block = {}
-            for i, value in enumerate(_):
-                if keys[i] in ["created_at", "modified_at"]:
-                    value = datetime.fromtimestamp(float(value)).strftime(
-                        "%Y-%m-%dT%H:%M:%SZ"
-                    )
-                if "COUNT(" in keys[i]:
-                    keys[i] = "count"
-                block[keys[i]] = value
-            res.append(block)
-        return res
-
-    def __get_tables(self) -> dict[str, dict[str, Any]]:
-        cursor = self.db.cursor()
-        try:
-            cursor.execute("SELECT * FROM sqlite_master where type='table'")
-            data = cursor.fetchall()
-            block = {}
-            for table in data:
-                block[table[1]] = self.__get_columns(cursor, table[1])
-            return block
-        except Error as e:
-            self.logger.error(e)
+    def __measure(
+        self,
+        sql: str,
+        params: list[Any] | None = None,
+        write: bool = False,
+        many: bool = False,
+    ) -> Any:
+        if self.__cache != None and (write or many):
+            self.__written.update(written_tables(sql))
+        if self.__instrumentation == None:
+            return DISABLED
+        # executemany binds are counted per row, the total is known once it ran
+        binds = sql.count("?") if many else len(params) if params else 0
+        lock_wait = self.__pool.lock_wait if write or many else 0.0
+        return self.__instrumentation.measure(sql, binds, lock_wait)
+
+    def cache_stats(self) -> CacheStats | None:
+        return self.__cache.stats() if self.__cache != None else None
+
+    def clear_cache(self) -> "Knex":
+        if self.__cache != None:
+            self.__cache.clear()
+        return self
+
+    def on(self, moment: Literal["before", "after"], hook: Hook) -> "Knex":
+        if self.__instrumentation == None:
+            self.__instrumentation = Instrumentation(self.logger)
+        self.__instrumentation.on(moment, hook)
+        return self
+
+    def stats(self, reset: bool = False) -> dict[str, QueryStat]:
+        if self.__instrumentation == None or self.__instrumentation.stats == None:
             return {}
+        snapshot = self.__instrumentation.stats.snapshot()
+        if reset:
+            self.__instrumentation.stats.reset()
+        return snapshot
 
-    def __get_columns(self, cursor: sqlite3.Cursor, table: str) -> dict[str, Any] | None:
+    def __iterate(
+        self, cursor: sqlite3.Cursor, size: int, json: bool, rows: bool = False
+    ) -> Iterator[Any]:
+        # Generator `close()` (early break, garbage collection) lands on `finally`
         try:
-            cursor.execute(f"PRAGMA table_info({table})")
-            data = cursor.fetchall()
-            block = {}
-            for field in data:
-                block[field[1]] = sqlite_to_native(field[2])
-            return block
-        except Error as e:
-            self.logger.error(e)
+            if cursor.description == None:
+                return
+            keys = tuple(_[0] for _ in cursor.description)
+            if json:
+                mapper = row_mapper(keys, self.__timestamps)
+            elif rows:
+                mapper = row_factory(keys, self.__timestamps)
+            while True:
+                data = cursor.fetchmany(size)
+                if len(data) == 0:
+                    break
+                if json or rows:
+                    yield from map(mapper, data)
+                else:
+                    yield from data
+        finally:
+            cursor.close()
+
+    def __to_json(self, keys: list[str], data: list[tuple[Any]]) -> list[dict[str, Any]]:
+        mapper = row_mapper(tuple(keys), self.__timestamps)
+        return list(map(mapper, data))
+
+    def id_strategy(self, table: str) -> IdStrategy:
+        strategy = self.__id_strategies.get(table)
+        if strategy == None:
+            schema = self.__schema.table(table)
+            if schema == None or "id" not in schema["declared"]:
+                return self.__id_strategy if self.__id_strategy else "hex"
+            strategy = infer_strategy(schema["declared"]["id"], self.__id_strategy)
+            self.__id_strategies[table] = strategy
+        return strategy
+
+    def timestamp_storage(self, table: str) -> TimestampStorage:
+        storage = self.__timestamp_storages.get(table)
+        if storage == None:
+            schema = self.__schema.table(table)
+            if schema == None or "created_at" not in schema["declared"]:
+                return self.__timestamp_storage
+            # `migrate_timestamps` keeps the declared type, so the latest row tells
+            # which unit is in use, the declared type only settles empty tables
+            try:
+                row = (
+                    self.__pool.reader()
+                    .execute(
+                        f"SELECT created_at FROM {table} ORDER BY rowid DESC LIMIT 1"
+                    )
+                    .fetchone()
+                )
+            except Error:
+                # WITHOUT ROWID tables
+                row = None
+            latest = row[0] if row else None
+            if type(latest) in [int, float]:
+                storage = "epoch_ms" if latest > EPOCH_MS_THRESHOLD else "real"
+            elif schema["declared"]["created_at"].upper() == "INTEGER":
+                storage = "epoch_ms"
+            else:
+                storage = "real"
+            self.__timestamp_storages[table] = storage
+        return storage
+
+    def migrate_timestamps(
+        self, table: str, storage: TimestampStorage = "real", batch_size: int = 10000
+    ) -> int | Literal[False]:
+        if storage not in TIMESTAMP_TYPES:
+            raise Error(f"Unknown timestamp storage: {storage}")
+        if batch_size <= 0:
+            raise Error("Batch size must be higher than 0.")
+        convert = {
+            "real": "CASE WHEN {c} IS NULL THEN NULL WHEN CAST({c} AS REAL) > {t} "
+            "THEN CAST({c} AS REAL) / 1000 ELSE CAST({c} AS REAL) END",
+            "epoch_ms": "CASE WHEN {c} IS NULL THEN NULL WHEN CAST({c} AS REAL) > {t} "
+            "THEN CAST({c} AS INTEGER) ELSE CAST(ROUND(CAST({c} AS REAL) * 1000) AS INTEGER) END",
+        }[storage]
+        columns = ", ".join(
+            f"{c} = {convert.replace('{c}', c).replace('{t}', str(EPOCH_MS_THRESHOLD))}"
+            for c in ["created_at", "modified_at"]
+        )
+        statement = f"UPDATE {table} SET {columns} WHERE rowid > ? AND rowid <= ?;"
+        bound = f"SELECT MAX(rowid) FROM (SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?);"
+        total = 0
+        last = 0
+        # One short transaction per batch of rowids, so writers are never blocked for long
+        while True:
+            with self.__pool.writer() as connection:
+                cursor = connection.cursor()
+                try:
+                    self.begin(cursor)
+                    upper = cursor.execute(bound, [last, batch_size]).fetchone()[0]
+                    if upper == None:
+                        self.commit(cursor)
+                        break
+                    with self.__measure(statement, [last, upper], write=True) as event:
+                        cursor.execute(statement, [last, upper])
+                        event["rows"] = cursor.rowcount
+                    self.commit(cursor)
+                except Error as e:
+                    self.logger.error(
+                        f"An error occured when executing: {red(statement)}"
+                    )
+                    self.logger.error(e)
+                    self.rollback(cursor)
+                    return False
+            total += cursor.rowcount
+            last = upper
+        self.__timestamp_storages[table] = storage
+        self.logger.info(
+            f"Migrated {total} rows of {blue(table)} to {storage} timestamps"
+        )
+        return total
+
+    def __table_schema(self, table: str, check: bool = True) -> TableSchema:
+        schema = self.__schema.table(table, check)
+        if schema == None:
+            raise Error(f"No such table: {table}")
+        return schema
 
     def __validate_data(self, table: str, fields: list[str], data: list[Any]) -> None:
         if self.__type_check:
-            result = True
-            f = self.__tables[table]
-            keys = f.keys()
-            for i, _ in enumerate(fields):
-                if _ not in keys:
-                    result = False
-                    break
-                if type(data[i]) != f[_]:
-                    result = False
-                    break
-            if not result:
-                raise TypeError("One or more values inserted do not match column type")
+            validate = self.__validators.get(table, self.__table_schema(table), fields)
+            issues = validate(data)
+            if len(issues) > 0:
+                raise ValidationError(
+                    [
+                        {"row": 0, "column": c, "value": v, "expected": e}
+                        for c, v, e in issues
+                    ]
+                )
+
+    def validate(
+        self, table: str, rows: Dict[str, Any] | List[Dict[str, Any]]
+    ) -> list[ValidationIssue]:
+        schema = self.__table_schema(table)
+        issues: list[ValidationIssue] = []
+        data = [rows] if type(rows) == dict else rows
+        for index, row in enumerate(data):
+            fields = tuple(row.keys())  # type: ignore
+            validate = self.__validators.get(table, schema, fields)
+            for column, value, expected in validate([row[_] for _ in fields]):  # type: ignore
+                issues.append(
+                    {"row": index, "column": column, "value": value, "expected": expected}
+                )
+        return issues
+
+    @contextmanager
+    def use_profile(
+        self,
+        profile: PragmaProfile | dict[str, Any],
+        pragmas: dict[str, Any] | None = None,
+    ) -> Iterator["Knex"]:
+        # Switches the connection settings for the duration of the block
+        settings = resolve_pragmas(profile, pragmas)
+        with self.__pool.writer() as connection:
+            previous = read_pragmas(connection, list(settings.keys()))
+        self.__pool.configure(settings)
+        try:
+            yield self
+        finally:
+            self.__pool.configure(previous)
+
+    def close(self) -> None:
+        if self.__writes != None:
+            self.__writes.close()
+        self.__pool.close()
 
     @property
-    def db_tables(self):
-        return self.__tables
+    def db(self) -> sqlite3.Connection:
+        return self.__pool.connection
+
+    @property
+    def query_builder(self) -> Querybuilder:
+        builder = getattr(self.__local, "builder", None)
+        if builder == None:
+            builder = Querybuilder(
+                self.logger,
+                self.__timestamp_storage,
+                self.__max_variables,
+                self.timestamp_storage,
+            )
+            self.__local.builder = builder
+        return builder
+
+    @property
+    def pragmas(self) -> dict[str, Any]:
+        names = list(dict.fromkeys(_ for p in PROFILES.values() for _ in p.keys()))
+        with self.__pool.writer() as connection:
+            return read_pragmas(connection, names)
+
+    @property
+    def in_transaction(self) -> bool:
+        "True when the current thread is inside an open transaction"
+        return self.__pool.holding > 0 and self.__depth > 0
+
+    @property
+    def threaded(self) -> bool:
+        return self.__pool.threaded
+
+    @property
+    def db_tables(self) -> dict[str, dict[str, Any]]:
+        return self.__schema.all()
+
+    @property
+    def schema(self) -> SchemaCache:
+        return self.__schema
+
+    @property
+    def timestamps(self) -> TimestampFormat:
+        return self.__timestamps
+
+    @timestamps.setter
+    def timestamps(self, value: TimestampFormat) -> None:
+        if value not in TIMESTAMP_CONVERTERS:
+            raise Error(f"Unknown timestamps format: {value}")
+        self.__timestamps = value
@@ -0,0 +1,99 @@
+import os
+from sqlite3 import Error
+from time import time_ns
+from typing import Any, Callable, Literal, Optional
+from uuid import uuid4
+
+IdStrategyName = Literal["hex", "rowid", "uuid4", "uuid7", "ulid", "manual"]
+IdStrategy = IdStrategyName | Callable[[], Any]
+
+# Declared type of the `id` column for each strategy
+ID_TYPES: dict[str, str] = {
+    "hex": "varchar(255)",
+    "rowid": "INTEGER",
+    "uuid4": "blob",
+    "uuid7": "blob",
+    "ulid": "blob",
+    "manual": "",
+}
+
+
+def hex_id() -> str:
+    "32 hex characters, same shape as the legacy md5 ids"
+    return uuid4().hex
+
+
+def uuid4_id() -> bytes:
+    return uuid4().bytes
+
+
+def uuid7_id() -> bytes:
+    "RFC 9562 UUIDv7: 48 bit unix milliseconds, version, 74 random bits"
+    ms = time_ns() // 1_000_000
+    value = int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # variant
+    return ms.to_bytes(6, "big") + (value & ((1 << 80) - 1)).to_bytes(10, "big")
+
+
+def ulid_id() -> bytes:
+    "ULID in its binary form: 48 bit unix milliseconds followed by 80 random bits"
+    ms = time_ns() // 1_000_000
+    return ms.to_bytes(6, "big") + os.urandom(10)
+
+
+GENERATORS: dict[str, Optional[Callable[[], Any]]] = {
+    "hex": hex_id,
+    "rowid": None,
+    "uuid4": uuid4_id,
+    "uuid7": uuid7_id,
+    "ulid": ulid_id,
+    "manual": None,
+}
+
+
+def id_type(strategy: IdStrategy) -> str:
+    if callable(strategy):
+        return ""
+    if strategy not in ID_TYPES:
+        raise Error(f"Unknown id strategy: {strategy}")
+    return ID_TYPES[strategy]
+
+
+def id_generator(strategy: IdStrategy) -> Optional[Callable[[], Any]]:
+    "None when SQLite (rowid) or the caller (manual) provides the id"
+    if callable(strategy):
+        return strategy
+    if strategy not in GENERATORS:
+        raise Error(f"Unknown id strategy: {strategy}")
+    return GENERATORS[strategy]
+
+
+def fits(strategy: IdStrategy, declared: str) -> bool:
+    "Whether the ids of `strategy` can be stored in an id column of type `declared`"
+    expected = id_type(strategy).lower()
+    declared = declared.lower()
+    if expected == "":
+        return True
+    if expected.startswith("varchar"):
+        return declared.startswith("varchar") or declared == "text"
+    return declared == expected
+
+
+def infer_strategy(declared: str, configured: Optional[IdStrategy] = None) -> IdStrategy:
+    "Strategy of an existing table, the configured one when it fits the id column"
+    if configured != None:
+        if not fits(configured, declared):
+            name = getattr(configured, "__name__", configured)
+            raise Error(
+                f"The {name} id strategy doesn't fit an id column declared as {declared}"
+            )
+        return configured
+    declared = declared.lower()
+    if declared == "integer":
+        return "rowid"
+    if declared == "blob":
+        return "uuid7"
+    if declared.startswith("varchar") or declared == "text":
+        return "hex"
+    return "manual"
@@ -0,0 +1,172 @@
+import re
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from logging import Logger
+from sqlite3 import Error
+from time import perf_counter
+from typing import Any, Callable, Iterator, Literal, Optional, TypedDict
+
+from chalk import red, yellow
+
+
+class QueryEvent(TypedDict):
+
+    sql: str
+    binds: int
+    rows: int
+    seconds: float
+    lock_wait: float
+
+
+class QueryStat(TypedDict):
+
+    count: int
+    rows: int
+    total: float
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+Hook = Callable[[QueryEvent], None]
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\b(IN\s*)\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize(sql: str) -> str:
+    "Collapses literals and IN lists so every shape of a query shares an entry"
+    sql = _LITERALS.sub("?", sql)
+    sql = _LISTS.sub(r"\1(?)", sql)
+    return _SPACES.sub(" ", sql).replace(" ;", ";").strip()
+
+
+def _percentile(values: list[float], p: float) -> float:
+    if len(values) == 0:
+        return 0.0
+    return values[min(len(values) - 1, int(round(p * (len(values) - 1))))]
+
+
+class QueryStats:
+    def __init__(self, samples: int = 1000) -> None:
+        self.samples = samples
+        self.__lock = threading.Lock()
+        self.__entries: dict[str, dict[str, Any]] = {}
+
+    def record(self, event: QueryEvent) -> None:
+        key = normalize(event["sql"])
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry == None:
+                entry = {
+                    "count": 0,
+                    "rows": 0,
+                    "total": 0.0,
+                    "durations": deque(maxlen=self.samples),
+                }
+                self.__entries[key] = entry
+            entry["count"] += 1
+            entry["rows"] += max(event["rows"], 0)
+            entry["total"] += event["seconds"]
+            entry["durations"].append(event["seconds"])
+
+    def snapshot(self) -> dict[str, QueryStat]:
+        with self.__lock:
+            entries = {
+                k: {**v, "durations": sorted(v["durations"])}
+                for k, v in self.__entries.items()
+            }
+        block: dict[str, QueryStat] = {}
+        for key, entry in entries.items():
+            durations = entry["durations"]
+            block[key] = {
+                "count": entry["count"],
+                "rows": entry["rows"],
+                "total": entry["total"],
+                "mean": entry["total"] / entry["count"],
+                "p50": _percentile(durations, 0.50),
+                "p95": _percentile(durations, 0.95),
+                "p99": _percentile(durations, 0.99),
+                "max": durations[-1] if durations else 0.0,
+            }
+        return block
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__entries = {}
+
+
+class Instrumentation:
+    def __init__(
+        self,
+        logger: Logger,
+        slow_query: Optional[float] = None,
+        aggregate: bool = True,
+    ) -> None:
+        self.logger = logger
+        self.slow_query = slow_query
+        self.stats = QueryStats() if aggregate else None
+        self.before: list[Hook] = []
+        self.after: list[Hook] = []
+
+    def on(self, moment: Literal["before", "after"], hook: Hook) -> None:
+        if moment == "before":
+            self.before.append(hook)
+        elif moment == "after":
+            self.after.append(hook)
+        else:
+            raise Error(f"Unknown hook moment: {moment}")
+
+    @contextmanager
+    def measure(
+        self, sql: str, binds: int, lock_wait: float = 0.0
+    ) -> Iterator[QueryEvent]:
+        event: QueryEvent = {
+            "sql": sql,
+            "binds": binds,
+            "rows": -1,
+            "seconds": 0.0,
+            "lock_wait": lock_wait,
+        }
+        for hook in self.before:
+            hook(event)
+        start = perf_counter()
+        try:
+            yield event
+        finally:
+            event["seconds"] = perf_counter() - start
+            if self.stats != None:
+                self.stats.record(event)
+            if self.slow_query != None and event["seconds"] >= self.slow_query:
+                self.logger.warning(
+                    f"{yellow('Slow query')} ({event['seconds'] * 1000:.1f}ms, {event['rows']} rows): {red(sql)}"
+                )
+            for hook in self.after:
+                hook(event)
+
+
+class _Disabled:
+    "Shared no-op measure, keeps the disabled path down to an attribute check"
+
+    event: QueryEvent = {
+        "sql": "",
+        "binds": 0,
+        "rows": -1,
+        "seconds": 0.0,
+        "lock_wait": 0.0,
+    }
+
+    def __enter__(self) -> QueryEvent:
+        return self.event
+
+    def __exit__(self, *args: Any) -> None:
+        return None
+
+
+DISABLED = _Disabled()
@@ -0,0 +1,108 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+from math import floor
+from time import time, time_ns
+from typing import Any, Callable, Literal
+
+TimestampFormat = Literal["string", "datetime", "epoch"]
+TimestampStorage = Literal["real", "epoch_ms"]
+
+TIMESTAMP_COLUMNS = ("created_at", "modified_at")
+NON_WORD = re.compile(r"\W+")
+TIMESTAMP_PATTERN = "%Y-%m-%dT%H:%M:%SZ"
+
+# Declared column type for each storage format
+TIMESTAMP_TYPES: dict[str, str] = {"real": "REAL", "epoch_ms": "INTEGER"}
+# Anything above this is too far in the future to be seconds, so it's milliseconds
+EPOCH_MS_THRESHOLD = 1e11
+
+
+def now_real() -> float:
+    return time()
+
+
+def now_ms() -> int:
+    return time_ns() // 1_000_000
+
+
+TIMESTAMP_CLOCKS: dict[str, Callable[[], Any]] = {"real": now_real, "epoch_ms": now_ms}
+
+
+def to_storage(value: datetime, storage: TimestampStorage = "real") -> Any:
+    if storage == "epoch_ms":
+        return round(value.timestamp() * 1000)
+    return value.timestamp()
+
+
+def _seconds(value: Any) -> float:
+    # Legacy rows hold text, epoch_ms tables hold integers
+    value = float(value)
+    return value / 1000 if value > EPOCH_MS_THRESHOLD else value
+
+
+@lru_cache(maxsize=4096)
+def _format_second(second: int) -> str:
+    return datetime.fromtimestamp(second).strftime(TIMESTAMP_PATTERN)
+
+
+def _to_string(value: Any) -> Any:
+    if value == None:
+        return None
+    # The output has second resolution, rows written close together share the result
+    return _format_second(floor(_seconds(value)))
+
+
+def _to_datetime(value: Any) -> Any:
+    if value == None:
+        return None
+    return datetime.fromtimestamp(_seconds(value))
+
+
+def _to_epoch(value: Any) -> Any:
+    if value == None:
+        return None
+    return _seconds(value)
+
+
+TIMESTAMP_CONVERTERS: dict[str, Callable[[Any], Any]] = {
+    "string": _to_string,
+    "datetime": _to_datetime,
+    "epoch": _to_epoch,
+}
+
+
+def column_name(key: str) -> str:
+    # Other unaliased aggregates of the builder are named in SQL, see `Aggregate`
+    if "COUNT(" in key:
+        return "count"
+    return key
+
+
+def column_names(keys: tuple[str, ...]) -> tuple[str, ...]:
+    return tuple(column_name(key) for key in keys)
+
+
+@lru_cache(maxsize=256)
+def row_mapper(
+    keys: tuple[str, ...], timestamps: TimestampFormat = "string"
+) -> Callable[[tuple[Any, ...]], dict[str, Any]]:
+    "Compiles a row → dict mapper once per result shape"
+    names = column_names(keys)
+    convert = TIMESTAMP_CONVERTERS[timestamps]
+    converted = [(i, names[i]) for i, key in enumerate(keys) if key in TIMESTAMP_COLUMNS]
+
+    if len(converted) == 0:
+
+        def mapper(row: tuple[Any, ...]) -> dict[str, Any]:
+            return dict(zip(names, row))
+
+        return mapper
+
+    def mapper_with_timestamps(row: tuple[Any, ...]) -> dict[str, Any]:
+        block = dict(zip(names, row))
+        for i, name in converted:
+            block[name] = convert(row[i])
+        return block
+
+    return mapper_with_timestamps
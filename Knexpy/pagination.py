@@ -0,0 +1,43 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+from sqlite3 import Error
+from typing import Any, Optional, Sequence, TypedDict
+
+
+class Page(TypedDict):
+
+    rows: list[Any]
+    next: Optional[str]
+
+
+def _encode(value: Any) -> Any:
+    # Blob ids (uuid7, ulid) don't survive JSON as is
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"b": bytes(value).hex()}
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if type(value) == dict:
+        return bytes.fromhex(value["b"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    "Opaque token holding the seek values of the last row of a page"
+    raw = json.dumps([_encode(_) for _ in values], separators=(",", ":"))
+    return urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> list[Any]:
+    try:
+        raw = urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = [_decode(_) for _ in json.loads(raw)]
+    except (DecodeError, ValueError, TypeError, KeyError) as e:
+        raise Error(f"Invalid pagination cursor: {e}")
+    if len(values) != size:
+        raise Error("Invalid pagination cursor: it was built for a different ordering")
+    if any(_ == None for _ in values):
+        raise Error("Invalid pagination cursor: it holds a NULL value")
+    return values
@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+from typing import Any, Callable, Literal, Optional
+from urllib.parse import quote
+
+from .mappers import TimestampFormat, row_mapper
+from .pragmas import apply_pragmas
+from .rows import row_factory
+
+Shape = Literal["dicts", "tuples", "rows"]
+
+# One read-only connection per worker thread (or process) and database
+_local = threading.local()
+
+
+def _connection(path: str, pragmas: dict[str, Any], timeout: float) -> sqlite3.Connection:
+    connections: dict[str, sqlite3.Connection] = getattr(_local, "connections", {})
+    _local.connections = connections
+    connection = connections.get(path)
+    if connection == None:
+        connection = sqlite3.connect(
+            f"file:{quote(path)}?mode=ro", uri=True, timeout=timeout
+        )
+        apply_pragmas(connection, pragmas, read_only=True)
+        connections[path] = connection
+    return connection
+
+
+def scan(
+    path: str,
+    pragmas: dict[str, Any],
+    timeout: float,
+    statement: str,
+    values: list[Any],
+    shape: Shape,
+    timestamps: TimestampFormat,
+    mapper: Optional[Callable[[list[Any]], Any]] = None,
+) -> tuple[tuple[str, ...], Any]:
+    """
+    Reads one partition and maps its rows where it ran, on a worker thread or process.
+    Returns the result column names along with the rows, or what `mapper` made of them.
+    """
+    cursor = _connection(path, pragmas, timeout).execute(statement, values)
+    try:
+        keys = tuple(_[0] for _ in cursor.description)
+        data = cursor.fetchall()
+    finally:
+        cursor.close()
+    if shape == "dicts":
+        data = list(map(row_mapper(keys, timestamps), data))
+    elif shape == "rows":
+        data = list(map(row_factory(keys, timestamps), data))
+    return keys, mapper(data) if mapper != None else data
+
+
+def after(value: Any) -> Any:
+    "A value sorting right after `value` in SQLite, the exclusive end of the last range"
+    if isinstance(value, (int, float)):
+        return value + 1
+    if isinstance(value, str):
+        # Every BLOB sorts after every TEXT
+        return b""
+    return bytes(value) + b"\x00"
+
+
+def sort_key(value: Any) -> tuple[int, Any]:
+    "Orders Python values the way SQLite orders storage classes: NULL, numbers, text, blobs"
+    if value == None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, value)
@@ -0,0 +1,114 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Iterator
+from urllib.parse import quote
+
+from .pragmas import apply_pragmas
+
+
+class ConnectionPool:
+    """
+    Hands out SQLite connections.
+    Single mode shares one connection. Threaded mode keeps one read-only connection
+    per thread, so readers run concurrently, while a single writer connection is
+    guarded by a lock.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        timeout: float = 3600,
+        threaded: bool = False,
+        pragmas: dict[str, Any] | None = None,
+    ) -> None:
+        self.path = path
+        self.timeout = timeout
+        self.threaded = threaded
+        self.pragmas = pragmas if pragmas else {}
+        self.__lock = threading.RLock()
+        # Separate from the writer lock, opening a reader never waits on a transaction
+        self.__readers_lock = threading.Lock()
+        self.__local = threading.local()
+        self.__readers: dict[int, sqlite3.Connection] = {}
+        self.__writer = sqlite3.connect(
+            path, timeout=timeout, check_same_thread=not threaded
+        )
+        apply_pragmas(self.__writer, self.pragmas)
+        # In-memory databases only exist inside their own connection
+        self.__shared = (
+            not threaded or path == ":memory:" or path.startswith("file::memory:")
+        )
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        return self.__writer
+
+    @property
+    def max_variables(self) -> int:
+        "SQLITE_LIMIT_VARIABLE_NUMBER, the lowest default is assumed before Python 3.11"
+        getlimit = getattr(self.__writer, "getlimit", None)
+        if getlimit == None:
+            return 999
+        return getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        start = perf_counter()
+        with self.__lock:
+            self.__local.lock_wait = perf_counter() - start
+            self.__local.holding = self.holding + 1
+            try:
+                yield self.__writer
+            finally:
+                self.__local.holding -= 1
+
+    @property
+    def holding(self) -> int:
+        "How many nested `writer()` blocks the current thread is in"
+        return getattr(self.__local, "holding", 0)
+
+    @property
+    def lock_wait(self) -> float:
+        "Seconds the current thread waited for the writer on its last write"
+        return getattr(self.__local, "lock_wait", 0.0)
+
+    def reader(self) -> sqlite3.Connection:
+        # The thread holding the writer (e.g. inside a transaction) must read its own
+        # uncommitted changes
+        if self.__shared or self.holding > 0:
+            return self.__writer
+        connection = getattr(self.__local, "connection", None)
+        if connection == None:
+            connection = sqlite3.connect(
+                f"file:{quote(self.path)}?mode=ro",
+                uri=True,
+                timeout=self.timeout,
+                check_same_thread=False,
+            )
+            apply_pragmas(connection, self.pragmas, read_only=True)
+            self.__local.connection = connection
+            with self.__readers_lock:
+                self.__prune()
+                self.__readers[threading.get_ident()] = connection
+        return connection
+
+    def configure(self, pragmas: dict[str, Any]) -> None:
+        with self.__lock, self.__readers_lock:
+            apply_pragmas(self.__writer, pragmas)
+            for connection in self.__readers.values():
+                apply_pragmas(connection, pragmas, read_only=True)
+            self.pragmas = {**self.pragmas, **pragmas}
+
+    def close(self) -> None:
+        with self.__lock, self.__readers_lock:
+            for connection in self.__readers.values():
+                connection.close()
+            self.__readers = {}
+            self.__writer.close()
+
+    def __prune(self) -> None:
+        alive = {_.ident for _ in threading.enumerate()}
+        for ident in [_ for _ in self.__readers.keys() if _ not in alive]:
+            self.__readers.pop(ident).close()
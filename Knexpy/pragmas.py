@@ -0,0 +1,69 @@
+import sqlite3
+from typing import Any, Literal
+
+PragmaProfile = Literal["durable", "balanced", "bulk_load"]
+
+PROFILES: dict[str, dict[str, Any]] = {
+    # Every commit is fsynced, survives power loss
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -16000,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    # WAL + NORMAL only fsyncs on checkpoints, a power loss can lose the last commits
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # No fsync at all, meant to be switched on while loading data
+    "bulk_load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "mmap_size": 268435456,
+        "cache_size": -262144,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+
+# Pragmas that are a property of the database file and not of the connection
+DATABASE_PRAGMAS = ["journal_mode"]
+
+
+def resolve_pragmas(
+    profile: "PragmaProfile | dict[str, Any] | None" = None,
+    pragmas: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    if profile == None:
+        block = {}
+    elif type(profile) == dict:
+        block = {**profile}
+    elif profile in PROFILES:
+        block = {**PROFILES[profile]}  # type: ignore
+    else:
+        raise sqlite3.Error(f"Unknown profile: {profile}")
+    return {**block, **(pragmas if pragmas else {})}
+
+
+def apply_pragmas(
+    connection: sqlite3.Connection, pragmas: dict[str, Any], read_only: bool = False
+) -> None:
+    for name, value in pragmas.items():
+        if read_only and name in DATABASE_PRAGMAS:
+            continue
+        connection.execute(f"PRAGMA {name}={value};").fetchall()
+
+
+def read_pragmas(connection: sqlite3.Connection, names: list[str]) -> dict[str, Any]:
+    block = {}
+    for name in names:
+        row = connection.execute(f"PRAGMA {name};").fetchone()
+        block[name] = row[0] if row else None
+    return block
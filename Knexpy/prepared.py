@@ -0,0 +1,107 @@
+from sqlite3 import Error
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Literal, Optional
+
+if TYPE_CHECKING:
+    from .core import Knex, Relations
+
+# Bounds of the key range a partitioned query reads, see `Querybuilder.partition`
+PARTITION_LOWER = "partition_lower"
+PARTITION_UPPER = "partition_upper"
+
+
+class Param:
+    """
+    Named placeholder, used in place of a value when composing a chain for
+    `Knex.prepare`. Its value is given each time the statement runs.
+    """
+
+    __slots__ = ("name", "default", "encode")
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        default: Optional[Callable[[], Any]] = None,
+        encode: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        self.name = name
+        self.default = default
+        self.encode = encode
+
+    def __repr__(self) -> str:
+        return f"Param({self.name!r})"
+
+    def encoded(self, encode: Callable[[Any], Any]) -> "Param":
+        "Same placeholder, with `encode` applied on top of the current encoding"
+        inner = self.encode
+        if inner == None:
+            return Param(self.name, self.default, encode)
+        return Param(self.name, self.default, lambda _: encode(inner(_)))
+
+    def value(self, params: dict[str, Any]) -> Any:
+        if self.name != None and self.name in params:
+            value = params[self.name]
+        elif self.default != None:
+            value = self.default()
+        else:
+            raise Error(f"Missing parameter: {self.name}")
+        return self.encode(value) if self.encode != None else value
+
+
+def resolve(values: list[Any], params: dict[str, Any]) -> list[Any]:
+    return [_.value(params) if isinstance(_, Param) else _ for _ in values]
+
+
+class Prepared:
+    """
+    Compiled statement, reusable from any thread.
+    SELECT statements return rows, UPDATE and DELETE return whether they succeeded.
+    """
+
+    __slots__ = ("knex", "sql", "values", "kind", "json", "relations", "names")
+
+    def __init__(
+        self,
+        knex: "Knex",
+        sql: str,
+        values: list[Any],
+        kind: Literal["SELECT", "UPDATE", "DELETE"],
+        json: bool = True,
+        relations: Optional["Relations"] = None,
+    ) -> None:
+        self.knex = knex
+        self.sql = sql
+        self.values = tuple(values)
+        self.kind = kind
+        self.json = json
+        self.relations = relations
+        self.names = tuple(
+            dict.fromkeys(_.name for _ in values if isinstance(_, Param) and _.name)
+        )
+
+    def __repr__(self) -> str:
+        return f'Prepared(sql="{self.sql}", params={list(self.names)})'
+
+    def __call__(self, **params: Any) -> Any:
+        return self.run(**params)
+
+    def bind(self, **params: Any) -> list[Any]:
+        return resolve(self.values, params)  # type: ignore
+
+    def run(self, **params: Any) -> Any:
+        values = self.bind(**params)
+        if self.kind == "SELECT":
+            return self.knex._fetch(self.sql, values, self.json, self.relations, True)
+        return self.knex._execute(self.sql, values)
+
+    def run_many(self, rows: Iterable[dict[str, Any]]) -> Any:
+        "Writes go through a single executemany transaction, reads run one by one"
+        if self.kind == "SELECT":
+            return [self.run(**_) for _ in rows]
+        return self.knex.insert_many([(self.sql, self.bind(**_)) for _ in rows])
+
+    def stream(self, size: int = 500, **params: Any) -> Iterator[Any]:
+        if self.kind != "SELECT":
+            raise Error(f"Cannot stream a {self.kind} statement")
+        return self.knex._stream(
+            self.sql, self.bind(**params), size, self.json, self.relations
+        )
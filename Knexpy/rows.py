@@ -0,0 +1,101 @@
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Callable, Iterator
+
+from .mappers import (
+    TIMESTAMP_COLUMNS,
+    TIMESTAMP_CONVERTERS,
+    TimestampFormat,
+    column_names,
+)
+
+
+class Row(tuple):
+    """
+    Result row backed by a tuple, read by position, by name (`row["name"]`) or as an
+    attribute (`row.name`).
+    Column names live on the class generated for each result shape, so rows only
+    hold their values.
+    """
+
+    __slots__ = ()
+
+    _fields: tuple[str, ...] = ()
+    _index: dict[str, int] = {}
+
+    def __getitem__(self, key: Any) -> Any:
+        if type(key) == str:
+            try:
+                key = self._index[key]
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{k}={v!r}" for k, v in self.items())
+        return f"Row({values})"
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Generated classes can't be imported by pickle, the shape is rebuilt instead
+        return _rebuild, (self._fields, tuple(self))
+
+    def keys(self) -> tuple[str, ...]:
+        return self._fields
+
+    def values(self) -> tuple[Any, ...]:
+        return tuple(self)
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        return zip(self._fields, self)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        index = self._index.get(key)
+        return default if index == None else tuple.__getitem__(self, index)
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(zip(self._fields, self))
+
+
+# Attribute access never hides the methods of Row itself
+RESERVED = frozenset(dir(Row)) - frozenset(dir(tuple))
+
+
+@lru_cache(maxsize=256)
+def row_class(names: tuple[str, ...]) -> type[Row]:
+    "One class per result shape, holding the column names every row shares"
+    index = {name: i for i, name in enumerate(names)}
+    fields: dict[str, Any] = {"__slots__": (), "_fields": names, "_index": index}
+    for name, i in index.items():
+        if name.isidentifier() and name not in RESERVED:
+            fields[name] = property(itemgetter(i))
+    return type("Row", (Row,), fields)
+
+
+def _rebuild(names: tuple[str, ...], values: tuple[Any, ...]) -> Row:
+    return tuple.__new__(row_class(names), values)
+
+
+@lru_cache(maxsize=256)
+def row_factory(
+    keys: tuple[str, ...], timestamps: TimestampFormat = "string"
+) -> Callable[[tuple[Any, ...]], Row]:
+    "Compiles a row → Row mapper once per result shape"
+    cls = row_class(column_names(keys))
+    new = tuple.__new__
+    convert = TIMESTAMP_CONVERTERS[timestamps]
+    converted = [i for i, key in enumerate(keys) if key in TIMESTAMP_COLUMNS]
+
+    if len(converted) == 0:
+
+        def factory(row: tuple[Any, ...]) -> Row:
+            return new(cls, row)
+
+        return factory
+
+    def factory_with_timestamps(row: tuple[Any, ...]) -> Row:
+        values = list(row)
+        for i in converted:
+            values[i] = convert(values[i])
+        return new(cls, values)
+
+    return factory_with_timestamps
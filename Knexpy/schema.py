@@ -0,0 +1,122 @@
+import sqlite3
+import threading
+from logging import Logger
+from sqlite3 import Error
+from typing import Any, Callable, Optional, TypedDict
+
+from .utils import sqlite_to_native
+
+
+class ForeignKey(TypedDict):
+
+    column: str
+    table: str
+    references: Optional[str]
+
+
+class TableSchema(TypedDict):
+
+    columns: dict[str, Any]
+    declared: dict[str, str]
+    nullable: dict[str, bool]
+    primary_key: list[str]
+    foreign_keys: list[ForeignKey]
+
+
+class SchemaCache:
+    """
+    Table metadata loaded on first use, one table at a time.
+    The whole cache is dropped when `PRAGMA schema_version` moves, which also
+    catches schema changes made by other connections or processes.
+    """
+
+    def __init__(
+        self, connection: Callable[[], sqlite3.Connection], logger: Logger
+    ) -> None:
+        self.__connection = connection
+        self.logger = logger
+        self.__lock = threading.Lock()
+        self.__version: Optional[int] = None
+        self.__tables: dict[str, Optional[TableSchema]] = {}
+        self.__names: Optional[list[str]] = None
+
+    def check(self) -> None:
+        version = self.__connection().execute("PRAGMA schema_version;").fetchone()[0]
+        with self.__lock:
+            if version != self.__version:
+                self.__tables = {}
+                self.__names = None
+                self.__version = version
+
+    def invalidate(self) -> None:
+        with self.__lock:
+            self.__tables = {}
+            self.__names = None
+            self.__version = None
+
+    def table(self, name: str, check: bool = True) -> Optional[TableSchema]:
+        if check:
+            self.check()
+        if name in self.__tables:
+            return self.__tables[name]
+        schema = self.__load(name)
+        with self.__lock:
+            self.__tables[name] = schema
+        return schema
+
+    def columns(self, name: str, check: bool = True) -> Optional[dict[str, Any]]:
+        schema = self.table(name, check)
+        return schema["columns"] if schema else None
+
+    def names(self, check: bool = True) -> list[str]:
+        if check:
+            self.check()
+        if self.__names == None:
+            try:
+                data = (
+                    self.__connection()
+                    .execute("SELECT name FROM sqlite_master where type='table'")
+                    .fetchall()
+                )
+                self.__names = [_[0] for _ in data]
+            except Error as e:
+                self.logger.error(e)
+                return []
+        return self.__names
+
+    def all(self) -> dict[str, dict[str, Any]]:
+        self.check()
+        block = {}
+        for name in self.names(check=False):
+            columns = self.columns(name, check=False)
+            if columns != None:
+                block[name] = columns
+        return block
+
+    def __load(self, name: str) -> Optional[TableSchema]:
+        try:
+            connection = self.__connection()
+            data = connection.execute(f"PRAGMA table_info({name})").fetchall()
+            foreign = connection.execute(f"PRAGMA foreign_key_list({name})").fetchall()
+        except Error as e:
+            self.logger.error(e)
+            return None
+        if len(data) == 0:
+            return None
+        schema: TableSchema = {
+            "columns": {},
+            "declared": {},
+            "nullable": {},
+            "primary_key": [],
+            # `references` is None when the key points to the primary key implicitly
+            "foreign_keys": [
+                {"column": _[3], "table": _[2], "references": _[4]} for _ in foreign
+            ],
+        }
+        for field in data:
+            schema["columns"][field[1]] = sqlite_to_native(field[2])
+            schema["declared"][field[1]] = field[2]
+            schema["nullable"][field[1]] = not field[3]
+            if field[5]:
+                schema["primary_key"].append(field[1])
+        return schema
@@ -0,0 +1,107 @@
+import sqlite3
+from contextlib import AbstractContextManager
+from functools import wraps
+from time import sleep
+from typing import TYPE_CHECKING, Any, Callable, Literal, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from .core import Knex
+
+TransactionMode = Literal["DEFERRED", "IMMEDIATE", "EXCLUSIVE"]
+T = TypeVar("T")
+
+
+def is_busy(error: Exception) -> bool:
+    "SQLITE_BUSY / SQLITE_LOCKED, `sqlite_errorcode` only exists on Python 3.11+"
+    code = getattr(error, "sqlite_errorcode", None)
+    if code != None:
+        return (code & 0xFF) in [sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED]
+    message = str(error).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+class Transaction:
+    """
+    `with db.transaction():` runs every write of the block in a single transaction,
+    nested blocks become savepoints.
+    Used as a decorator the whole function is retried when SQLite reports busy, a
+    `with` block can only retry acquiring the transaction itself.
+    """
+
+    def __init__(
+        self,
+        knex: "Knex",
+        writer: Callable[[], AbstractContextManager[sqlite3.Connection]],
+        mode: TransactionMode = "DEFERRED",
+        retries: int = 3,
+        backoff: float = 0.05,
+    ) -> None:
+        if mode not in ["DEFERRED", "IMMEDIATE", "EXCLUSIVE"]:
+            raise sqlite3.Error(f"Unknown transaction mode: {mode}")
+        self.knex = knex
+        self.mode = mode
+        self.retries = retries
+        self.backoff = backoff
+        self.__writer = writer
+        self.__held: list[AbstractContextManager[sqlite3.Connection]] = []
+
+    def __enter__(self) -> "Knex":
+        # The writer stays locked for the whole block, other threads queue behind it
+        held = self.__writer()
+        held.__enter__()
+        try:
+            self.__retry(lambda: self.knex.begin(mode=self.mode))
+        except BaseException as e:
+            held.__exit__(type(e), e, e.__traceback__)
+            raise
+        self.__held.append(held)
+        return self.knex
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> Literal[False]:
+        held = self.__held.pop()
+        try:
+            if exc_type == None:
+                try:
+                    self.__retry(self.knex.commit)
+                except BaseException:
+                    self.knex.rollback()
+                    raise
+            else:
+                self.knex.rollback()
+        finally:
+            held.__exit__(exc_type, exc, tb)
+        return False
+
+    def __call__(self, fn: Callable[..., T]) -> Callable[..., T]:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            # Only the outermost transaction can be retried, a savepoint can't
+            nested = self.knex.in_transaction
+            attempt = 0
+            while True:
+                try:
+                    with Transaction(
+                        self.knex, self.__writer, self.mode, 0, self.backoff
+                    ):
+                        return fn(*args, **kwargs)
+                except sqlite3.OperationalError as e:
+                    if nested or not is_busy(e) or attempt >= self.retries:
+                        raise
+                    attempt += 1
+                    self.knex.logger.warning(
+                        f"Database busy, retrying transaction ({attempt}/{self.retries})"
+                    )
+                    sleep(self.backoff * 2 ** (attempt - 1))
+
+        return wrapper
+
+    def __retry(self, step: Callable[[], Any]) -> Optional[Any]:
+        attempt = 0
+        while True:
+            try:
+                return step()
+            except sqlite3.OperationalError as e:
+                if not is_busy(e) or attempt >= self.retries:
+                    raise
+                attempt += 1
+                sleep(self.backoff * 2 ** (attempt - 1))
@@ -0,0 +1,102 @@
+from datetime import date, datetime
+from typing import Any, Callable, Optional, Sequence, TypedDict
+
+from .schema import TableSchema
+from .utils import sqlite_to_native
+
+
+class ValidationIssue(TypedDict):
+
+    row: int
+    column: str
+    value: Any
+    expected: str
+
+
+class ValidationError(TypeError):
+    def __init__(self, issues: list[ValidationIssue]) -> None:
+        self.issues = issues
+        details = ", ".join(
+            f"row {_['row']} column {_['column']} ({type(_['value']).__name__} is not {_['expected']})"
+            for _ in issues[:10]
+        )
+        more = f" and {len(issues) - 10} more" if len(issues) > 10 else ""
+        super().__init__(
+            f"One or more values inserted do not match column type: {details}{more}"
+        )
+
+
+Validator = Callable[[Sequence[Any]], list[tuple[str, Any, str]]]
+
+# Python values SQLite stores without loss for each native column type
+AFFINITY: dict[Any, tuple[type, ...]] = {
+    int: (int, bool),
+    float: (float, int, bool),
+    bool: (bool, int),
+    str: (str,),
+}
+# Declared types mapped to `str` that also take other storage classes
+DECLARED: dict[str, tuple[type, ...]] = {
+    "blob": (bytes, bytearray, memoryview, str),
+    "numeric": (int, float, bool, str),
+    "decimal": (int, float, bool, str),
+    "date": (str, int, float, date),
+    "datetime": (str, int, float, datetime),
+}
+
+
+def accepted_types(declared: str) -> Optional[tuple[type, ...]]:
+    "None means any value is accepted"
+    base = declared.lower().split("(")[0].strip()
+    if base in DECLARED:
+        return DECLARED[base]
+    native = sqlite_to_native(declared)
+    if native == None:
+        return None
+    return AFFINITY[native]
+
+
+def compile_validator(schema: TableSchema, fields: Sequence[str]) -> Validator:
+    checks: list[tuple[int, str, Any, bool, str]] = []
+    unknown = [_ for _ in fields if _ not in schema["columns"]]
+    for i, column in enumerate(fields):
+        if column in unknown:
+            continue
+        accepted = accepted_types(schema["declared"][column])
+        if accepted == None:
+            continue
+        expected = " | ".join(_.__name__ for _ in accepted)
+        checks.append(
+            (i, column, frozenset(accepted), schema["nullable"][column], expected)
+        )
+
+    def validate(row: Sequence[Any]) -> list[tuple[str, Any, str]]:
+        issues = [(_, None, "an existing column") for _ in unknown]
+        for i, column, accepted, nullable, expected in checks:
+            value = row[i]
+            if value == None:
+                if not nullable:
+                    issues.append((column, value, f"{expected} (NOT NULL)"))
+            elif type(value) not in accepted:
+                issues.append((column, value, expected))
+        return issues
+
+    return validate
+
+
+class Validators:
+    "Compiled validators cached per (table, fields) for the current schema"
+
+    def __init__(self) -> None:
+        self.__cache: dict[
+            tuple[str, tuple[str, ...]], tuple[TableSchema, Validator]
+        ] = {}
+
+    def get(self, table: str, schema: TableSchema, fields: Sequence[str]) -> Validator:
+        key = (table, tuple(fields))
+        cached = self.__cache.get(key)
+        # A schema change hands out a new TableSchema, which recompiles the validator
+        if cached == None or cached[0] is not schema:
+            cached = (schema, compile_validator(schema, fields))
+            self.__cache[key] = cached
+        return cached[1]
@@ -0,0 +1,103 @@
+import threading
+from concurrent.futures import Future
+from queue import Empty, Full, Queue
+from sqlite3 import Error
+from time import monotonic
+from typing import Any, Callable, Optional
+
+# (statement, values, future), a None statement only marks a point to wait for
+Write = tuple[Optional[str], list[Any], Future]
+
+_STOP = object()
+
+
+class WriteQueue:
+    """
+    Hands writes from any thread to a single background writer, which commits them
+    in groups of up to `batch` writes, waiting at most `interval` seconds for a group
+    to fill. Each write gets a future resolved once its group committed.
+    A full queue blocks new writes (up to `timeout` seconds) until the writer catches up.
+    """
+
+    def __init__(
+        self,
+        commit: Callable[[list[Write]], None],
+        size: int = 10000,
+        batch: int = 500,
+        interval: float = 0.002,
+        timeout: float = 30,
+    ) -> None:
+        if size <= 0 or batch <= 0:
+            raise Error("Write queue and batch sizes must be higher than 0.")
+        self.batch = batch
+        self.interval = interval
+        self.timeout = timeout
+        self.__commit = commit
+        self.__queue: Queue[Any] = Queue(size)
+        self.__closed = False
+        self.__thread = threading.Thread(
+            target=self.__run, name="knexpy-writer", daemon=True
+        )
+        self.__thread.start()
+
+    def submit(self, statement: Optional[str], values: list[Any]) -> Future:
+        if self.__closed:
+            raise Error("The write queue is closed")
+        future: Future = Future()
+        try:
+            self.__queue.put((statement, values, future), timeout=self.timeout)
+        except Full:
+            raise Error(f"Write queue still full after {self.timeout}s")
+        return future
+
+    def flush(self) -> None:
+        "Waits until every write submitted so far is committed"
+        self.submit(None, []).result()
+
+    def close(self) -> None:
+        if self.__closed:
+            return
+        self.__closed = True
+        self.__queue.put(_STOP)
+        self.__thread.join()
+        # Writes that raced the close are answered instead of left waiting forever
+        while True:
+            try:
+                item = self.__queue.get_nowait()
+            except Empty:
+                break
+            if item is not _STOP:
+                item[2].set_exception(Error("The write queue is closed"))
+
+    @property
+    def pending(self) -> int:
+        return self.__queue.qsize()
+
+    def __run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self.__queue.get()
+            if item is _STOP:
+                break
+            group = [item]
+            deadline = monotonic() + self.interval
+            while len(group) < self.batch:
+                try:
+                    remaining = deadline - monotonic()
+                    if remaining > 0:
+                        item = self.__queue.get(timeout=remaining)
+                    else:
+                        item = self.__queue.get_nowait()
+                except Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                group.append(item)
+            try:
+                self.__commit(group)
+            except BaseException as e:
+                # Nobody waits on this thread, every caller must still get an answer
+                for _, _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
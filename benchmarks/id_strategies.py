@@ -0,0 +1,69 @@
+"""
+Compares insert throughput and on-disk size of the id strategies.
+
+    python benchmarks/id_strategies.py [rows]
+"""
+import logging
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from Knexpy import Field, Knex  # noqa: E402
+
+STRATEGIES = ["hex", "rowid", "uuid4", "uuid7", "ulid"]
+
+
+def index_size(db: Knex, table: str) -> float:
+    # dbstat is an optional SQLite module, fall back to the whole file
+    data = db.raw(
+        "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE ?",
+        [f"sqlite_autoindex_{table}%"],
+        json=False,
+    )
+    if data and data[0][0] != None:
+        return data[0][0]
+    return float("nan")
+
+
+def run(strategy: str, directory: str, rows: int) -> dict[str, float]:
+    path = os.path.join(directory, f"{strategy}.db")
+    db = Knex(path, profile="balanced", id_strategy=strategy)  # type: ignore
+    db.logger.setLevel(logging.WARNING)
+    db.table("bench", [Field.integer("value"), Field.varchar("label")])
+
+    start = perf_counter()
+    db.bulk_insert("bench", ({"value": i, "label": f"label {i}"} for i in range(rows)))
+    bulk = rows / (perf_counter() - start)
+
+    singles = max(rows // 20, 1)
+    start = perf_counter()
+    for i in range(singles):
+        db.insert("bench", ["value", "label"], [i, f"label {i}"])
+    single = singles / (perf_counter() - start)
+
+    db.raw("PRAGMA wal_checkpoint(TRUNCATE);")
+    size = index_size(db, "bench")
+    db.close()
+    return {
+        "bulk rows/s": bulk,
+        "insert rows/s": single,
+        "pk index KB": size / 1024,
+        "file KB": os.path.getsize(path) / 1024,
+    }
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as directory:
+        results = {_: run(_, directory, rows) for _ in STRATEGIES}
+    columns = list(next(iter(results.values())).keys())
+    print(f"{'strategy':<10}" + "".join(f"{_:>16}" for _ in columns))
+    for strategy, result in results.items():
+        print(f"{strategy:<10}" + "".join(f"{result[_]:>16,.0f}" for _ in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Compares the connection profiles on a fresh database per profile.
+
+    python benchmarks/pragma_profiles.py [rows]
+"""
+import logging
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from Knexpy import Field, Knex  # noqa: E402
+
+PROFILES = [None, "durable", "balanced", "bulk_load"]
+
+
+def run(profile: str | None, directory: str, rows: int) -> dict[str, float]:
+    db = Knex(os.path.join(directory, f"{profile}.db"), profile=profile)  # type: ignore
+    db.logger.setLevel(logging.WARNING)
+    db.table("bench", [Field.integer("value"), Field.varchar("label")])
+
+    start = perf_counter()
+    singles = max(rows // 100, 1)
+    for i in range(singles):
+        db.insert("bench", ["value", "label"], [i, f"label {i}"])
+    single = singles / (perf_counter() - start)
+
+    start = perf_counter()
+    db.bulk_insert("bench", ({"value": i, "label": f"label {i}"} for i in range(rows)))
+    bulk = rows / (perf_counter() - start)
+
+    start = perf_counter()
+    scanned = len(db.select().from_("bench").query(json=False))
+    scan = scanned / (perf_counter() - start)
+    db.close()
+    return {"commits/s": single, "bulk rows/s": bulk, "scan rows/s": scan}
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as directory:
+        results = {str(_): run(_, directory, rows) for _ in PROFILES}
+    columns = list(next(iter(results.values())).keys())
+    print(f"{'profile':<12}" + "".join(f"{_:>16}" for _ in columns))
+    for profile, result in results.items():
+        print(f"{profile:<12}" + "".join(f"{result[_]:>16,.0f}" for _ in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""
+Benchmarks the builder, insert and query hot paths, each next to a plain sqlite3
+baseline, on fresh databases for every dataset size.
+
+    python benchmarks/suite.py run [--sizes 1000 10000] [--repeat 5] [--output run.json]
+    python benchmarks/suite.py compare base.json run.json [--threshold 0.1]
+
+`compare` exits with status 1 when a case got slower than `threshold` (10% by default).
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+from itertools import count
+from statistics import median
+from time import perf_counter, time
+from typing import Any, Callable, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from Knexpy import Field, Knex  # noqa: E402
+from Knexpy.mappers import row_mapper  # noqa: E402
+from Knexpy.pragmas import PROFILES, apply_pragmas  # noqa: E402
+
+SIZES = [1000, 10000, 100000]
+# Both sides run on the same pragmas, so only the library overhead differs
+PROFILE = "balanced"
+# Every single row insert commits, they are capped to keep large sizes quick
+SINGLE_ROWS = 1000
+COLUMNS = ["value", "label", "score"]
+KEYS = ("id", *COLUMNS, "created_at", "modified_at")
+INSERT = (
+    "INSERT INTO bench(id, value, label, score, created_at, modified_at)"
+    " VALUES (?,?,?,?,?,?);"
+)
+
+# (directory, size) → (seconds, rows processed)
+Case = Callable[[str, int], tuple[float, int]]
+
+_files = count()
+
+
+def rows(size: int) -> list[dict[str, Any]]:
+    return [{"value": i, "label": f"label {i}", "score": i / 3} for i in range(size)]
+
+
+def tuples(size: int) -> list[tuple[Any, ...]]:
+    now = time()
+    return [(f"{i:032x}", i, f"label {i}", i / 3, now, now) for i in range(size)]
+
+
+def knex(directory: str, type_check: bool = False) -> Knex:
+    path = os.path.join(directory, f"{next(_files)}.db")
+    db = Knex(path, type_check=type_check, profile=PROFILE)
+    db.logger.setLevel(logging.WARNING)
+    db.table("bench", [Field.integer("value"), Field.text("label"), Field.float("score")])
+    return db
+
+
+def connection(db: Knex) -> sqlite3.Connection:
+    "Plain connection on the database of `db`, which is closed"
+    path = db.raw("PRAGMA database_list;", json=False)[0][2]  # type: ignore
+    db.close()
+    connection = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(connection, PROFILES[PROFILE])
+    return connection
+
+
+def timed(fn: Callable[[], Any]) -> float:
+    # Same as timeit, a collection would only add noise to a single run
+    gc.collect()
+    gc.disable()
+    try:
+        start = perf_counter()
+        fn()
+        return perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def builder_compile(directory: str, size: int) -> tuple[float, int]:
+    db = knex(directory)
+
+    def compose() -> None:
+        for i in range(size):
+            db.select("id", *COLUMNS).from_("bench").where("value", ">", i).where_in(
+                "label", ["a", "b", "c"]
+            ).order_by("value").limit(10)
+            db.to_string()
+            db.query_builder.reset()
+
+    seconds = timed(compose)
+    db.close()
+    return seconds, size
+
+
+def sqlite3_compile(directory: str, size: int) -> tuple[float, int]:
+    # Hand written SQL, the floor of any builder
+    def compose() -> None:
+        for i in range(size):
+            columns = ", ".join(["id", *COLUMNS])
+            f"SELECT {columns} FROM bench WHERE value > ? AND label IN (?, ?, ?) ORDER BY value ASC LIMIT 10;"  # noqa: E501
+
+    return timed(compose), size
+
+
+def knex_insert(directory: str, size: int) -> tuple[float, int]:
+    db = knex(directory)
+    data = [list(_.values()) for _ in rows(min(size, SINGLE_ROWS))]
+
+    def insert() -> None:
+        # `insert` extends the lists it is given with the id and timestamps
+        for values in data:
+            db.insert("bench", list(COLUMNS), values)
+
+    seconds = timed(insert)
+    db.close()
+    return seconds, len(data)
+
+
+def sqlite3_insert(directory: str, size: int) -> tuple[float, int]:
+    db = connection(knex(directory))
+    data = tuples(min(size, SINGLE_ROWS))
+
+    def insert() -> None:
+        for values in data:
+            db.execute("BEGIN")
+            db.execute(INSERT, values)
+            db.execute("COMMIT")
+
+    seconds = timed(insert)
+    db.close()
+    return seconds, len(data)
+
+
+def knex_insert_json(directory: str, size: int) -> tuple[float, int]:
+    db = knex(directory)
+    data = rows(size)
+    seconds = timed(lambda: db.insert_json("bench", data))
+    db.close()
+    return seconds, size
+
+
+def knex_insert_json_type_check(directory: str, size: int) -> tuple[float, int]:
+    db = knex(directory, type_check=True)
+    data = rows(size)
+    seconds = timed(lambda: db.insert_json("bench", data))
+    db.close()
+    return seconds, size
+
+
+def knex_insert_many(directory: str, size: int) -> tuple[float, int]:
+    db = knex(directory)
+    statements = [(INSERT, list(_)) for _ in tuples(size)]
+    seconds = timed(lambda: db.insert_many(statements))
+    db.close()
+    return seconds, size
+
+
+def sqlite3_executemany(directory: str, size: int) -> tuple[float, int]:
+    db = connection(knex(directory))
+    data = tuples(size)
+
+    def insert() -> None:
+        db.execute("BEGIN")
+        db.executemany(INSERT, data)
+        db.execute("COMMIT")
+
+    seconds = timed(insert)
+    db.close()
+    return seconds, size
+
+
+def populated(directory: str, size: int) -> Knex:
+    db = knex(directory)
+    db.bulk_insert("bench", rows(size))
+    return db
+
+
+def knex_query_json(directory: str, size: int) -> tuple[float, int]:
+    db = populated(directory, size)
+    seconds = timed(lambda: db.select().from_("bench").query(cache=False))
+    db.close()
+    return seconds, size
+
+
+def knex_query_tuples(directory: str, size: int) -> tuple[float, int]:
+    db = populated(directory, size)
+    seconds = timed(lambda: db.select().from_("bench").query(json=False, cache=False))
+    db.close()
+    return seconds, size
+
+
+def sqlite3_fetchall(directory: str, size: int) -> tuple[float, int]:
+    db = connection(populated(directory, size))
+    seconds = timed(lambda: db.execute("SELECT * FROM bench;").fetchall())
+    db.close()
+    return seconds, size
+
+
+def sqlite3_fetchall_dict(directory: str, size: int) -> tuple[float, int]:
+    db = connection(populated(directory, size))
+
+    def fetch() -> None:
+        cursor = db.execute("SELECT * FROM bench;")
+        keys = [_[0] for _ in cursor.description]
+        [dict(zip(keys, _)) for _ in cursor.fetchall()]
+
+    seconds = timed(fetch)
+    db.close()
+    return seconds, size
+
+
+def knex_to_json(directory: str, size: int) -> tuple[float, int]:
+    # What `query()` pays per row on top of fetching, timestamps included
+    data = tuples(size)
+    mapper = row_mapper(KEYS, "string")
+    return timed(lambda: list(map(mapper, data))), size
+
+
+def sqlite3_to_dict(directory: str, size: int) -> tuple[float, int]:
+    data = tuples(size)
+    return timed(lambda: [dict(zip(KEYS, _)) for _ in data]), size
+
+
+# name → (case, baseline it is compared against)
+CASES: dict[str, tuple[Case, Optional[str]]] = {
+    "sqlite3.compile": (sqlite3_compile, None),
+    "builder.compile": (builder_compile, "sqlite3.compile"),
+    "sqlite3.insert": (sqlite3_insert, None),
+    "knex.insert": (knex_insert, "sqlite3.insert"),
+    "sqlite3.executemany": (sqlite3_executemany, None),
+    "knex.insert_json": (knex_insert_json, "sqlite3.executemany"),
+    "knex.insert_json.type_check": (knex_insert_json_type_check, "knex.insert_json"),
+    "knex.insert_many": (knex_insert_many, "sqlite3.executemany"),
+    "sqlite3.fetchall": (sqlite3_fetchall, None),
+    "sqlite3.fetchall.dict": (sqlite3_fetchall_dict, None),
+    "knex.query.tuples": (knex_query_tuples, "sqlite3.fetchall"),
+    "knex.query.json": (knex_query_json, "sqlite3.fetchall.dict"),
+    "sqlite3.to_dict": (sqlite3_to_dict, None),
+    "knex.to_json": (knex_to_json, "sqlite3.to_dict"),
+}
+
+
+def run(
+    sizes: list[int], repeat: int, only: Optional[list[str]] = None
+) -> dict[str, Any]:
+    results: dict[str, dict[str, Any]] = {}
+    for name, (case, baseline) in CASES.items():
+        if only and not any(name.startswith(_) for _ in only):
+            continue
+        results[name] = {"baseline": baseline, "sizes": {}}
+        for size in sizes:
+            # A fresh directory per size, every repetition starts from an empty file
+            with tempfile.TemporaryDirectory() as directory:
+                runs = [case(directory, size) for _ in range(repeat)]
+            seconds = [_[0] for _ in runs]
+            processed = runs[0][1]
+            results[name]["sizes"][str(size)] = {
+                "rows": processed,
+                "median": median(seconds),
+                "min": min(seconds),
+                "rows/s": processed / median(seconds),
+            }
+            print(
+                f"{name:<28}{size:>9}{processed / median(seconds):>16,.0f} rows/s",
+                file=sys.stderr,
+            )
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "profile": PROFILE,
+            "repeat": repeat,
+            "time": time(),
+        },
+        "results": results,
+    }
+
+
+def report(data: dict[str, Any]) -> None:
+    "Throughput of every case and how far it is from its baseline"
+    results = data["results"]
+    print(f"{'case':<28}{'size':>9}{'rows/s':>16}{'vs baseline':>14}")
+    for name, result in results.items():
+        for size, measure in result["sizes"].items():
+            baseline = (
+                results.get(result["baseline"] or "", {}).get("sizes", {}).get(size)
+            )
+            ratio = f"{measure['median'] / baseline['median']:.2f}x" if baseline else ""
+            print(f"{name:<28}{size:>9}{measure['rows/s']:>16,.0f}{ratio:>14}")
+
+
+def compare(base: dict[str, Any], current: dict[str, Any], threshold: float) -> int:
+    "Lists every case measured by both runs, returns how many regressed"
+    for key in ["python", "sqlite", "platform"]:
+        if base["meta"].get(key) != current["meta"].get(key):
+            print(
+                f"warning: {key} differs ({base['meta'].get(key)} → {current['meta'].get(key)})",
+                file=sys.stderr,
+            )
+    regressions = 0
+    print(f"{'case':<28}{'size':>9}{'base':>12}{'current':>12}{'change':>10}")
+    for name, result in current["results"].items():
+        previous = base["results"].get(name)
+        if previous == None:
+            continue
+        for size, measure in result["sizes"].items():
+            before = previous["sizes"].get(size)
+            if before == None:
+                continue
+            # Times per row, the single insert cases may process fewer rows than size
+            old = before["median"] / before["rows"]
+            new = measure["median"] / measure["rows"]
+            change = new / old - 1
+            flag = ""
+            if change > threshold:
+                regressions += 1
+                flag = "  slower"
+            elif change < -threshold:
+                flag = "  faster"
+            print(
+                f"{name:<28}{size:>9}{old * 1e6:>10.2f}us{new * 1e6:>10.2f}us{change:>+10.1%}{flag}"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    commands = parser.add_subparsers(dest="command", required=True)
+    runner = commands.add_parser("run", help="Run the suite")
+    runner.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    runner.add_argument("--repeat", type=int, default=5)
+    runner.add_argument("--only", nargs="+", help="Case name prefixes to run")
+    runner.add_argument("--output", help="Write the results as JSON to this file")
+    comparer = commands.add_parser("compare", help="Compare two runs")
+    comparer.add_argument("base")
+    comparer.add_argument("current")
+    comparer.add_argument("--threshold", type=float, default=0.1)
+    arguments = parser.parse_args()
+
+    if arguments.command == "run":
+        data = run(arguments.sizes, arguments.repeat, arguments.only)
+        report(data)
+        if arguments.output:
+            with open(arguments.output, "w") as file:
+                json.dump(data, file, indent=2)
+        return
+
+    with open(arguments.base) as file:
+        base = json.load(file)
+    with open(arguments.current) as file:
+        current = json.load(file)
+    regressions = compare(base, current, arguments.threshold)
+    if regressions > 0:
+        print(f"{regressions} regression(s) above {arguments.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -77,3 +77,7 @@ db.insert_json(
         },
     ],
 )
+
+# Load every `c` row with its `t` children, 2 queries in total
+for row in db.select().from_("c").include("t").query():
+    print(row["field"], [child["field"] for child in row["t"]])
@@ -0,0 +1,30 @@
+import logging
+import sqlite3
+from typing import Iterator
+
+import pytest
+
+from Knexpy import Field, Knex
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "test.db")
+
+
+@pytest.fixture
+def db(path: str) -> Iterator[Knex]:
+    db = Knex(path)
+    db.logger.setLevel(logging.CRITICAL)
+    db.table("users", [Field.text("name"), Field.integer("age")])
+    yield db
+    db.close()
+
+
+def committed(path: str, table: str = "users") -> int:
+    "Rows a separate connection sees, only what was actually committed"
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0]
+    finally:
+        connection.close()
@@ -0,0 +1,34 @@
+import pytest
+
+
+@pytest.fixture
+def seeded(db):
+    db.bulk_insert("users", [{"name": n, "age": a} for n, a in [("a", 1), ("a", 3), ("b", 5)]])
+    return db
+
+
+def test_unaliased_builder_aggregates_get_stable_keys(seeded):
+    rows = seeded.select(seeded.sum("age"), seeded.max("age"), seeded.count()).from_("users").query()
+    assert rows == [{"sum_age": 9, "max_age": 5, "count": 3}]
+
+
+def test_aliased_aggregates_keep_the_alias(seeded):
+    rows = seeded.select(seeded.avg("age", "average")).from_("users").query()
+    assert rows == [{"average": 3.0}]
+
+
+def test_having_takes_unaliased_aggregates(seeded):
+    rows = (
+        seeded.select("name", seeded.sum("age"))
+        .from_("users")
+        .group_by("name")
+        .having(seeded.sum("age"), ">=", 4)
+        .order_by("name")
+        .query()
+    )
+    assert rows == [{"name": "a", "sum_age": 4}, {"name": "b", "sum_age": 5}]
+
+
+def test_raw_keeps_the_sqlite_column_names(seeded):
+    assert seeded.raw("SELECT MAX(age), SUM(age) FROM users") == [{"MAX(age)": 5, "SUM(age)": 9}]
+    assert seeded.select("MAX(age)").from_("users").query() == [{"MAX(age)": 5}]
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+
+from Knexpy import AsyncKnex, Field
+
+
+def run(path: str, work, **options):
+    "Runs `work(db)` on a fresh AsyncKnex inside its own event loop"
+
+    async def main():
+        async with AsyncKnex(path, **options) as db:
+            db.logger.setLevel(logging.CRITICAL)
+            return await work(db)
+
+    return asyncio.run(main())
+
+
+def test_connection_options_are_forwarded(path):
+    async def work(db):
+        await db.table("users", [Field.text("name")])
+        await db.select().from_("users").query()
+        return db.knex.pragmas["journal_mode"], db.knex.stats()
+
+    journal, stats = run(path, work, profile="balanced", instrument=True)
+    assert journal == "wal"
+    assert len(stats) > 0
+
+
+def test_table_options_are_forwarded(path):
+    async def work(db):
+        await db.table(
+            "events",
+            [Field.text("name")],
+            id_strategy="uuid7",
+            timestamp_storage="epoch_ms",
+        )
+        return db.knex.id_strategy("events"), db.knex.timestamp_storage("events")
+
+    assert run(path, work) == ("uuid7", "epoch_ms")
+
+
+def test_default_storage_is_forwarded(path):
+    async def work(db):
+        await db.table("events", [Field.text("name")])
+        return db.knex.timestamp_storage("events")
+
+    assert run(path, work, timestamp_storage="epoch_ms") == "epoch_ms"
+
+
+def test_chains_run_concurrently(path):
+    async def work(db):
+        await db.table("users", [Field.text("name"), Field.integer("age")])
+        await db.bulk_insert("users", [{"name": f"user {i}", "age": i} for i in range(10)])
+        # Every chain is captured before the next one starts composing
+        return await asyncio.gather(
+            *[db.select("age").from_("users").where("age", "=", i).query() for i in range(10)]
+        )
+
+    assert run(path, work) == [[{"age": i}] for i in range(10)]
+
+
+def test_writes_and_updates(path):
+    async def work(db):
+        await db.table("users", [Field.text("name"), Field.integer("age")])
+        assert await db.insert("users", ["name", "age"], ["a", 1])
+        assert await db.update("users", ["age"], [2]).where("name", "=", "a").execute()
+        return await db.select("name", "age").from_("users").query()
+
+    assert run(path, work) == [{"name": "a", "age": 2}]
+
+
+def test_stream_yields_every_row(path):
+    async def work(db):
+        await db.table("users", [Field.integer("age")])
+        await db.bulk_insert("users", [{"age": i} for i in range(7)])
+        return [row async for row in db.select("age").from_("users").order_by("age").stream(3)]
+
+    assert run(path, work) == [{"age": i} for i in range(7)]
+
+
+def test_transaction_rolls_back_when_it_raises(path):
+    def failing(knex):
+        knex.insert("users", ["age"], [1])
+        raise ValueError("failed")
+
+    async def work(db):
+        await db.table("users", [Field.integer("age")])
+        try:
+            await db.transaction(failing)
+        except ValueError:
+            pass
+        await db.transaction(lambda knex: knex.insert("users", ["age"], [2]))
+        return await db.raw("SELECT age FROM users")
+
+    assert run(path, work) == [{"age": 2}]
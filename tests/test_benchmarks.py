@@ -0,0 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+
+SUITE = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "suite.py")
+
+
+def suite(*arguments: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, SUITE, *arguments], capture_output=True, text=True, timeout=300
+    )
+
+
+def test_run_and_compare(tmp_path):
+    output = str(tmp_path / "run.json")
+    result = suite("run", "--sizes", "20", "--repeat", "1", "--output", output)
+    assert result.returncode == 0, result.stderr
+    with open(output) as file:
+        data = json.load(file)
+    assert data["results"]["knex.query.json"]["baseline"] == "sqlite3.fetchall.dict"
+    assert data["results"]["knex.query.json"]["sizes"]["20"]["rows"] == 20
+
+    assert suite("compare", output, output).returncode == 0
+
+    # Every case of the current run twice as slow as the base
+    for result in data["results"].values():
+        for measure in result["sizes"].values():
+            measure["median"] *= 2
+    slower = str(tmp_path / "slower.json")
+    with open(slower, "w") as file:
+        json.dump(data, file)
+    result = suite("compare", output, slower)
+    assert result.returncode == 1
+    assert "regression(s)" in result.stdout
@@ -0,0 +1,76 @@
+import pytest
+from conftest import committed
+
+
+def failing(count: int):
+    for i in range(count):
+        yield {"name": f"user {i}", "age": i}
+    raise ValueError("source failed")
+
+
+def test_bulk_insert(db, path):
+    report = db.bulk_insert("users", [{"name": "a", "age": 1}, {"name": "b", "age": 2}])
+    assert report and report["rows"] == 2
+    assert committed(path) == 2
+
+
+def test_bulk_insert_rolls_back_when_rows_raise(db, path):
+    with pytest.raises(ValueError):
+        db.bulk_insert("users", failing(3))
+    assert not db.db.in_transaction
+    assert not db.in_transaction
+    # Later writes commit on their own again
+    assert db.insert("users", ["name", "age"], ["c", 3])
+    assert committed(path) == 1
+
+
+def test_bulk_insert_rolls_back_on_bad_rows(db, path):
+    with pytest.raises(AttributeError):
+        db.bulk_insert("users", [{"name": "a", "age": 1}, ("b", 2)])  # type: ignore
+    assert not db.db.in_transaction
+    assert committed(path) == 0
+
+
+@pytest.fixture
+def seeded(db):
+    db.bulk_insert("users", [{"name": f"user {i}", "age": i} for i in range(3)])
+    return db
+
+
+def test_upsert_rolls_back_when_rows_raise(seeded, path):
+    with pytest.raises(ValueError):
+        seeded.upsert("users", failing(2))
+    assert not seeded.db.in_transaction
+    assert seeded.insert("users", ["name", "age"], ["d", 4])
+    assert committed(path) == 4
+
+
+def test_bulk_update_rolls_back_when_rows_raise(seeded, path):
+    before = seeded.select("id", "age").from_("users").query()
+
+    def rows():
+        yield {"id": before[0]["id"], "age": 100}
+        raise ValueError("source failed")
+
+    with pytest.raises(ValueError):
+        seeded.bulk_update("users", rows())
+    assert not seeded.db.in_transaction
+    assert seeded.select("id", "age").from_("users").query() == before
+
+
+def test_bulk_delete_rolls_back_when_keys_raise(seeded, path):
+    ids = [_["id"] for _ in seeded.select("id").from_("users").query()]
+
+    def keys():
+        yield ids[0]
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        seeded.bulk_delete("users", keys())
+    assert not seeded.db.in_transaction
+    assert committed(path) == 3
+
+
+def test_bulk_write_reports_sql_errors(seeded):
+    assert seeded.bulk_update("users", [{"id": "x", "missing": 1}]) is False
+    assert not seeded.db.in_transaction
@@ -0,0 +1,121 @@
+import logging
+
+import pytest
+
+from Knexpy import Field, Knex
+from Knexpy.cache import read_tables
+
+
+@pytest.fixture
+def cached(path):
+    db = Knex(path, cache=64)
+    db.logger.setLevel(logging.CRITICAL)
+    db.table("users", [Field.text("name"), Field.integer("age")])
+    yield db
+    db.close()
+
+
+def names(db) -> list[str]:
+    return [_["name"] for _ in db.select("name").from_("users").query()]
+
+
+def test_writes_outdate_cached_reads(cached):
+    assert names(cached) == []
+    cached.insert("users", ["name", "age"], ["a", 1])
+    assert names(cached) == ["a"]
+    assert names(cached) == ["a"]
+    assert cached.cache_stats()["hits"] == 1
+
+
+def test_manual_transaction_reads_are_not_cached(cached):
+    cached.begin()
+    cached.insert("users", ["name", "age"], ["a", 1])
+    assert names(cached) == ["a"]
+    cached.rollback()
+    assert names(cached) == []
+    assert cached.raw("SELECT name FROM users;") == {}
+
+
+def test_rollback_outdates_entries_of_written_tables(cached):
+    assert names(cached) == []
+    with pytest.raises(RuntimeError):
+        with cached.transaction():
+            cached.insert("users", ["name", "age"], ["a", 1])
+            assert names(cached) == ["a"]
+            raise RuntimeError
+    assert names(cached) == []
+
+
+def test_commit_outdates_entries_of_written_tables(cached):
+    assert names(cached) == []
+    with cached.transaction():
+        cached.insert("users", ["name", "age"], ["a", 1])
+    assert names(cached) == ["a"]
+
+
+def test_failed_write_keeps_the_cache_consistent(cached):
+    cached.insert("users", ["name", "age"], ["a", 1])
+    assert names(cached) == ["a"]
+    assert cached.insert("users", ["name", "missing"], ["b", 2]) is False
+    assert names(cached) == ["a"]
+
+
+@pytest.fixture
+def joined(cached):
+    cached.table("posts", ["title"])
+    cached.insert("users", ["name", "age"], ["a", 1])
+    cached.insert("posts", ["title"], ["first"])
+    return cached
+
+
+def test_comma_joins_are_outdated_by_writes_to_any_table(joined):
+    def pairs():
+        return joined.select("name", "title").from_("users").from_("posts").query()
+
+    assert len(pairs()) == 1
+    joined.insert("posts", ["title"], ["second"])
+    assert len(pairs()) == 2
+
+
+def test_joins_are_outdated_by_writes_to_the_joined_table(joined):
+    def pairs():
+        return (
+            joined.select("name", "title")
+            .from_("users")
+            .join("posts", "1 = 1", "CROSS")
+            .query()
+        )
+
+    assert len(pairs()) == 1
+    joined.insert("posts", ["title"], ["second"])
+    assert len(pairs()) == 2
+
+
+def test_read_tables():
+    assert read_tables("SELECT * FROM a, b;") == {"a", "b"}
+    assert read_tables("SELECT * FROM main.a x, b AS y WHERE x.id = y.id;") == {"a", "b"}
+    assert read_tables("SELECT * FROM a INNER JOIN b ON a.id = b.id;") == {"a", "b"}
+    assert read_tables(
+        "SELECT * FROM a WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id;"
+    ) == {"a"}
+    assert read_tables("SELECT * FROM a WHERE id IN (SELECT id FROM b);") == {"a", "b"}
+    # Sources that aren't plain tables can't be traced, they are never cached
+    assert read_tables("SELECT * FROM (SELECT * FROM a);") == None
+
+
+@pytest.mark.parametrize("format", ["dicts", "rows"])
+def test_timestamps_format_is_part_of_the_key(cached, format):
+    cached.insert("users", ["name", "age"], ["a", 1])
+    first = cached.select("created_at").from_("users").query(format=format)[0]
+    assert type(first["created_at"]) == str
+    cached.timestamps = "epoch"
+    second = cached.select("created_at").from_("users").query(format=format)[0]
+    assert type(second["created_at"]) == float
+
+
+def test_result_shape_is_part_of_the_key(cached):
+    cached.insert("users", ["name", "age"], ["a", 1])
+    assert cached.select("name").from_("users").query() == [{"name": "a"}]
+    assert cached.select("name").from_("users").query(json=False) == [("a",)]
+    rows = cached.select("name").from_("users").query(format="rows")
+    assert rows[0].name == "a"
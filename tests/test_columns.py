@@ -0,0 +1,57 @@
+import sqlite3
+from array import array
+
+import pytest
+
+from Knexpy import Field
+
+
+@pytest.fixture
+def seeded(db):
+    db.table("scores", [Field.integer("score", {"null": True}), Field.float("ratio")])
+    db.bulk_insert("users", [{"name": f"user {i}", "age": i} for i in range(5)])
+    return db
+
+
+def test_typed_columns(seeded):
+    data = seeded.select("name", "age").from_("users").order_by("age").query(
+        format="columns", size=2
+    )
+    assert data == {
+        "name": [f"user {i}" for i in range(5)],
+        "age": array("q", range(5)),
+    }
+    assert type(data["age"]) == array
+
+
+def test_matches_the_row_formats(seeded):
+    rows = seeded.select().from_("users").query(format="tuples")
+    data = seeded.select().from_("users").query(format="columns")
+    assert list(data.keys()) == ["id", "name", "age", "created_at", "modified_at"]
+    assert list(zip(*data.values())) == rows
+
+
+def test_nulls_fall_back_to_lists(seeded):
+    seeded.bulk_insert("scores", [{"score": 1, "ratio": 0.5}, {"score": None, "ratio": 1}])
+    data = seeded.select("score", "ratio").from_("scores").query(format="columns", size=1)
+    assert data["score"] == [1, None]
+    assert data["ratio"] == array("d", [0.5, 1.0])
+
+
+def test_empty_result(seeded):
+    data = seeded.select("age").from_("users").where("age", ">", 10).query(format="columns")
+    assert data == {"age": array("q")}
+
+
+def test_columns_cannot_be_streamed(seeded):
+    with pytest.raises(sqlite3.Error):
+        seeded.select().from_("users").query(format="columns", stream=True)
+    assert seeded.select("age").from_("users").where("age", "=", 1).query() == [{"age": 1}]
+
+
+def test_numpy(seeded):
+    numpy = pytest.importorskip("numpy")
+    data = seeded.select("name", "age").from_("users").query(format="numpy")
+    assert data["age"].dtype == numpy.int64
+    assert data["age"].sum() == 10
+    assert data["name"].dtype == object
@@ -0,0 +1,86 @@
+import logging
+import sqlite3
+
+import pytest
+
+from Knexpy import Field, Knex
+from Knexpy.ids import infer_strategy, uuid7_id
+
+
+def connect(path, **options) -> Knex:
+    db = Knex(path, **options)
+    db.logger.setLevel(logging.CRITICAL)
+    return db
+
+
+@pytest.mark.parametrize(
+    "strategy, kind",
+    [("hex", str), ("rowid", int), ("uuid4", bytes), ("uuid7", bytes), ("ulid", bytes)],
+)
+def test_generated_ids(path, strategy, kind):
+    db = connect(path, id_strategy=strategy)
+    db.table("users", [Field.text("name")])
+    db.insert("users", ["name"], ["a"])
+    db.bulk_insert("users", [{"name": "b"}, {"name": "c"}])
+    ids = [row["id"] for row in db.select("id").from_("users").query()]
+    assert len(set(ids)) == 3
+    assert all(type(_) == kind for _ in ids)
+    db.close()
+
+
+def test_time_ordered_ids_sort_by_creation():
+    ids = [uuid7_id() for _ in range(100)]
+    assert [_[:6] for _ in ids] == sorted(_[:6] for _ in ids)
+    assert all(_[6] >> 4 == 7 for _ in ids)
+
+
+def test_manual_and_callable_strategies(path):
+    counter = iter(range(100, 200))
+    db = connect(path, id_strategy="manual")
+    db.table("users", [Field.text("name")])
+    db.table("posts", [Field.text("title")], id_strategy=lambda: next(counter))
+    db.insert("users", ["id", "name"], ["me", "a"])
+    db.insert("posts", ["title"], ["b"])
+    assert db.select("id").from_("users").query() == [{"id": "me"}]
+    assert db.select("id").from_("posts").query() == [{"id": 100}]
+    db.close()
+
+
+def test_existing_tables_are_inferred(path):
+    db = connect(path, id_strategy="rowid")
+    db.table("users", [Field.text("name")])
+    db.close()
+    db = connect(path)
+    assert db.id_strategy("users") == "rowid"
+    db.close()
+
+
+def test_explicit_strategy_is_kept_on_existing_tables(path):
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE users (id TEXT PRIMARY KEY, name TEXT)")
+    connection.close()
+    db = connect(path, id_strategy="manual")
+    assert db.id_strategy("users") == "manual"
+    db.close()
+
+
+def test_conflicting_strategy_raises(path):
+    db = connect(path)
+    db.table("users", [Field.text("name")])
+    with pytest.raises(sqlite3.Error):
+        db.table("users", [Field.text("name")], id_strategy="rowid")
+    db.close()
+    db = connect(path, id_strategy="uuid7")
+    with pytest.raises(sqlite3.Error):
+        db.insert("users", ["name"], ["a"])
+    db.close()
+
+
+def test_infer_strategy():
+    assert infer_strategy("INTEGER") == "rowid"
+    assert infer_strategy("blob") == "uuid7"
+    assert infer_strategy("varchar(255)") == "hex"
+    assert infer_strategy("varchar(255)", "manual") == "manual"
+    assert infer_strategy("blob", "ulid") == "ulid"
+    with pytest.raises(sqlite3.Error):
+        infer_strategy("INTEGER", "uuid4")
@@ -0,0 +1,54 @@
+from Knexpy import Field
+
+
+def indexes(db, table: str) -> dict[str, str]:
+    rows = db.raw(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ?",
+        [table],
+    )
+    return {row["name"]: row["sql"] for row in rows if row["sql"]}
+
+
+def plan(db, sql: str, params: list) -> str:
+    return " ".join(row[3] for row in db.raw(f"EXPLAIN QUERY PLAN {sql}", params, False))
+
+
+def test_table_indexes_fields_and_foreign_keys(db):
+    db.table(
+        "posts",
+        [
+            Field.text("title", {"index": True}),
+            Field.foreign_key("user_id", "users", "id"),
+            Field.text("body"),
+        ],
+        index_timestamps=True,
+    )
+    assert sorted(indexes(db, "posts")) == [
+        "ix_posts_created_at",
+        "ix_posts_modified_at",
+        "ix_posts_title",
+        "ix_posts_user_id",
+    ]
+    assert "ix_posts_user_id" in plan(db, "SELECT * FROM posts WHERE user_id = ?", ["x"])
+
+
+def test_composite_unique_and_partial_indexes(db):
+    assert db.index("users", ["name", "age"])
+    assert db.index("users", "age", unique=True, where="age > 100", name="adults")
+    created = indexes(db, "users")
+    assert "ix_users_name_age" in created
+    assert created["adults"].startswith("CREATE UNIQUE INDEX")
+    assert "WHERE age > 100" in created["adults"]
+    assert "ix_users_name_age" in plan(
+        db, "SELECT * FROM users WHERE name = ? AND age = ?", ["a", 1]
+    )
+
+
+def test_index_is_only_created_once(db):
+    assert db.index("users", "age")
+    assert db.index("users", "age")
+    assert list(indexes(db, "users")) == ["ix_users_age"]
+
+
+def test_index_on_a_missing_column(db):
+    assert db.index("users", "missing") is False
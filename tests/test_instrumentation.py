@@ -0,0 +1,53 @@
+import logging
+
+from Knexpy import Field, Knex
+from Knexpy.instrumentation import normalize
+
+
+def test_disabled_by_default(db):
+    db.select().from_("users").query()
+    assert db.stats() == {}
+
+
+def test_hooks_see_every_statement(db):
+    before, after = [], []
+    db.on("before", lambda event: before.append(dict(event)))
+    db.on("after", lambda event: after.append(dict(event)))
+    db.insert("users", ["name", "age"], ["a", 1])
+    db.select().from_("users").where("age", "=", 1).query(cache=False)
+    assert len(before) == len(after) == 2
+    assert before[1]["rows"] == -1 and before[1]["seconds"] == 0.0
+    insert, select = after
+    assert insert["sql"].startswith("INSERT INTO users") and insert["rows"] == 1
+    assert select["sql"].startswith("SELECT * FROM users WHERE age = ?")
+    assert select["binds"] == 1 and select["rows"] == 1
+    assert select["seconds"] > 0
+
+
+def test_stats_share_an_entry_per_query_shape(path):
+    db = Knex(path, instrument=True)
+    db.logger.setLevel(logging.CRITICAL)
+    db.table("users", [Field.integer("age")])
+    for i in range(3):
+        db.raw(f"SELECT * FROM users WHERE age = {i}")
+    stats = db.stats(reset=True)
+    entry = stats["SELECT * FROM users WHERE age = ?"]
+    assert entry["count"] == 3
+    assert entry["p50"] <= entry["p99"] <= entry["max"]
+    assert db.stats() == {}
+    db.close()
+
+
+def test_slow_queries_are_logged(path, caplog):
+    db = Knex(path, slow_query=0)
+    db.table("users", [Field.integer("age")])
+    with caplog.at_level(logging.WARNING):
+        db.select().from_("users").query()
+    assert any("Slow query" in _.getMessage() for _ in caplog.records)
+    db.close()
+
+
+def test_normalize():
+    assert normalize("SELECT * FROM t WHERE a = 'x' AND b IN (?, ?, ?)  LIMIT 10 ;") == (
+        "SELECT * FROM t WHERE a = ? AND b IN (?) LIMIT ?;"
+    )
@@ -0,0 +1,49 @@
+import logging
+from datetime import datetime
+
+import pytest
+
+from Knexpy import Field, Knex
+from Knexpy.mappers import row_mapper
+
+
+@pytest.fixture
+def seeded(db):
+    db.bulk_insert("users", [{"name": f"user {i}", "age": i} for i in range(3)])
+    return db
+
+
+def test_rows_are_keyed_by_column(seeded):
+    rows = seeded.select("name", "age").from_("users").order_by("age").query()
+    assert rows == [{"name": f"user {i}", "age": i} for i in range(3)]
+    assert seeded.select("name").from_("users").order_by("age").query(json=False) == [
+        (f"user {i}",) for i in range(3)
+    ]
+
+
+def test_query_raw_and_stream_agree(seeded):
+    rows = seeded.select().from_("users").order_by("age").query()
+    assert seeded.raw("SELECT * FROM users ORDER BY age") == rows
+    assert list(seeded.select().from_("users").order_by("age").stream(2)) == rows
+
+
+def test_mappers_are_compiled_once_per_shape():
+    mapper = row_mapper(("id", "name"))
+    assert row_mapper(("id", "name")) is mapper
+    assert row_mapper(("id", "name"), "epoch") is not mapper
+    assert mapper((1, "a")) == {"id": 1, "name": "a"}
+
+
+@pytest.mark.parametrize(
+    "format, kind", [("string", str), ("datetime", datetime), ("epoch", float)]
+)
+def test_timestamps_are_converted(path, format, kind):
+    db = Knex(path, timestamps=format)
+    db.logger.setLevel(logging.CRITICAL)
+    db.table("users", [Field.text("name")])
+    db.insert("users", ["name"], ["a"])
+    for row in [db.select().from_("users").query()[0], db.raw("SELECT * FROM users")[0]]:
+        assert type(row["created_at"]) == kind
+        assert type(row["modified_at"]) == kind
+    assert type(db.select("name").from_("users").query()[0]["name"]) == str
+    db.close()
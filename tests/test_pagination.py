@@ -0,0 +1,91 @@
+from sqlite3 import Error
+
+import pytest
+
+from Knexpy import Field
+
+
+@pytest.fixture
+def people(db):
+    # Ages repeat, so pages break ties on the id
+    db.bulk_insert("users", [{"name": f"user {i:02}", "age": i % 7} for i in range(50)])
+    return db
+
+
+def pages(db, size: int, order=None, direction="ASC") -> list[list[dict]]:
+    result = []
+    after = None
+    while True:
+        db.select().from_("users")
+        if order:
+            db.order_by(order, direction)
+        page = db.paginate(size, after=after)
+        result.append(page["rows"])
+        after = page["next"]
+        if after == None:
+            return result
+
+
+def test_pages_follow_the_key(people):
+    result = pages(people, 20)
+    assert [len(_) for _ in result] == [20, 20, 10]
+    ids = [row["id"] for page in result for row in page]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 50
+
+
+def ordered(db, reverse: bool = False) -> list[str]:
+    rows = db.select().from_("users").query()
+    rows.sort(key=lambda _: (_["age"], _["id"]), reverse=reverse)
+    return [_["id"] for _ in rows]
+
+
+def test_multi_column_seek(people):
+    rows = [row for page in pages(people, 8, "age") for row in page]
+    assert [_["id"] for _ in rows] == ordered(people)
+
+
+def test_descending_order(people):
+    rows = [row for page in pages(people, 8, "age", "DESC") for row in page]
+    assert [_["id"] for _ in rows] == ordered(people, reverse=True)
+
+
+def test_last_page(people):
+    result = pages(people, 25)
+    # An exactly full last page still ends the pagination
+    assert [len(_) for _ in result] == [25, 25]
+    page = people.select().from_("users").paginate(100)
+    assert len(page["rows"]) == 50 and page["next"] == None
+
+
+def test_empty_table(db):
+    assert db.select().from_("users").paginate(10) == {"rows": [], "next": None}
+
+
+@pytest.fixture
+def scores(db):
+    db.table("scores", [Field.integer("score", {"null": True})])
+    return db
+
+
+def test_null_seek_values_raise(scores):
+    scores.bulk_insert("scores", [{"score": None} for _ in range(5)])
+    with pytest.raises(Error):
+        scores.select().from_("scores").order_by("score").paginate(2)
+    # The chain was released, the instance is still usable
+    assert len(scores.select().from_("scores").query()) == 5
+
+
+def test_null_values_before_the_last_row_are_paged(scores):
+    scores.bulk_insert("scores", [{"score": None}, {"score": 1}, {"score": 2}])
+    page = scores.select().from_("scores").order_by("score").paginate(2)
+    assert [_["score"] for _ in page["rows"]] == [None, 1]
+    last = scores.select().from_("scores").order_by("score").paginate(2, page["next"])
+    assert [_["score"] for _ in last["rows"]] == [2]
+
+
+def test_invalid_cursor(people):
+    with pytest.raises(Error):
+        people.select().from_("users").paginate(10, after="not a cursor")
+    with pytest.raises(Error):
+        people.select().from_("users").order_by("age").paginate(10, after="WzFd")
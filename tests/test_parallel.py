@@ -0,0 +1,103 @@
+import operator
+from sqlite3 import Error
+
+import pytest
+
+from Knexpy import Field
+
+
+def count(rows: list) -> int:
+    return len(rows)
+
+
+@pytest.fixture
+def numbers(db):
+    db.table("numbers", [Field.integer("n"), Field.integer("maybe", {"null": True})])
+    db.bulk_insert(
+        "numbers", [{"n": (i * 37) % 100, "maybe": i if i % 3 else None} for i in range(100)]
+    )
+    return db
+
+
+def test_plain_scan_matches_a_query(numbers):
+    serial = numbers.select("n").from_("numbers").query()
+    parallel = list(numbers.parallel_query(numbers.select("n").from_("numbers")))
+    # Without an ORDER BY rows come in rowid order, same as a plain scan
+    assert parallel == serial
+
+
+def test_unordered_scan_returns_every_row(numbers):
+    serial = numbers.select("n").from_("numbers").query(json=False)
+    parallel = numbers.parallel_query(
+        numbers.select("n").from_("numbers"), json=False, ordered=False
+    )
+    assert sorted(parallel) == sorted(serial)
+
+
+@pytest.mark.parametrize("direction", ["ASC", "DESC"])
+def test_ordered_merge_matches_a_query(numbers, direction):
+    serial = numbers.select("n").from_("numbers").order_by("n", direction).query()
+    chain = numbers.select("n").from_("numbers").order_by("n", direction)
+    parallel = list(numbers.parallel_query(chain, workers=3, partitions=7))
+    assert parallel == serial
+
+
+def test_filtered_scan_matches_a_query(numbers):
+    serial = numbers.select("n").from_("numbers").where("n", "<", 50).query()
+    chain = numbers.select("n").from_("numbers").where("n", "<", 50)
+    assert list(numbers.parallel_query(chain)) == serial
+
+
+def test_map_reduce_matches_a_query(numbers):
+    total = numbers.parallel_query(
+        numbers.select("n").from_("numbers"), mapper=count, reducer=operator.add
+    )
+    assert total == 100
+    parts = numbers.parallel_query(
+        numbers.select("n").from_("numbers"), mapper=count, partitions=4
+    )
+    assert len(parts) == 4 and sum(parts) == 100
+
+
+def test_partition_on_a_column(numbers):
+    serial = numbers.select("n").from_("numbers").query(json=False)
+    parallel = numbers.parallel_query(
+        numbers.select("n").from_("numbers"), json=False, key="n", ordered=False
+    )
+    assert sorted(parallel) == sorted(serial)
+
+
+def test_nullable_keys_raise(numbers):
+    with pytest.raises(Error):
+        numbers.parallel_query(numbers.select().from_("numbers"), key="maybe")
+
+
+def test_empty_table(db):
+    assert list(db.parallel_query(db.select().from_("users"))) == []
+
+
+def test_unsplittable_queries_raise(numbers):
+    with pytest.raises(Error):
+        numbers.parallel_query(numbers.select().from_("numbers").limit(5))
+    # The chain was released either way
+    assert numbers.select("n").from_("numbers").to_string() == "SELECT n FROM numbers;"
+    numbers.query_builder.reset()
+
+
+def test_inside_a_transaction_raises(numbers):
+    with numbers.transaction():
+        with pytest.raises(Error):
+            numbers.parallel_query(numbers.select().from_("numbers"))
+
+
+def test_processes_match_a_query(numbers):
+    serial = numbers.select("n").from_("numbers").order_by("n").query(format="rows")
+    chain = numbers.select("n").from_("numbers").order_by("n")
+    assert list(numbers.parallel_query(chain, format="rows", processes=True)) == serial
+    total = numbers.parallel_query(
+        numbers.select("n").from_("numbers"),
+        processes=True,
+        mapper=count,
+        reducer=operator.add,
+    )
+    assert total == 100
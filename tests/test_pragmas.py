@@ -0,0 +1,64 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from Knexpy import Knex
+
+
+def connect(path, **options) -> Knex:
+    db = Knex(path, **options)
+    db.logger.setLevel(logging.CRITICAL)
+    return db
+
+
+@pytest.mark.parametrize(
+    "profile, synchronous, cache_size",
+    [("durable", 2, -16000), ("balanced", 1, -64000), ("bulk_load", 0, -262144)],
+)
+def test_profiles_are_applied(path, profile, synchronous, cache_size):
+    db = connect(path, profile=profile)
+    pragmas = db.pragmas
+    assert pragmas["journal_mode"] == "wal"
+    assert pragmas["synchronous"] == synchronous
+    assert pragmas["cache_size"] == cache_size
+    assert pragmas["busy_timeout"] == 5000
+    db.close()
+
+
+def test_pragmas_override_the_profile(path):
+    db = connect(path, profile="balanced", pragmas={"synchronous": "FULL"})
+    assert db.pragmas["synchronous"] == 2
+    assert db.pragmas["mmap_size"] == 268435456
+    db.close()
+
+
+def test_no_profile_keeps_the_sqlite_defaults(path):
+    db = connect(path)
+    assert db.pragmas["journal_mode"] == "delete"
+    db.close()
+
+
+def test_unknown_profile(path):
+    with pytest.raises(Exception, match="Unknown profile"):
+        Knex(path, profile="fast")  # type: ignore
+
+
+def test_readers_of_other_threads_are_configured(path):
+    db = connect(path, threaded=True, profile="bulk_load")
+    with ThreadPoolExecutor(1) as pool:
+        assert pool.submit(db.raw, "PRAGMA cache_size").result() == [
+            {"cache_size": -262144}
+        ]
+    db.close()
+
+
+def test_use_profile_restores_the_previous_settings(path):
+    db = connect(path, threaded=True, profile="balanced")
+    with db.use_profile("bulk_load"):
+        assert db.pragmas["synchronous"] == 0
+        with ThreadPoolExecutor(1) as pool:
+            rows = pool.submit(db.raw, "PRAGMA synchronous").result()
+        assert rows == [{"synchronous": 0}]
+    assert db.pragmas["synchronous"] == 1
+    db.close()
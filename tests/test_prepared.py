@@ -0,0 +1,93 @@
+import pytest
+
+from Knexpy import Param
+
+TABLES = ["users", "posts"]
+table = TABLES[0]
+
+
+@pytest.fixture
+def posts(db):
+    db.table("posts", ["title"])
+    return db
+
+
+def test_function_statements_are_reused(db):
+    def chain(d):
+        return d.select().from_("users").where("name", "=", Param("name"))
+
+    assert db.prepare(chain) is db.prepare(chain)
+
+
+def test_closures_only_share_statements_with_the_same_values(posts):
+    statements = [posts.prepare(lambda d: d.select().from_(t)) for t in TABLES]
+    assert [_.sql for _ in statements] == [f"SELECT * FROM {t};" for t in TABLES]
+
+
+def test_globals_are_part_of_the_key(posts):
+    global table
+    sql = []
+    for table in TABLES:
+        sql.append(posts.prepare(lambda d: d.select().from_(table)).sql)
+    assert sql == [f"SELECT * FROM {t};" for t in TABLES]
+
+
+def test_unhashable_values_are_compiled_every_time(db):
+    def by(names):
+        return db.prepare(lambda d: d.select().from_("users").where_in("name", names))
+
+    assert by(["a"]).sql.count("?") == 1
+    assert by(["a", "b"]).sql.count("?") == 2
+
+
+def test_failing_chain_releases_the_builder(db):
+    def chain(d):
+        d.select().from_("users")
+        raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        db.prepare(chain)
+    assert db.select("age").from_("users").to_string() == "SELECT age FROM users;"
+
+
+def test_missing_parameter(db):
+    prepared = db.prepare(db.select().from_("users").where("name", "=", Param("name")))
+    with pytest.raises(Exception):
+        prepared.run()
+
+
+def test_prepare_a_builder(db):
+    db.insert("users", ["name", "age"], ["a", 1])
+    db.insert("users", ["name", "age"], ["b", 2])
+    builder = db.subquery().select("name").from_("users").where("age", "=", Param("age"))
+    prepared = db.prepare(builder)
+    assert prepared.run(age=2) == [{"name": "b"}]
+    assert builder.to_string() == ";"
+
+
+def test_prepare_an_unpreparable_builder(db):
+    with pytest.raises(Exception):
+        db.prepare(db.subquery())
+    assert db.select("age").from_("users").to_string() == "SELECT age FROM users;"
+
+
+def test_updates_bind_concrete_values(db):
+    db.update("users", ["name"], ["b"]).where("name", "=", "a")
+    values = db.query_builder.values
+    assert not any(isinstance(_, Param) for _ in values)
+    assert type(values[1]) == float
+    assert "Param" not in repr(db)
+    db.query_builder.reset()
+
+
+def test_prepared_updates_refresh_modified_at(db):
+    db.insert("users", ["name", "age"], ["a", 1])
+    rename = db.prepare(
+        lambda d: d.update("users", ["name"], [Param("name")]).where("age", "=", 1)
+    )
+    assert rename.names == ("name",)
+    rename.run(name="b")
+    first = db.select("modified_at").from_("users").query(json=False)[0][0]
+    rename.run(name="c")
+    second = db.select("modified_at").from_("users").query(json=False)[0][0]
+    assert second > first
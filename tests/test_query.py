@@ -0,0 +1,36 @@
+from sqlite3 import Error
+
+import pytest
+
+
+@pytest.fixture
+def posts(db):
+    db.table("posts", ["title"])
+    return db
+
+
+def test_invalid_stream_size_releases_the_chain(posts):
+    with pytest.raises(Error):
+        posts.select("name").from_("users").query(stream=True, size=0)
+    assert posts.select("title").from_("posts").to_string() == "SELECT title FROM posts;"
+
+
+def test_invalid_stream_call_releases_the_chain(posts):
+    with pytest.raises(Error):
+        posts.select("name").from_("users").stream(size=0)
+    assert posts.select("title").from_("posts").to_string() == "SELECT title FROM posts;"
+
+
+def test_unknown_format_releases_the_chain(posts):
+    with pytest.raises(Error):
+        posts.select("name").from_("users").query(format="xml")  # type: ignore
+    assert posts.select("title").from_("posts").to_string() == "SELECT title FROM posts;"
+
+
+def test_stream_closes_early(posts):
+    for i in range(5):
+        posts.insert("users", ["name", "age"], [f"user {i}", i])
+    rows = posts.select().from_("users").stream(size=2)
+    assert next(rows)["name"] == "user 0"
+    rows.close()
+    assert len(posts.select().from_("users").query()) == 5
@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+from Knexpy import Field
+
+
+@pytest.fixture
+def blog(db):
+    db.table("posts", [Field.text("title"), Field.foreign_key("author", "users", "id")])
+    db.bulk_insert("users", [{"name": name, "age": 30} for name in ["ann", "bob", "cid"]])
+    authors = {_["name"]: _["id"] for _ in db.select("id", "name").from_("users").query()}
+    db.bulk_insert(
+        "posts",
+        [
+            {"title": "a1", "author": authors["ann"]},
+            {"title": "a2", "author": authors["ann"]},
+            {"title": "b1", "author": authors["bob"]},
+        ],
+    )
+    return db
+
+
+def statements(db) -> list[str]:
+    executed: list[str] = []
+    db.on("after", lambda event: executed.append(event["sql"]))
+    return executed
+
+
+def test_inner_and_left_joins(blog):
+    rows = (
+        blog.select("p.title", ["u.name", "author_name"])
+        .from_(["posts", "p"])
+        .join(["users", "u"], ["p.author", "u.id"])
+        .order_by("p.title")
+        .query()
+    )
+    assert [(_["title"], _["author_name"]) for _ in rows] == [
+        ("a1", "ann"),
+        ("a2", "ann"),
+        ("b1", "bob"),
+    ]
+    rows = (
+        blog.select("users.name", "posts.title")
+        .from_("users")
+        .left_join("posts", "posts.author = users.id")
+        .where("users.name", "=", "cid")
+        .query()
+    )
+    assert rows == [{"name": "cid", "title": None}]
+
+
+def test_include_children_in_one_query(blog):
+    executed = statements(blog)
+    rows = blog.select().from_("users").order_by("name").include("posts").query(cache=False)
+    assert len(executed) == 2
+    assert [[post["title"] for post in _["posts"]] for _ in rows] == [["a1", "a2"], ["b1"], []]
+
+
+def test_include_parent(blog):
+    rows = blog.select().from_("posts").order_by("title").include("users").query()
+    assert [_["users"]["name"] for _ in rows] == ["ann", "ann", "bob"]
+
+
+def test_include_on_streams_and_pages(blog):
+    rows = list(blog.select().from_("posts").order_by("title").include("users").stream(2))
+    assert [_["users"]["name"] for _ in rows] == ["ann", "ann", "bob"]
+    page = blog.select().from_("users").include("posts").paginate(2)
+    assert all("posts" in _ for _ in page["rows"])
+
+
+def test_include_needs_json(blog):
+    with pytest.raises(sqlite3.Error):
+        blog.select().from_("users").include("posts").query(json=False)
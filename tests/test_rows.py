@@ -0,0 +1,71 @@
+import logging
+import pickle
+import sys
+from datetime import datetime
+
+import pytest
+
+from Knexpy import Field, Knex, Row
+
+
+@pytest.fixture
+def seeded(db):
+    db.bulk_insert("users", [{"name": f"user {i}", "age": i} for i in range(3)])
+    return db
+
+
+def test_rows_read_by_position_name_and_attribute(seeded):
+    rows = seeded.select("name", "age").from_("users").order_by("age").query(format="rows")
+    row = rows[1]
+    assert isinstance(row, Row) and isinstance(row, tuple)
+    assert row == ("user 1", 1)
+    assert row[0] == row["name"] == row.name == "user 1"
+    assert row.keys() == ("name", "age")
+    assert dict(row.items()) == row.to_dict() == {"name": "user 1", "age": 1}
+    assert row.get("missing", 0) == 0
+    with pytest.raises(KeyError):
+        row["missing"]
+    with pytest.raises(AttributeError):
+        row.missing
+
+
+def test_rows_match_the_json_rows(seeded):
+    def chain():
+        return seeded.select().from_("users").order_by("age")
+
+    rows = chain().query(format="rows")
+    assert [_.to_dict() for _ in rows] == chain().query()
+    assert list(chain().query(stream=True, size=2, format="rows")) == rows
+
+
+def test_rows_share_their_class(seeded):
+    rows = seeded.select("name", "age").from_("users").query(format="rows")
+    assert len({type(_) for _ in rows}) == 1
+    assert not hasattr(rows[0], "__dict__")
+    assert sys.getsizeof(rows[0]) < sys.getsizeof(rows[0].to_dict())
+
+
+def test_method_names_stay_methods(db):
+    db.raw("CREATE TABLE t (keys TEXT, count INTEGER)")
+    db.raw("INSERT INTO t VALUES ('a', 2)")
+    row = db.select().from_("t").query(format="rows")[0]
+    assert row.keys() == ("keys", "count")
+    assert row["keys"] == "a"
+    assert row.count == 2
+
+
+def test_non_identifier_columns_are_read_by_key(seeded):
+    row = seeded.select("MAX(age)").from_("users").query(format="rows")[0]
+    assert row["MAX(age)"] == 2
+
+
+def test_rows_pickle_and_convert_timestamps(path):
+    db = Knex(path, timestamps="datetime")
+    db.logger.setLevel(logging.CRITICAL)
+    db.table("users", [Field.text("name")])
+    db.insert("users", ["name"], ["a"])
+    row = db.select().from_("users").query(format="rows")[0]
+    assert type(row.created_at) == datetime
+    copy = pickle.loads(pickle.dumps(row))
+    assert copy == row and copy.name == "a"
+    db.close()
@@ -0,0 +1,46 @@
+import logging
+import sqlite3
+
+from Knexpy.schema import SchemaCache
+
+
+def test_tables_are_loaded_once(path):
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE t (id TEXT PRIMARY KEY, n INTEGER NOT NULL)")
+    schema = SchemaCache(lambda: connection, logging.getLogger(__name__))
+    table = schema.table("t")
+    assert table == {
+        "columns": {"id": str, "n": int},
+        "declared": {"id": "TEXT", "n": "INTEGER"},
+        "nullable": {"id": True, "n": False},
+        "primary_key": ["id"],
+        "foreign_keys": [],
+    }
+    assert schema.table("t") is table
+    assert schema.table("missing") == None
+    connection.close()
+
+
+def test_schema_changes_of_other_connections_are_seen(db, path):
+    assert db.schema.columns("users") == {
+        "id": str,
+        "name": str,
+        "age": int,
+        "created_at": float,
+        "modified_at": float,
+    }
+    other = sqlite3.connect(path)
+    other.execute("ALTER TABLE users ADD COLUMN email TEXT")
+    other.execute("CREATE TABLE posts (title TEXT)")
+    other.commit()
+    other.close()
+    assert "email" in db.schema.columns("users")
+    assert sorted(db.db_tables) == ["posts", "users"]
+    db.insert_json("users", {"name": "a", "age": 1, "email": "a@b.c"})
+    assert db.select("email").from_("users").query() == [{"email": "a@b.c"}]
+
+
+def test_dropped_tables_are_forgotten(db):
+    db.raw("DROP TABLE users")
+    assert db.schema.table("users") == None
+    assert db.db_tables == {}
@@ -0,0 +1,54 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from conftest import committed
+
+from Knexpy import Field, Knex
+
+
+@pytest.fixture
+def shared(path):
+    db = Knex(path, threaded=True, timeout=5)
+    db.logger.setLevel(logging.CRITICAL)
+    db.table("users", [Field.text("name"), Field.integer("age")])
+    yield db
+    db.close()
+
+
+def test_chains_are_kept_per_thread(shared):
+    shared.bulk_insert("users", [{"name": f"user {i}", "age": i} for i in range(8)])
+    # Every thread starts its chain before any of them runs it
+    barrier = threading.Barrier(4)
+
+    def fetch(age: int):
+        shared.select("age").from_("users").where("age", "=", age)
+        barrier.wait()
+        return shared.query()
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(fetch, range(4)))
+    assert results == [[{"age": i}] for i in range(4)]
+
+
+def test_concurrent_writes_are_committed(shared, path):
+    def write(n: int) -> None:
+        for i in range(25):
+            assert shared.insert("users", ["name", "age"], [f"user {n}", i])
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(write, range(4)))
+    assert committed(path) == 100
+    assert shared.select(shared.count()).from_("users").query() == [{"count": 100}]
+
+
+def test_readers_run_beside_an_open_transaction(shared, path):
+    shared.insert("users", ["name", "age"], ["a", 1])
+    with shared.transaction():
+        shared.insert("users", ["name", "age"], ["b", 2])
+        # Another thread reads on its own connection, without waiting on the writer
+        with ThreadPoolExecutor(1) as pool:
+            rows = pool.submit(lambda: shared.select("name").from_("users").query())
+            assert rows.result(timeout=5) == [{"name": "a"}]
+    assert committed(path) == 2
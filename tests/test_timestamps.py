@@ -0,0 +1,63 @@
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+from Knexpy import Field, Knex
+
+TOMORROW = datetime.now() + timedelta(days=1)
+YESTERDAY = datetime.now() - timedelta(days=1)
+
+
+@pytest.fixture
+def events(db):
+    # Default Knex storage is "real", this table alone keeps milliseconds
+    db.table("events", [Field.text("name")], timestamp_storage="epoch_ms")
+    db.insert("events", ["name"], ["a"])
+    return db
+
+
+def test_where_binds_datetimes_in_the_table_storage(events):
+    rows = events.select().from_("events").where("created_at", "<", TOMORROW).query()
+    assert len(rows) == 1
+    rows = events.select().from_("events").where("created_at", ">", TOMORROW).query()
+    assert len(rows) == 0
+
+
+def test_update_and_delete_bind_in_the_table_storage(events):
+    events.update("events", ["name"], ["b"]).where("created_at", ">", YESTERDAY)
+    assert events.execute()
+    assert events.select("name").from_("events").query() == [{"name": "b"}]
+    events.delete("events").where("created_at", "<", TOMORROW)
+    assert events.execute()
+    assert events.select().from_("events").query() == []
+
+
+def test_prepared_params_bind_in_the_table_storage(events):
+    prepared = events.prepare(
+        events.select().from_("events").where("created_at", "<", events.param("before"))
+    )
+    assert len(prepared.run(before=TOMORROW)) == 1
+    assert len(prepared.run(before=YESTERDAY)) == 0
+
+
+def test_migrated_unit_survives_reopening(db, path):
+    db.insert("users", ["name", "age"], ["old", 1])
+    assert db.migrate_timestamps("users", "epoch_ms") == 1
+    db.close()
+
+    reopened = Knex(path)
+    reopened.logger.setLevel(logging.CRITICAL)
+    # Declared REAL, but the values are milliseconds now
+    reopened.table("users", [Field.text("name"), Field.integer("age")])
+    assert reopened.timestamp_storage("users") == "epoch_ms"
+    reopened.insert("users", ["name", "age"], ["new", 2])
+    rows = reopened.select("name").from_("users").order_by("created_at").query()
+    assert [_["name"] for _ in rows] == ["old", "new"]
+    reopened.close()
+
+
+def test_empty_tables_follow_the_declared_type(db):
+    db.table("events", [Field.text("name")], timestamp_storage="epoch_ms")
+    assert db.timestamp_storage("events") == "epoch_ms"
+    assert db.timestamp_storage("users") == "real"
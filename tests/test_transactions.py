@@ -0,0 +1,201 @@
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from conftest import committed
+
+from Knexpy import Field, Knex
+
+
+@pytest.fixture
+def busy_db(path):
+    # A short busy timeout, locked writes fail fast instead of waiting
+    db = Knex(path, timeout=0.05)
+    db.logger.setLevel(logging.CRITICAL)
+    db.table("users", [Field.text("name"), Field.integer("age")])
+    yield db
+    db.close()
+
+
+def lock(path: str, seconds: float) -> None:
+    "Holds the write lock from another connection for `seconds`"
+    locked = threading.Event()
+
+    def hold() -> None:
+        connection = sqlite3.connect(path)
+        connection.execute("BEGIN IMMEDIATE;")
+        locked.set()
+        time.sleep(seconds)
+        connection.execute("ROLLBACK;")
+        connection.close()
+
+    threading.Thread(target=hold, daemon=True).start()
+    locked.wait()
+
+
+def test_block_commits_once(db, path):
+    with db.transaction():
+        db.insert("users", ["name", "age"], ["a", 1])
+        db.insert("users", ["name", "age"], ["b", 2])
+        assert db.in_transaction
+        assert committed(path) == 0
+    assert not db.in_transaction
+    assert committed(path) == 2
+
+
+def test_block_rolls_back_when_it_raises(db, path):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.insert("users", ["name", "age"], ["a", 1])
+            raise RuntimeError
+    assert not db.in_transaction
+    assert not db.db.in_transaction
+    assert committed(path) == 0
+    assert db.insert("users", ["name", "age"], ["b", 2])
+    assert committed(path) == 1
+
+
+def test_failed_write_only_undoes_itself(db, path):
+    with db.transaction():
+        db.insert("users", ["name", "age"], ["a", 1])
+        assert db.insert("users", ["name", "missing"], ["b", 2]) is False
+        db.insert("users", ["name", "age"], ["c", 3])
+    assert committed(path) == 2
+
+
+def test_inner_block_rolls_back_alone(db, path):
+    with db.transaction():
+        db.insert("users", ["name", "age"], ["a", 1])
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.insert("users", ["name", "age"], ["b", 2])
+                raise RuntimeError
+        assert db.in_transaction
+    names = [_["name"] for _ in db.select("name").from_("users").query()]
+    assert names == ["a"]
+
+
+def test_decorator_retries_busy_writes(busy_db, path):
+    runs = []
+
+    @busy_db.transaction(retries=5, backoff=0.3)
+    def write() -> None:
+        runs.append(1)
+        assert busy_db.insert("users", ["name", "age"], ["a", 1])
+        assert busy_db.insert("users", ["name", "age"], ["b", 2])
+
+    lock(path, 0.5)
+    write()
+    assert len(runs) > 1
+    assert committed(path) == 2
+
+
+def test_decorator_gives_up_after_retries(busy_db, path):
+    @busy_db.transaction(retries=1, backoff=0.01)
+    def write() -> None:
+        busy_db.insert("users", ["name", "age"], ["a", 1])
+
+    lock(path, 0.5)
+    with pytest.raises(sqlite3.OperationalError):
+        write()
+    assert not busy_db.in_transaction
+    assert not busy_db.db.in_transaction
+    time.sleep(0.6)
+    assert busy_db.insert("users", ["name", "age"], ["b", 2])
+    assert committed(path) == 1
+
+
+def test_busy_write_outside_a_block_fails_alone(busy_db, path):
+    lock(path, 0.3)
+    assert busy_db.insert("users", ["name", "age"], ["a", 1]) is False
+    assert not busy_db.db.in_transaction
+
+
+def test_begin_and_rollback(db, path):
+    db.begin()
+    db.insert("users", ["name", "age"], ["a", 1])
+    db.rollback()
+    assert not db.db.in_transaction
+    assert db.select().from_("users").query() == []
+
+
+def test_early_return_commits(db, path):
+    @db.transaction()
+    def write() -> str:
+        db.insert("users", ["name", "age"], ["a", 1])
+        return "done"
+
+    assert write() == "done"
+    assert not db.in_transaction
+    assert committed(path) == 1
+
+
+def test_decorated_function_raising_rolls_back(db, path):
+    runs = []
+
+    @db.transaction(retries=3)
+    def write() -> None:
+        runs.append(1)
+        db.insert("users", ["name", "age"], ["a", 1])
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        write()
+    # Only busy errors are retried
+    assert len(runs) == 1
+    assert committed(path) == 0
+
+
+def test_nested_blocks_are_not_retried(busy_db, path):
+    runs = []
+
+    @busy_db.transaction(retries=3, backoff=0.01)
+    def inner() -> None:
+        runs.append(1)
+        busy_db.insert("users", ["name", "age"], ["b", 2])
+
+    lock(path, 0.3)
+    with pytest.raises(sqlite3.OperationalError):
+        with busy_db.transaction():
+            inner()
+    assert len(runs) == 1
+    assert not busy_db.db.in_transaction
+    time.sleep(0.4)
+    assert committed(path) == 0
+
+
+def test_unknown_mode(db):
+    with pytest.raises(sqlite3.Error):
+        db.transaction(mode="LAZY")  # type: ignore
+
+
+@pytest.fixture
+def threaded(path):
+    db = Knex(path, threaded=True, write_queue=100, timeout=5)
+    db.logger.setLevel(logging.CRITICAL)
+    db.table("users", [Field.text("name"), Field.integer("age")])
+    yield db
+    db.close()
+
+
+def test_begin_pins_the_writer_to_its_thread(threaded, path):
+    threaded.begin()
+    assert threaded.in_transaction
+    # Written in the transaction itself, not by the write queue
+    assert threaded.insert("users", ["name", "age"], ["a", 1])
+    assert threaded.select("name").from_("users").query() == [{"name": "a"}]
+    with ThreadPoolExecutor(1) as pool:
+        rows = pool.submit(lambda: threaded.select("name").from_("users").query())
+        assert rows.result(timeout=5) == []
+        # Other threads wait for the transaction instead of writing into it
+        write = pool.submit(threaded.insert, "users", ["name", "age"], ["b", 2])
+        time.sleep(0.1)
+        assert not write.done()
+        threaded.rollback()
+        assert write.result(timeout=5)
+    assert not threaded.in_transaction
+    assert threaded.select("name").from_("users").query() == [{"name": "b"}]
+    assert committed(path) == 1
@@ -0,0 +1,56 @@
+import logging
+
+import pytest
+from conftest import committed
+
+from Knexpy import Field, Knex, ValidationError
+from Knexpy.validators import accepted_types
+
+
+@pytest.fixture
+def checked(path):
+    db = Knex(path, type_check=True)
+    db.logger.setLevel(logging.CRITICAL)
+    db.table(
+        "users",
+        [Field.text("name"), Field.integer("age"), Field.float("score", {"null": True})],
+    )
+    yield db
+    db.close()
+
+
+def test_accepted_types():
+    assert accepted_types("INTEGER") == (int, bool)
+    assert accepted_types("VARCHAR(255)") == (str,)
+    assert accepted_types("BLOB") == (bytes, bytearray, memoryview, str)
+
+
+def test_validate_reports_every_issue(checked):
+    rows = [
+        {"name": "a", "age": 1, "score": 1},
+        {"name": 2, "age": "b", "score": None},
+        {"name": "c", "age": None, "missing": 1},
+    ]
+    assert [(_["row"], _["column"]) for _ in checked.validate("users", rows)] == [
+        (1, "name"),
+        (1, "age"),
+        (2, "missing"),
+        (2, "age"),
+    ]
+
+
+def test_invalid_inserts_raise_and_roll_back(checked, path):
+    with pytest.raises(ValidationError) as error:
+        checked.insert_json("users", [{"name": "a", "age": 1}, {"name": "b", "age": "x"}])
+    assert error.value.issues == [
+        {"row": 1, "column": "age", "value": "x", "expected": "int | bool"}
+    ]
+    assert committed(path) == 0
+    checked.insert_json("users", {"name": "a", "age": True, "score": 2})
+    assert committed(path) == 1
+
+
+def test_schema_changes_recompile_validators(checked):
+    assert checked.validate("users", {"name": "a", "age": 1, "email": "x"}) != []
+    checked.raw("ALTER TABLE users ADD COLUMN email TEXT")
+    assert checked.validate("users", {"name": "a", "age": 1, "email": "x"}) == []
@@ -0,0 +1,74 @@
+import logging
+import sqlite3
+
+import pytest
+
+from Knexpy import Field, Knex
+
+
+@pytest.fixture
+def seeded(db):
+    db.bulk_insert("users", [{"name": f"user {i}", "age": i} for i in range(50)])
+    return db
+
+
+def ages(db, column, values, operator="in"):
+    chain = db.select("age").from_("users")
+    getattr(chain, f"where_{operator}")(column, values)
+    return [row["age"] for row in chain.order_by("age").query()]
+
+
+def test_values_are_bound(seeded):
+    assert ages(seeded, "age", [3, 1, 2]) == [1, 2, 3]
+    assert ages(seeded, "name", ["user 4", "user 40", "it's"]) == [4, 40]
+    assert seeded.select().from_("users").where_in("age", [1, 2]).to_string() == (
+        "SELECT * FROM users WHERE age IN (?, ?);"
+    )
+
+
+def test_empty_list_matches_nothing(seeded):
+    assert ages(seeded, "age", []) == []
+    assert len(ages(seeded, "age", [], "not_in")) == 50
+
+
+def test_not_in(seeded):
+    assert ages(seeded, "age", list(range(2, 50)), "not_in") == [0, 1]
+
+
+def test_lists_above_the_variable_limit_use_json_each(seeded):
+    seeded.query_builder.max_variables = 10
+    chain = seeded.select("age").from_("users").where("age", ">", 0)
+    chain.where_in("age", list(range(0, 40, 2)))
+    assert "json_each(?)" in chain.to_string()
+    assert [_["age"] for _ in chain.query()] == list(range(2, 40, 2))
+    assert ages(seeded, "age", list(range(1, 50)), "not_in") == [0]
+
+
+def test_lists_above_the_sqlite_limit(path):
+    db = Knex(path, id_strategy="rowid")
+    db.logger.setLevel(logging.CRITICAL)
+    db.table("users", [Field.integer("age")])
+    db.bulk_insert("users", [{"age": i} for i in range(db.query_builder.max_variables + 10)])
+    ids = list(range(1, db.query_builder.max_variables + 11, 3))
+    rows = db.select("id").from_("users").where_in("id", ids).query(json=False)
+    assert [_[0] for _ in rows] == ids
+    db.close()
+
+
+def test_blob_lists_are_inlined(path):
+    db = Knex(path, id_strategy="uuid7")
+    db.logger.setLevel(logging.CRITICAL)
+    db.table("users", [Field.integer("age")])
+    db.bulk_insert("users", [{"age": i} for i in range(30)])
+    ids = [_["id"] for _ in db.select("id").from_("users").query()]
+    db.query_builder.max_variables = 5
+    chain = db.select("age").from_("users").where_in("id", ids[:20])
+    assert "X'" in chain.to_string() and db.query_builder.values == []
+    assert len(chain.query()) == 20
+    db.close()
+
+
+def test_values_json_cannot_carry(seeded):
+    seeded.query_builder.max_variables = 1
+    with pytest.raises(sqlite3.Error):
+        seeded.select().from_("users").where_in("age", [object(), object()])
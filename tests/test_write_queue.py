@@ -0,0 +1,93 @@
+import logging
+import threading
+from concurrent.futures import wait
+from sqlite3 import Error
+
+import pytest
+from conftest import committed
+
+from Knexpy import Field, Knex
+
+INSERT = "INSERT INTO users(id, name, age, created_at, modified_at) VALUES (?,?,?,0,0);"
+
+
+@pytest.fixture
+def queued(path):
+    # A long interval, writes submitted together land in the same group
+    db = Knex(path, threaded=True, write_queue=100, write_interval=0.05, timeout=5)
+    db.logger.setLevel(logging.CRITICAL)
+    db.table("users", [Field.text("name"), Field.integer("age")])
+    yield db
+    db.close()
+
+
+def test_requires_threaded(path):
+    with pytest.raises(Exception):
+        Knex(path, write_queue=10)
+
+
+def test_concurrent_inserts_are_committed(queued, path):
+    def worker(n: int) -> None:
+        for i in range(20):
+            assert queued.insert("users", ["name", "age"], [f"{n}-{i}", i])
+
+    threads = [threading.Thread(target=worker, args=(_,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert committed(path) == 80
+
+
+def test_failing_write_only_fails_itself(queued, path):
+    futures = [
+        queued.submit(INSERT, ["1", "a", 1]),
+        queued.submit(INSERT, ["1", "duplicate", 2]),
+        queued.submit(INSERT, ["2", "b", 3]),
+    ]
+    wait(futures, timeout=5)
+    assert futures[0].result() is True
+    with pytest.raises(Error):
+        futures[1].result()
+    assert futures[2].result() is True
+    assert committed(path) == 2
+
+
+def test_aborted_group_fails_every_pending_write(queued, path):
+    futures = [
+        queued.submit(INSERT, ["1", "a", 1]),
+        # Ends the group transaction from inside, like SQLITE_FULL would
+        queued.submit("ROLLBACK;"),
+        queued.submit(INSERT, ["2", "b", 2]),
+    ]
+    done, pending = wait(futures, timeout=5)
+    assert len(pending) == 0
+    for future in futures:
+        assert future.exception() != None
+    assert committed(path) == 0
+    # The writer keeps going with the next group
+    assert queued.insert("users", ["name", "age"], ["c", 3])
+    assert committed(path) == 1
+
+
+def test_flush_waits_for_submitted_writes(queued, path):
+    futures = [queued.submit(INSERT, [str(i), "a", i]) for i in range(10)]
+    queued.flush()
+    assert all(_.done() for _ in futures)
+    assert committed(path) == 10
+
+
+def test_close_drains_the_queue(queued, path):
+    futures = [queued.submit(INSERT, [str(i), "a", i]) for i in range(10)]
+    queued.close()
+    assert all(_.done() for _ in futures)
+    assert committed(path) == 10
+    with pytest.raises(Error):
+        queued.submit(INSERT, ["11", "a", 11])
+
+
+def test_transaction_writes_skip_the_queue(queued, path):
+    with queued.transaction():
+        assert queued.insert("users", ["name", "age"], ["a", 1])
+        assert committed(path) == 0
+    assert committed(path) == 1